@@ -4,10 +4,13 @@
  * GET /api/voice/agents/[agentId] - Get single agent by ID
  * PATCH /api/voice/agents/[agentId] - Update agent
  * DELETE /api/voice/agents/[agentId] - Delete agent
+ *
+ * Updates and deletions are pushed to the voice workers.
  */
 
 import { NextRequest, NextResponse } from 'next/server';
 import { prisma } from '@/lib/prisma';
+import { pushAgentConfigEvent } from '@/lib/voice-config-push';
 
 interface RouteContext {
   params: Promise<{ agentId: string }>;
@@ -36,7 +39,13 @@ export async function GET(
       );
     }
 
-    return NextResponse.json(agent);
+    // Weak validator so voice workers can revalidate their cached config
+    const etag = `W/"${agent.id}-${agent.updatedAt.getTime()}"`;
+    if (request.headers.get('if-none-match') === etag) {
+      return new NextResponse(null, { status: 304, headers: { ETag: etag } });
+    }
+
+    return NextResponse.json(agent, { headers: { ETag: etag } });
   } catch (error) {
     console.error('Error fetching voice agent:', error);
     return NextResponse.json(
@@ -102,6 +111,8 @@ export async function PATCH(
       },
     });
 
+    await pushAgentConfigEvent({ type: 'agent.updated', agent });
+
     return NextResponse.json(agent);
   } catch (error) {
     console.error('Error updating voice agent:', error);
@@ -136,6 +147,8 @@ export async function DELETE(
       where: { id: agentId },
     });
 
+    await pushAgentConfigEvent({ type: 'agent.deleted', agentId });
+
     return NextResponse.json({ success: true });
   } catch (error) {
     console.error('Error deleting voice agent:', error);
@@ -2,30 +2,85 @@
  * Voice Agents API
  *
  * GET /api/voice/agents - List all voice agents for the current user
+ *   ?status=active       - Only agents with this status
+ *   ?limit=&cursor=      - Paginate; returns { agents, nextCursor }
+ *   ?allUsers=true       - Every user's agents (voice workers bulk-loading configs);
+ *                          requires the X-Ploink-Config-Secret header to match
+ *                          VOICE_AGENT_CONFIG_SECRET
  * POST /api/voice/agents - Create a new voice agent
  */
 
+import { createHash, timingSafeEqual } from 'crypto';
 import { NextRequest, NextResponse } from 'next/server';
 import { prisma } from '@/lib/prisma';
 
 // TODO: Replace with actual auth
 const MOCK_USER_ID = 'user_demo_123';
 
+const MAX_PAGE_SIZE = 500;
+
+const CONFIG_SECRET_HEADER = 'x-ploink-config-secret';
+
+// Every user's configs include tool headers and credentials: only voice
+// workers holding the shared secret may list them
+function isVoiceWorker(request: NextRequest): boolean {
+  const secret = process.env.VOICE_AGENT_CONFIG_SECRET || '';
+  const provided = request.headers.get(CONFIG_SECRET_HEADER) || '';
+  if (!secret || !provided) return false;
+  // Compare digests so the lengths match and the compare is constant time
+  const digest = (value: string) => createHash('sha256').update(value).digest();
+  return timingSafeEqual(digest(provided), digest(secret));
+}
+
 export async function GET(request: NextRequest) {
   try {
-    const userId = request.nextUrl.searchParams.get('userId') || MOCK_USER_ID;
-
-    const agents = await prisma.voiceAgent.findMany({
-      where: { userId },
-      orderBy: { createdAt: 'desc' },
-      include: {
-        _count: {
-          select: { calls: true },
-        },
+    const searchParams = request.nextUrl.searchParams;
+    const allUsers = searchParams.get('allUsers') === 'true';
+    if (allUsers && !isVoiceWorker(request)) {
+      return NextResponse.json({ error: 'Unauthorized' }, { status: 401 });
+    }
+    const userId = searchParams.get('userId') || MOCK_USER_ID;
+    const status = searchParams.get('status');
+    const limitParam = searchParams.get('limit');
+    const cursor = searchParams.get('cursor');
+
+    const where = {
+      ...(allUsers ? {} : { userId }),
+      ...(status ? { status } : {}),
+    };
+    const include = {
+      _count: {
+        select: { calls: true },
       },
+    };
+
+    // Without a limit, keep returning the plain array the dashboard UI expects
+    if (!limitParam) {
+      const agents = await prisma.voiceAgent.findMany({
+        where,
+        orderBy: { createdAt: 'desc' },
+        include,
+      });
+
+      return NextResponse.json(agents);
+    }
+
+    const limit = Math.min(Math.max(parseInt(limitParam, 10) || 1, 1), MAX_PAGE_SIZE);
+    const page = await prisma.voiceAgent.findMany({
+      where,
+      orderBy: { id: 'asc' },
+      take: limit + 1,
+      ...(cursor ? { cursor: { id: cursor }, skip: 1 } : {}),
+      include,
     });
 
-    return NextResponse.json(agents);
+    const hasMore = page.length > limit;
+    const agents = hasMore ? page.slice(0, limit) : page;
+
+    return NextResponse.json({
+      agents,
+      nextCursor: hasMore ? agents[agents.length - 1].id : null,
+    });
   } catch (error) {
     console.error('Error fetching voice agents:', error);
     return NextResponse.json(
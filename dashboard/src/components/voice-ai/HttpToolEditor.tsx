@@ -321,6 +321,102 @@ export function HttpToolEditor({ tool, isOpen, onClose, onSave }: Props) {
                 className="w-full px-3 py-2 border border-gray-300 rounded-lg focus:ring-2 focus:ring-mautic-blue focus:border-mautic-blue transition text-sm font-mono"
               />
             </div>
+
+            {/* Reliability */}
+            <div className="grid grid-cols-2 gap-4">
+              <div>
+                <label className="block text-sm font-medium text-gray-700 mb-1">
+                  Latency Budget (ms)
+                </label>
+                <p className="text-xs text-gray-500 mb-2">
+                  The agent gives up and tells the caller after this long
+                </p>
+                <input
+                  type="number"
+                  min={250}
+                  max={30000}
+                  step={250}
+                  value={formData.timeoutMs ?? ''}
+                  onChange={(e) => setFormData({ ...formData, timeoutMs: e.target.value ? Number(e.target.value) : undefined })}
+                  placeholder="8000"
+                  className="w-full px-3 py-2 border border-gray-300 rounded-lg focus:ring-2 focus:ring-mautic-blue focus:border-mautic-blue transition text-sm"
+                />
+              </div>
+              <div>
+                <label className="block text-sm font-medium text-gray-700 mb-1">
+                  Hedged Retries
+                </label>
+                <p className="text-xs text-gray-500 mb-2">
+                  GET only: retry in parallel when a response is slow
+                </p>
+                <label className="flex items-center gap-2 text-sm">
+                  <input
+                    type="checkbox"
+                    checked={!!formData.hedgeGets}
+                    disabled={formData.method !== 'GET'}
+                    onChange={(e) => setFormData({ ...formData, hedgeGets: e.target.checked })}
+                    className="rounded border-gray-300 text-mautic-blue focus:ring-mautic-blue disabled:opacity-50"
+                  />
+                  Hedge slow requests
+                </label>
+              </div>
+            </div>
+
+            {/* Repeated Calls */}
+            <div>
+              <label className="block text-sm font-medium text-gray-700 mb-1">
+                Repeated Calls
+              </label>
+              <p className="text-xs text-gray-500 mb-2">
+                What the agent does when it makes the same request twice in one call
+              </p>
+              <select
+                value={formData.cachePolicy ?? 'idempotent'}
+                onChange={(e) => setFormData({ ...formData, cachePolicy: e.target.value as HttpTool['cachePolicy'] })}
+                className="w-full px-3 py-2 border border-gray-300 rounded-lg focus:ring-2 focus:ring-mautic-blue focus:border-mautic-blue transition text-sm"
+              >
+                <option value="idempotent">Reuse the result for a minute</option>
+                <option value="cacheable">Reuse the result for the whole call</option>
+                <option value="never">Always send the request</option>
+              </select>
+            </div>
+
+            {/* Response */}
+            <div className="grid grid-cols-2 gap-4">
+              <div>
+                <label className="block text-sm font-medium text-gray-700 mb-1">
+                  Response Fields
+                </label>
+                <p className="text-xs text-gray-500 mb-2">
+                  Comma-separated paths the agent should read, e.g. order.status, items[*].name
+                </p>
+                <input
+                  type="text"
+                  value={formData.responsePath ?? ''}
+                  onChange={(e) => setFormData({ ...formData, responsePath: e.target.value || undefined })}
+                  placeholder="message, status"
+                  className="w-full px-3 py-2 border border-gray-300 rounded-lg focus:ring-2 focus:ring-mautic-blue focus:border-mautic-blue transition text-sm font-mono"
+                />
+              </div>
+              <div>
+                <label className="block text-sm font-medium text-gray-700 mb-1">
+                  Max Response Size (bytes)
+                </label>
+                <p className="text-xs text-gray-500 mb-2">
+                  The rest of a larger response is never downloaded
+                </p>
+                <input
+                  type="number"
+                  min={1024}
+                  max={4194304}
+                  step={1024}
+                  value={formData.maxResponseBytes ?? ''}
+                  onChange={(e) => setFormData({ ...formData, maxResponseBytes: e.target.value ? Number(e.target.value) : undefined })}
+                  placeholder="262144"
+                  className="w-full px-3 py-2 border border-gray-300 rounded-lg focus:ring-2 focus:ring-mautic-blue focus:border-mautic-blue transition text-sm"
+                />
+              </div>
+            </div>
           </form>
 
           {/* Footer */}
@@ -17,6 +17,16 @@ export interface HttpTool {
   headers: Record<string, string>;
   bodyTemplate: string;
   parameters: HttpToolParameter[];
+  // Latency budget per call; the voice agent fails fast past it
+  timeoutMs?: number;
+  // Send a second request when a GET is slower than usual
+  hedgeGets?: boolean;
+  // Fields to hand back to the agent, e.g. "order.status, items[*].name"
+  responsePath?: string;
+  // Stop reading the response body after this many bytes
+  maxResponseBytes?: number;
+  // Reuse of repeated identical calls within one voice session
+  cachePolicy?: 'cacheable' | 'idempotent' | 'never';
 }
 
 export interface McpServer {
@@ -32,6 +42,25 @@ export interface CustomVariable {
   value: string;
 }
 
+// Lead qualification rules for the qualify_lead action (all optional;
+// omitted keys use the voice agent's defaults, see voice-agent/src/lead_scoring.py)
+export interface QualificationDimension {
+  weight?: number;
+  unknown?: number; // 0-1 score when the answer matches no term
+  terms?: Record<string, number> | string[]; // term -> 0-1 score
+  disqualify?: string[];
+}
+
+export interface QualificationRules {
+  threshold?: number; // 0-100
+  budget?: QualificationDimension & {
+    min?: number; // lowest qualifying budget amount
+    target?: number | null; // amount that scores 1 (null = any amount above min)
+  };
+  timeline?: QualificationDimension;
+  needs?: QualificationDimension;
+}
+
 export interface AgentConfig {
   // Basic Info
   name: string;
@@ -50,6 +79,7 @@ export interface AgentConfig {
   // Actions Tab
   httpTools: HttpTool[];
   mcpServers: McpServer[];
+  qualification?: QualificationRules;
 }
 
 // Built-in variables available for insertion
@@ -0,0 +1,57 @@
+/**
+ * Voice Agent Config Push
+ *
+ * Notifies voice workers when an agent config changes, so they never have to
+ * poll the dashboard:
+ * - agent.updated carries the full agent, as GET /api/voice/agents/[id] returns it
+ * - agent.deleted carries the agent id
+ *
+ * Workers listed in VOICE_AGENT_CONFIG_WEBHOOKS (comma-separated URLs) get a
+ * JSON POST signed with HMAC-SHA256 of the body using VOICE_AGENT_CONFIG_SECRET.
+ * Delivery is best effort: workers also resync the full list periodically.
+ */
+
+import { createHmac } from 'crypto';
+
+const webhookUrls = (process.env.VOICE_AGENT_CONFIG_WEBHOOKS || '')
+  .split(',')
+  .map((url) => url.trim())
+  .filter(Boolean);
+const secret = process.env.VOICE_AGENT_CONFIG_SECRET || '';
+
+// A slow worker must not hold up the dashboard request
+const PUSH_TIMEOUT_MS = 2000;
+
+export type AgentConfigEvent =
+  | { type: 'agent.updated'; agent: unknown }
+  | { type: 'agent.deleted'; agentId: string };
+
+export async function pushAgentConfigEvent(event: AgentConfigEvent): Promise<void> {
+  if (webhookUrls.length === 0) return;
+
+  const body = JSON.stringify(event);
+  const headers: Record<string, string> = { 'Content-Type': 'application/json' };
+  if (secret) {
+    headers['X-Ploink-Signature'] = `sha256=${createHmac('sha256', secret).update(body).digest('hex')}`;
+  }
+
+  const results = await Promise.allSettled(
+    webhookUrls.map(async (url) => {
+      const response = await fetch(url, {
+        method: 'POST',
+        headers,
+        body,
+        signal: AbortSignal.timeout(PUSH_TIMEOUT_MS),
+      });
+      if (!response.ok) {
+        throw new Error(`${url} responded ${response.status}`);
+      }
+    })
+  );
+
+  for (const result of results) {
+    if (result.status === 'rejected') {
+      console.warn('Failed to push voice agent config event:', result.reason);
+    }
+  }
+}
@@ -0,0 +1,113 @@
+"""
+CRM Fan-Out Benchmark
+=====================
+Times how long the CRM queue takes to write what qualify_lead and
+save_contact enqueue, against a stand-in Mautic with added latency,
+with the batch's requests run one after another and as a dependency
+graph (src/fanout.py).
+
+Scenarios, per tool call:
+- qualify_lead, known contact: note + tag (search, then edit || note)
+- save_contact, known contact: upsert + note (search, then edit || note)
+- save_contact, new contact: upsert + note (search, create, then note)
+- mixed: one of each of the above in the same batch
+
+Usage:
+    python benchmarks/bench_crm_fanout.py [--latency 0.1] [--runs 5]
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import http_pool  # noqa: E402
+from contacts import get_contact_cache, normalize_phone  # noqa: E402
+from crm_queue import ADD_NOTE, TAG_CONTACT, UPSERT_CONTACT, CrmQueue  # noqa: E402
+from standins import StandInMautic  # noqa: E402
+
+KNOWN_PHONE = '+15550100001'
+KNOWN_PHONE_2 = '+15550100002'
+
+
+def qualify_known(queue: CrmQueue, run: int) -> None:
+    queue.enqueue(ADD_NOTE, KNOWN_PHONE, text=f"[Voice Qualification] run {run}\nStatus: QUALIFIED")
+    queue.enqueue(TAG_CONTACT, KNOWN_PHONE, tags=['qualified-lead'])
+
+
+def save_known(queue: CrmQueue, run: int) -> None:
+    queue.enqueue(UPSERT_CONTACT, KNOWN_PHONE_2, firstname='Dana', lastname='Known', phone=KNOWN_PHONE_2,
+                  tags=['voice-lead', 'inbound-call'])
+    queue.enqueue(ADD_NOTE, KNOWN_PHONE_2, text=f"[Voice Call] run {run}")
+
+
+def save_new(queue: CrmQueue, run: int) -> None:
+    phone = f"+1555020{run:04d}"
+    queue.enqueue(UPSERT_CONTACT, phone, firstname='Sam', lastname='New', phone=phone,
+                  tags=['voice-lead', 'inbound-call'])
+    queue.enqueue(ADD_NOTE, phone, text=f"[Voice Call] run {run}")
+
+
+def mixed(queue: CrmQueue, run: int) -> None:
+    qualify_known(queue, run)
+    save_known(queue, run)
+    save_new(queue, run + 5000)
+
+
+SCENARIOS = [
+    ('qualify_lead, known contact', qualify_known),
+    ('save_contact, known contact', save_known),
+    ('save_contact, new contact', save_new),
+    ('mixed batch', mixed),
+]
+
+
+async def time_scenario(mautic: StandInMautic, enqueue, concurrent: bool, runs: int, offset: int):
+    samples = []
+    requests = 0
+    for run in range(runs):
+        # Every run searches for its contacts, as a first call from a number would
+        for phone in (KNOWN_PHONE, KNOWN_PHONE_2):
+            get_contact_cache().invalidate(normalize_phone(phone))
+
+        queue = CrmQueue(mautic.url, 'token', linger=0.0, concurrent=concurrent)
+        before = sum(mautic.requests.values())
+        started = time.perf_counter()
+        enqueue(queue, offset + run)
+        await queue.drain(timeout=30)
+        samples.append(time.perf_counter() - started)
+        queue._worker.cancel()
+        requests = sum(mautic.requests.values()) - before
+    return statistics.median(samples), requests
+
+
+async def main(args) -> None:
+    mautic = StandInMautic(latency=args.latency)
+    await mautic.start()
+    mautic.contacts['1'] = {'phone': KNOWN_PHONE, 'firstname': 'Kim'}
+    mautic.contacts['2'] = {'phone': KNOWN_PHONE_2, 'firstname': 'Dana'}
+    mautic._next_id = 3
+
+    print(f"Stand-in Mautic latency {args.latency * 1000:.0f}ms, median of {args.runs} runs\n")
+    print(f"{'scenario':<30} {'requests':>8} {'sequential':>11} {'fan-out':>9} {'saved':>7}")
+    try:
+        for index, (name, enqueue) in enumerate(SCENARIOS):
+            offset = index * 1000
+            sequential, requests = await time_scenario(mautic, enqueue, False, args.runs, offset)
+            concurrent, _ = await time_scenario(mautic, enqueue, True, args.runs, offset + 500)
+            print(f"{name:<30} {requests:>8} {sequential * 1000:>9.0f}ms {concurrent * 1000:>7.0f}ms "
+                  f"{(1 - concurrent / sequential) * 100:>6.0f}%")
+    finally:
+        await http_pool.shutdown()
+        await mautic.stop()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="CRM write fan-out benchmark")
+    parser.add_argument('--latency', type=float, default=0.1, help="stand-in Mautic latency per request (s)")
+    parser.add_argument('--runs', type=int, default=5)
+    asyncio.run(main(parser.parse_args()))
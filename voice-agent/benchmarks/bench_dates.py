@@ -0,0 +1,104 @@
+"""
+Date Parsing Benchmark
+======================
+Times the fast-path parser (src/date_parsing.py) against dateparser on a
+corpus of phrasings callers actually use, and checks that both give the
+same answer wherever dateparser understands the phrase.
+
+Phrases where dateparser is known to be wrong ("tuesday at 3" lands in
+March, "next tuesday 10am" is None) are listed separately instead of
+being counted as mismatches. The same corpus is checked by
+tests/test_date_parsing.py.
+
+Usage:
+    python benchmarks/bench_dates.py [iterations]
+"""
+
+import os
+import sys
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import date_parsing  # noqa: E402
+
+# Saturday afternoon, so "today 4pm", "Saturday", "2pm" and past month-days
+# all exercise the rollover rules
+BASE = datetime(2026, 10, 17, 15, 20)
+
+CORPUS = [
+    'tomorrow 2pm', 'tomorrow 2:00 PM', 'tomorrow at 2:30 p.m.', 'tomorrow 14:00',
+    'today 4pm', 'tonight 7pm', 'day after tomorrow noon', 'tomorrow',
+    'Tuesday 3:00 PM', 'Monday 10am', 'friday 11:30 am', 'Saturday 9am',
+    'Wednesday', 'Thursday 1pm', 'sunday noon',
+    'next week', 'next week 2pm', 'in 3 days 2pm', 'in two weeks', 'in 1 day 9am',
+    'December 24 2:00 PM', 'Dec 24th 14:00', '24 December 9am', 'December 24',
+    'the 3rd of November at 4pm', 'october 10 2pm', 'November 5th 10:30 AM',
+    '12/24 2pm', '12/24', '1/5 9am',
+    '2pm', '1pm', '9am', '16:30',
+]
+
+# dateparser gives None or a wrong date; the fast path's answer is intended
+DIVERGENT = [
+    'next tuesday 10am', 'this tuesday 10am', 'tuesday at 3',
+    "monday 2 o'clock", 'on Monday at 10', 'this coming friday 2pm',
+]
+
+SETTINGS = {'PREFER_DATES_FROM': 'future', 'RELATIVE_BASE': BASE}
+
+
+def timed(fn, phrases, iterations):
+    started = time.perf_counter()
+    for _ in range(iterations):
+        for phrase in phrases:
+            fn(phrase)
+    return (time.perf_counter() - started) / (iterations * len(phrases))
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+
+    started = time.perf_counter()
+    import dateparser
+    dateparser.parse('tomorrow', settings=SETTINGS)
+    print(f"dateparser import + first parse: {(time.perf_counter() - started) * 1000:.0f} ms")
+
+    # Equivalence on the shared corpus
+    mismatches = 0
+    for phrase in CORPUS:
+        expected = dateparser.parse(phrase, settings=SETTINGS)
+        actual = date_parsing.parse_datetime(phrase, base=BASE)
+        if expected is not None and actual != expected:
+            mismatches += 1
+            print(f"  MISMATCH {phrase!r}: dateparser={expected} fast={actual}")
+    print(f"equivalence: {len(CORPUS) - mismatches}/{len(CORPUS)} phrases agree")
+
+    print("\nintentional divergences:")
+    for phrase in DIVERGENT:
+        expected = dateparser.parse(phrase, settings=SETTINGS)
+        actual = date_parsing.parse_datetime(phrase, base=BASE)
+        print(f"  {phrase!r:<28} dateparser={str(expected):<20} fast={actual}")
+
+    # Timing: dateparser vs the fast path without and with its memo
+    slow = timed(lambda p: dateparser.parse(p, settings=SETTINGS), CORPUS, max(1, iterations // 10))
+
+    def uncached(phrase):
+        date_parsing._parse_fast.cache_clear()
+        date_parsing.parse_datetime(phrase, base=BASE)
+
+    cold = timed(uncached, CORPUS, iterations)
+    warm = timed(lambda p: date_parsing.parse_datetime(p, base=BASE), CORPUS, iterations * 10)
+
+    print(f"\n{'parser':<24}{'per phrase (us)':>16}{'speedup':>10}")
+    print(f"{'dateparser':<24}{slow * 1e6:>16.1f}{'1.0x':>10}")
+    print(f"{'fast path (cold)':<24}{cold * 1e6:>16.1f}{slow / cold:>9.0f}x")
+    print(f"{'fast path (memoized)':<24}{warm * 1e6:>16.2f}{slow / warm:>9.0f}x")
+    print(f"\n{date_parsing.cache_info()}")
+
+    if mismatches:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
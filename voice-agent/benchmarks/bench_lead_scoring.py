@@ -0,0 +1,117 @@
+"""
+Lead Scoring Benchmark
+======================
+Scores synthetic qualify_lead answers with the rules engine
+(src/lead_scoring.py):
+- one at a time, as the tool does during a call
+- in batch, as when re-scoring history after a rules change
+- with the old substring check, counting the answers it got wrong
+  ("10000" contains "0", "nonetheless" contains "none")
+- with answers that mention numbers but no budget ("no one told me",
+  "my 3 partners", "50/50"), which must not be read as amounts
+
+Batch and per-record results are compared record by record (first 20,000).
+
+Usage:
+    python benchmarks/bench_lead_scoring.py [--records 1000000] [--seed 7]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from lead_scoring import compile_rules, extract_amount  # noqa: E402
+
+BUDGETS = [
+    '$5,000', '10000', '$20k', '5-10k', 'around 2500', 'a few thousand', 'twenty five grand',
+    'between five and ten thousand', '$100', '0', 'none', 'no budget', 'nothing yet',
+    'not sure', 'flexible', 'whatever it takes', "we don't have a budget", '1.5m', '$750 a month',
+    'none of your business, but over 50k',
+]
+# Numbers, but not budgets
+NOT_AMOUNTS = [
+    'no one told me', "haven't set one", 'my 3 partners', '50/50', 'a couple of weeks', 'maybe one day',
+    'we have 100 employees, budget tbd',
+]
+BUDGETS += NOT_AMOUNTS
+TIMELINES = [
+    'asap', 'this week', 'next month', 'in a few months', 'next year', 'no rush', 'just looking',
+    'this quarter', "I'm not sure", 'tomorrow', 'someday',
+]
+NEEDS = ['roof repair', 'new website', 'crm migration', 'marketing automation', 'not sure', '']
+
+# Custom rules, as an agent might configure them in the dashboard
+RULES = {
+    'threshold': 55,
+    'budget': {'min': 1000, 'target': 10000},
+    'needs': {'terms': {'roof repair': 1.0, 'crm migration': 0.9, 'marketing automation': 0.8}},
+}
+
+
+def old_rule(budget: str) -> bool:
+    budget_lower = budget.lower()
+    return not any(x in budget_lower for x in ["none", "no budget", "0", "zero", "nothing"])
+
+
+def variants(pool):
+    # Real answers vary in wording, so each base answer gets a few variants
+    return [f"{answer}{suffix}" for answer in pool for suffix in ('', '.', ' I think', ', maybe')]
+
+
+def main(args) -> None:
+    rng = random.Random(args.seed)
+    budgets = rng.choices(variants(BUDGETS), k=args.records)
+    timelines = rng.choices(variants(TIMELINES), k=args.records)
+    needs = rng.choices(variants(NEEDS), k=args.records)
+
+    started = time.perf_counter()
+    scorer = compile_rules(RULES)
+    compile_time = time.perf_counter() - started
+
+    single_count = min(args.records, 20000)
+    started = time.perf_counter()
+    single = [scorer.score(budgets[i], timelines[i], needs[i]) for i in range(single_count)]
+    per_record = (time.perf_counter() - started) / single_count
+
+    started = time.perf_counter()
+    batch = scorer.score_batch(budgets, timelines, needs)
+    batch_time = time.perf_counter() - started
+
+    mismatches = sum(
+        1 for i, lead in enumerate(single)
+        if lead.score != batch.scores[i] or lead.qualified != bool(batch.qualified[i])
+    )
+
+    defaults = compile_rules(None)
+    distinct_budgets = sorted(set(budgets))
+    wrong = [b for b in distinct_budgets if old_rule(b) != defaults.score(b, '', '').qualified]
+
+    print(f"{args.records:,} records, {len(set(budgets)) + len(set(timelines)) + len(set(needs)):,} distinct answers")
+    print(f"compile rules:          {compile_time * 1000:>8.2f}ms (once per distinct config)")
+    print(f"per record:             {per_record * 1e6:>8.1f}us  ({args.records * per_record:.1f}s for all)")
+    print(f"batch:                  {batch_time:>8.2f}s   ({args.records / batch_time:,.0f} records/s)")
+    print(f"batch vs per record:    {mismatches} mismatches in {single_count:,}")
+    print(f"qualified (custom):     {int(batch.qualified.sum()):,}")
+    misread = [answer for answer in NOT_AMOUNTS if extract_amount(answer) is not None]
+    print(f"numbers read as budgets: {len(misread)} of {len(NOT_AMOUNTS)}"
+          + (f" ({', '.join(repr(answer) for answer in misread)})" if misread else ''))
+    for answer in NOT_AMOUNTS:
+        lead = defaults.score(answer, '', '')
+        print(f"  {answer!r}: amount {lead.budget_amount}, score {lead.score:.0f}, "
+              f"{'qualified' if lead.qualified else 'not qualified'}")
+
+    print(f"\nold substring rule disagrees on {len(wrong)} of {len(distinct_budgets)} distinct budgets, e.g.:")
+    for budget in sorted({w.rstrip('.').replace(' I think', '').replace(', maybe', '') for w in wrong}):
+        print(f"  {budget!r}: old {'qualified' if old_rule(budget) else 'not qualified'}, "
+              f"now {'qualified' if defaults.score(budget, '', '').qualified else 'not qualified'}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Lead scoring benchmark")
+    parser.add_argument('--records', type=int, default=1_000_000)
+    parser.add_argument('--seed', type=int, default=7)
+    main(parser.parse_args())
@@ -0,0 +1,209 @@
+"""
+Prompt Prefix Benchmark
+=======================
+Simulates a day of calls to a few agents and compares what the LLM is sent
+at the start of each call, as the agent used to build it (every variable
+substituted in place, HTTP tools in dashboard order) and as
+src/prompt_assembly.py builds it (stable prefix, call details last):
+- tokens of the system prompt + tool schemas
+- tokens shared with the previous call of the same agent
+- tokens OpenAI can serve from its prompt cache (exact prefixes of at
+  least 1024 tokens, in 128-token steps)
+- time to assemble the instructions and tool list per call
+
+The request is serialized in the order the provider renders it: the
+instructions, the tool schemas, then any further messages (the call
+details). Tokens are counted with tiktoken (o200k_base) when installed,
+otherwise estimated at 4 characters per token.
+
+Usage:
+    python benchmarks/bench_prompt_prefix.py [--calls 300] [--seed 7]
+"""
+
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from livekit.agents.llm import is_function_tool  # noqa: E402
+from livekit.agents.llm.tool_context import get_raw_function_info  # noqa: E402
+from livekit.agents.llm.utils import build_strict_openai_schema  # noqa: E402
+
+import agent  # noqa: E402
+from prompt_assembly import DEFAULT_PROMPT, get_prompt_assembler  # noqa: E402
+from tool_registry import get_tool_registry  # noqa: E402
+
+CACHE_MIN_TOKENS = 1024
+CACHE_STEP = 128
+
+POLICIES = """
+Office hours are Monday to Friday, 8am to 6pm. Emergency roof repairs are
+available 24/7 at a call-out fee of $150. Free inspections within 30 miles.
+We install asphalt shingles, metal roofing, tile and flat roofs, and handle
+gutters, skylights and storm damage claims with all major insurers.
+Never quote a final price on the phone; offer an on-site estimate instead.
+If the caller is an existing customer, ask for their job number.
+""" * 4
+
+AGENTS = {
+    'roofing': {
+        'systemPrompt': (
+            "You are {{agent_name}}, the receptionist for {{company_name}}. Today is {{current_date}} "
+            "and it is {{current_time}}.\n" + POLICIES
+            + "\nQualify every new lead and offer to book an inspection."
+        ),
+        'customVariables': [{'key': 'agent_name', 'value': 'Riley'}],
+        'httpTools': ['lookup_job', 'check_service_area', 'storm_reports'],
+    },
+    'dental': {
+        'systemPrompt': (
+            "Current date: {{current_date}}\nYou book appointments for {{company_name}}, a family "
+            "dental practice.\n" + POLICIES.replace('roof', 'dental')
+        ),
+        'customVariables': [],
+        'httpTools': ['insurance_check', 'patient_lookup'],
+    },
+    'default': {
+        'systemPrompt': '',
+        'customVariables': [],
+        'httpTools': [],
+    },
+}
+
+
+def http_tool(name: str) -> dict:
+    return {
+        'name': name,
+        'description': f"Call the {name.replace('_', ' ')} endpoint",
+        'url': f"https://api.example.com/{name}",
+        'method': 'GET',
+        'parameters': [
+            {'name': 'query', 'type': 'string', 'description': 'What to look up', 'required': True},
+            {'name': 'limit', 'type': 'number', 'description': 'Maximum results', 'required': False},
+        ],
+    }
+
+
+def tokenizer():
+    try:
+        import tiktoken
+    except ImportError:
+        return None, 'estimated at 4 chars/token (tiktoken not installed)'
+    return tiktoken.get_encoding('o200k_base').encode, 'tiktoken o200k_base'
+
+
+def tool_schema(tool) -> dict:
+    if is_function_tool(tool):
+        return build_strict_openai_schema(tool)
+    return {'type': 'function', 'function': get_raw_function_info(tool).raw_schema}
+
+
+def request_text(instructions: str, tools, details: str) -> str:
+    return json.dumps(
+        [instructions, [tool_schema(t) for t in tools]] + ([details] if details else []),
+        separators=(',', ':'),
+    )
+
+
+def variables_at(config: dict, now: datetime) -> dict:
+    # As PloinkVoiceAssistant builds them
+    variables = {
+        'current_date': now.strftime('%B %d, %Y'),
+        'current_time': now.strftime('%I:%M %p'),
+        'agent_name': 'Voice Assistant',
+        'company_name': os.getenv('COMPANY_NAME', 'Our Company'),
+    }
+    for var in config['customVariables']:
+        variables[var['key']] = var['value']
+    return variables
+
+
+def old_assembly(config: dict, http_tools: list, variables: dict):
+    instructions = agent.substitute_variables(config['systemPrompt'] or DEFAULT_PROMPT, variables)
+    reserved = agent.builtin_tool_names()
+    return instructions, [c.tool for c in get_tool_registry().compile_all(http_tools, reserved=reserved)], ''
+
+
+def new_assembly(config: dict, http_tools: list, variables: dict):
+    return get_prompt_assembler().assemble(
+        config['systemPrompt'], variables, http_tools, reserved=agent.builtin_tool_names()
+    )
+
+
+def common_prefix(a: str, b: str) -> str:
+    limit = min(len(a), len(b))
+    index = 0
+    while index < limit and a[index] == b[index]:
+        index += 1
+    return a[:index]
+
+
+def count(text: str, encode) -> int:
+    return len(encode(text)) if encode is not None else (len(text) + 3) // 4
+
+
+def cacheable(tokens: int) -> int:
+    return tokens // CACHE_STEP * CACHE_STEP if tokens >= CACHE_MIN_TOKENS else 0
+
+
+def main(args) -> None:
+    rng = random.Random(args.seed)
+    encode, counting = tokenizer()
+    # Built-in tools are the same for every agent, in the order Agent lists them
+    builtin = [t for t in agent.PloinkVoiceAssistant().tools if is_function_tool(t)]
+
+    now = datetime(2026, 3, 2, 8, 0)
+    previous = {}
+    stats = {name: {'old': [], 'new': [], 'total_old': [], 'total_new': []} for name in AGENTS}
+    timings = {'old': [], 'new': []}
+    for _ in range(args.calls):
+        now += timedelta(seconds=rng.expovariate(1 / 240))
+        name = rng.choice(list(AGENTS))
+        config = AGENTS[name]
+        tools = [http_tool(t) for t in config['httpTools']]
+        # The dashboard returns tools in whatever order they were last saved
+        rng.shuffle(tools)
+        variables = variables_at(config, now)
+
+        for mode, assemble in (('old', old_assembly), ('new', new_assembly)):
+            started = time.perf_counter()
+            instructions, dynamic, details = assemble(config, tools, variables)
+            timings[mode].append(time.perf_counter() - started)
+            text = request_text(instructions, dynamic + builtin, details)
+            last = previous.get((name, mode))
+            if last is not None:
+                stats[name][mode].append(count(common_prefix(last, text), encode))
+            stats[name][f"total_{mode}"].append(count(text, encode))
+            previous[(name, mode)] = text
+
+    print(f"{args.calls} calls over {(now - datetime(2026, 3, 2, 8, 0)).total_seconds() / 3600:.1f}h, "
+          f"tokens {counting}\n")
+    print(f"{'agent':<10}{'tokens':>8}{'shared (old)':>14}{'shared (new)':>14}"
+          f"{'cached (old)':>14}{'cached (new)':>14}")
+    for name, data in stats.items():
+        if not data['old']:
+            continue
+        print(f"{name:<10}{statistics.mean(data['total_new']):>8.0f}"
+              f"{statistics.mean(data['old']):>14.0f}{statistics.mean(data['new']):>14.0f}"
+              f"{statistics.mean(cacheable(t) for t in data['old']):>14.0f}"
+              f"{statistics.mean(cacheable(t) for t in data['new']):>14.0f}")
+
+    def per_call(samples):
+        return statistics.median(samples) * 1e6
+
+    assembler = get_prompt_assembler()
+    print(f"\ninstructions + tools per call: old {per_call(timings['old']):.0f}us, new {per_call(timings['new']):.0f}us "
+          f"(prefix cache: {assembler.hits} hits, {assembler.misses} misses)")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Prompt prefix stability benchmark")
+    parser.add_argument('--calls', type=int, default=300)
+    parser.add_argument('--seed', type=int, default=7)
+    main(parser.parse_args())
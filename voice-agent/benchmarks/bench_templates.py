@@ -0,0 +1,71 @@
+"""
+Template Rendering Benchmark
+============================
+Compares the compiled single-pass template engine (src/templates.py) with
+the previous approach of one str.replace() per variable.
+
+Usage:
+    python benchmarks/bench_templates.py [iterations]
+"""
+
+import json
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from templates import ESCAPE_JSON, ESCAPE_TEXT, compile_template  # noqa: E402
+
+
+def replace_per_variable(text, variables):
+    """The pre-compiled-template implementation, kept for comparison."""
+    result = text
+    for key, value in variables.items():
+        result = result.replace(f'{{{{{key}}}}}', str(value))
+    return result
+
+
+def build_prompt(num_variables: int, repeats: int):
+    variables = {f'var_{i}': f'value {i}' for i in range(num_variables)}
+    variables.update({
+        'current_date': 'October 17, 2026',
+        'current_time': '02:30 PM',
+        'company_name': 'Ploink',
+    })
+    paragraph = (
+        "You are the assistant for {{company_name}}. Today is {{current_date}} at {{current_time}}. "
+        + ' '.join(f'{{{{var_{i}}}}}' for i in range(0, num_variables, 5))
+        + " Be friendly, professional, and concise.\n"
+    )
+    return paragraph * repeats, variables
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+
+    print(f"{'case':<28}{'replace (us)':>14}{'compiled (us)':>15}{'speedup':>10}")
+    for num_variables, repeats in [(5, 5), (25, 20), (100, 40)]:
+        text, variables = build_prompt(num_variables, repeats)
+        compiled = compile_template(text)
+        assert compiled.render(variables, ESCAPE_TEXT) == replace_per_variable(text, variables)
+
+        old = timeit.timeit(lambda: replace_per_variable(text, variables), number=iterations)
+        new = timeit.timeit(lambda: compile_template(text).render(variables), number=iterations)
+        label = f"{num_variables} vars / {len(text)} chars"
+        print(f"{label:<28}{old / iterations * 1e6:>14.2f}{new / iterations * 1e6:>15.2f}{old / new:>9.1f}x")
+
+    # Correctness difference that motivated JSON escaping
+    body = '{"name": "{{caller_name}}", "note": "{{note}}"}'
+    args = {'caller_name': 'Dwayne "The Rock" Johnson', 'note': 'line one\nline two'}
+    try:
+        json.loads(replace_per_variable(body, args))
+        legacy = 'ok'
+    except json.JSONDecodeError:
+        legacy = 'invalid JSON'
+    parsed = json.loads(compile_template(body).render(args, ESCAPE_JSON))
+    print(f"\nbody with quotes/newlines: replace -> {legacy}, compiled -> {parsed}")
+
+
+if __name__ == '__main__':
+    main()
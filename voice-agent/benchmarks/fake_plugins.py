@@ -0,0 +1,170 @@
+"""
+Fake Voice Pipeline Plugins
+===========================
+Scripted, offline stand-ins for the STT/LLM/TTS plugins, for load tests:
+- FakeSTT "recognizes" text that FakeSTT.encode() packed into an audio frame
+- ScriptedLLM answers each user turn with the tool calls scripted for it,
+  then with a short reply once the tool results are in
+- FakeTTS returns silence proportional to the text length
+
+Each has a configurable latency, so the worker sees realistic waits
+without any network access.
+"""
+
+import asyncio
+import json
+import uuid
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from livekit import rtc
+from livekit.agents import APIConnectOptions, llm, stt, tts
+from livekit.agents.types import DEFAULT_API_CONNECT_OPTIONS, NOT_GIVEN, NotGivenOr
+from livekit.agents.utils import AudioBuffer
+
+SAMPLE_RATE = 16000
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# STT
+# ═══════════════════════════════════════════════════════════════════════════════
+
+class FakeSTT(stt.STT):
+    """Recognizes the text encoded into a frame by FakeSTT.encode()."""
+
+    def __init__(self, latency: float = 0.15) -> None:
+        super().__init__(capabilities=stt.STTCapabilities(streaming=False, interim_results=False))
+        self.latency = latency
+
+    @staticmethod
+    def encode(text: str) -> rtc.AudioFrame:
+        data = text.encode()
+        if len(data) % 2:
+            data += b' '
+        return rtc.AudioFrame(data, SAMPLE_RATE, 1, len(data) // 2)
+
+    async def _recognize_impl(
+        self,
+        buffer: AudioBuffer,
+        *,
+        language: NotGivenOr[str] = NOT_GIVEN,
+        conn_options: APIConnectOptions,
+    ) -> stt.SpeechEvent:
+        await asyncio.sleep(self.latency)
+        frames = buffer if isinstance(buffer, list) else [buffer]
+        text = b''.join(bytes(frame.data) for frame in frames).decode().strip()
+        return stt.SpeechEvent(
+            type=stt.SpeechEventType.FINAL_TRANSCRIPT,
+            alternatives=[stt.SpeechData(language='en', text=text)],
+        )
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# LLM
+# ═══════════════════════════════════════════════════════════════════════════════
+
+@dataclass
+class ToolCall:
+    name: str
+    arguments: Dict[str, Any] = field(default_factory=dict)
+
+
+class ScriptedLLM(llm.LLM):
+    """
+    Replies to each user utterance with the tool calls scripted for it.
+
+    Utterances without a script get a plain text reply. After tool results
+    come back, the reply summarizes them in one sentence.
+    """
+
+    def __init__(self, ttft: float = 0.35, reply_latency: float = 0.2) -> None:
+        super().__init__()
+        self.ttft = ttft
+        self.reply_latency = reply_latency
+        self._script: Dict[str, List[ToolCall]] = {}
+
+    @property
+    def model(self) -> str:
+        return 'scripted'
+
+    def script(self, utterance: str, calls: List[ToolCall]) -> None:
+        self._script[utterance] = calls
+
+    def chat(
+        self,
+        *,
+        chat_ctx: llm.ChatContext,
+        tools: Optional[list] = None,
+        conn_options: APIConnectOptions = DEFAULT_API_CONNECT_OPTIONS,
+        parallel_tool_calls: NotGivenOr[bool] = NOT_GIVEN,
+        tool_choice: NotGivenOr[llm.ToolChoice] = NOT_GIVEN,
+        extra_kwargs: NotGivenOr[Dict[str, Any]] = NOT_GIVEN,
+    ) -> 'ScriptedStream':
+        return ScriptedStream(self, chat_ctx=chat_ctx, tools=tools or [], conn_options=conn_options)
+
+
+class ScriptedStream(llm.LLMStream):
+    async def _run(self) -> None:
+        scripted: ScriptedLLM = self._llm
+        request_id = uuid.uuid4().hex[:12]
+        last = self._chat_ctx.items[-1] if self._chat_ctx.items else None
+
+        if isinstance(last, llm.ChatMessage) and last.role == 'user':
+            await asyncio.sleep(scripted.ttft)
+            calls = scripted._script.get(last.text_content or '', [])
+            if calls:
+                self._event_ch.send_nowait(llm.ChatChunk(
+                    id=request_id,
+                    delta=llm.ChoiceDelta(role='assistant', tool_calls=[
+                        llm.FunctionToolCall(
+                            name=call.name,
+                            arguments=json.dumps(call.arguments),
+                            call_id=f"call_{uuid.uuid4().hex[:8]}",
+                        )
+                        for call in calls
+                    ]),
+                ))
+                return
+            text = "Sure, how can I help with that?"
+        else:
+            await asyncio.sleep(scripted.reply_latency)
+            outputs = [item.output for item in self._chat_ctx.items[-3:] if item.type == 'function_call_output']
+            text = outputs[-1] if outputs else "Okay."
+
+        for word in text.split(' '):
+            self._event_ch.send_nowait(llm.ChatChunk(
+                id=request_id,
+                delta=llm.ChoiceDelta(role='assistant', content=word + ' '),
+            ))
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# TTS
+# ═══════════════════════════════════════════════════════════════════════════════
+
+class FakeTTS(tts.TTS):
+    """Silence, ~60ms of audio per character, after a fixed time-to-first-byte."""
+
+    def __init__(self, ttfb: float = 0.2, sample_rate: int = 24000) -> None:
+        super().__init__(capabilities=tts.TTSCapabilities(streaming=False), sample_rate=sample_rate, num_channels=1)
+        self.ttfb = ttfb
+
+    def synthesize(
+        self, text: str, *, conn_options: APIConnectOptions = DEFAULT_API_CONNECT_OPTIONS
+    ) -> 'FakeChunkedStream':
+        return FakeChunkedStream(tts=self, input_text=text, conn_options=conn_options)
+
+
+class FakeChunkedStream(tts.ChunkedStream):
+    async def _run(self, output_emitter: tts.AudioEmitter) -> None:
+        fake: FakeTTS = self._tts
+        await asyncio.sleep(fake.ttfb)
+        output_emitter.initialize(
+            request_id=uuid.uuid4().hex[:12],
+            sample_rate=fake.sample_rate,
+            num_channels=1,
+            mime_type='audio/pcm',
+        )
+        samples = int(fake.sample_rate * 0.06 * max(1, len(self.input_text)))
+        output_emitter.push(b'\x00\x00' * samples)
+        output_emitter.flush()
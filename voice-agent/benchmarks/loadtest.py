@@ -0,0 +1,384 @@
+"""
+Worker Load Test
+================
+Runs many simulated calls in one process against local stand-ins, to find
+how many concurrent sessions a worker can carry:
+- Each call follows the entrypoint: config load from the dashboard,
+  plugins from the job's userdata, AgentSession + PloinkVoiceAssistant,
+  cached greeting, then scripted caller turns
+- There is no room, so no audio reaches the session: each caller turn is
+  recognized by FakeSTT in the harness and handed to the session as text
+  (session.run), which then goes ScriptedLLM -> real tool execution, calling
+  save_contact, qualify_lead, book_appointment, a dynamic HTTP tool and
+  send_text_message
+- Dashboard, Mautic, Twilio and the customer endpoint are local servers
+  with configurable latency; nothing leaves the machine
+
+For each concurrency level it reports turn latency, tool latency
+percentiles (from the span histograms), event-loop lag and memory per
+session, then the highest level that stayed within the SLOs.
+
+Usage:
+    python benchmarks/loadtest.py [--levels 10,25,50] [--turns 5] [--think 1.0]
+"""
+
+import argparse
+import asyncio
+import gc
+import logging
+import os
+import resource
+import shutil
+import sys
+import tempfile
+import time
+from types import SimpleNamespace
+from typing import Dict, List, Optional
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from fake_plugins import FakeSTT, FakeTTS, ScriptedLLM, ToolCall  # noqa: E402
+from standins import StandInCustomer, StandInDashboard, StandInMautic, StandInTwilio  # noqa: E402
+
+AGENT_ID = 'loadtest-agent'
+
+
+def percentile(values: List[float], q: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * q))]
+
+
+def rss_bytes() -> int:
+    """Current resident set size (Linux /proc; peak RSS elsewhere)."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class LoopMonitor:
+    """Samples event-loop lag (sleep overshoot) and peak RSS."""
+
+    def __init__(self, interval: float = 0.05) -> None:
+        self.interval = interval
+        self.lags: List[float] = []
+        self.peak_rss = 0
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        self.lags.clear()
+        self.peak_rss = rss_bytes()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            await asyncio.sleep(self.interval)
+            self.lags.append(max(0.0, loop.time() - started - self.interval))
+            self.peak_rss = max(self.peak_rss, rss_bytes())
+
+
+def agent_config(customer_url: str) -> Dict:
+    return {
+        'id': AGENT_ID,
+        'name': 'Load Test Agent',
+        'systemPrompt': 'You are the assistant for {{company_name}}. Today is {{current_date}}.',
+        'welcomeMessage': 'Thanks for calling {{company_name}}! How can I help?',
+        'voiceId': 'rachel',
+        'config': {
+            'customVariables': [{'key': 'company_name', 'value': 'Acme Roofing'}],
+            'httpTools': [{
+                'name': 'lookup_order',
+                'description': 'Look up the status of an order',
+                'url': f"{customer_url}/orders/lookup",
+                'method': 'POST',
+                'bodyTemplate': '{"order_id": "{{order_id}}", "phone": "{{caller_phone}}"}',
+                'parameters': [{'name': 'order_id', 'type': 'string', 'description': 'Order number'}],
+            }],
+        },
+    }
+
+
+def caller_script(call: int) -> List[tuple]:
+    """(utterance, tool calls) for one simulated caller."""
+    phone = f"+1555{call:07d}"
+    tag = f"[caller {call}]"
+    return [
+        (f"{tag} This is Jordan Lee, reach me at {phone}",
+         [ToolCall('save_contact', {'name': 'Jordan Lee', 'phone': phone,
+                                    'email': f"jordan{call}@example.com", 'notes': 'Inbound roof leak'})]),
+        (f"{tag} Budget is about $5,000 and we need it this month",
+         [ToolCall('qualify_lead', {'budget': '$5,000', 'timeline': 'this month', 'needs': 'roof repair'})]),
+        (f"{tag} Can we meet Tuesday at 3pm?",
+         [ToolCall('book_appointment', {'date': 'Tuesday', 'time': '3pm', 'purpose': 'Roof inspection'})]),
+        (f"{tag} Where is order {1000 + call}?",
+         [ToolCall('lookup_order', {'order_id': str(1000 + call)})]),
+        (f"{tag} Please text me a confirmation",
+         [ToolCall('send_text_message', {'message': 'Your roof inspection is booked for Tuesday at 3pm.'})]),
+    ]
+
+
+class Harness:
+    def __init__(self, args) -> None:
+        self.args = args
+        self.workdir = tempfile.mkdtemp(prefix='ploink-loadtest-')
+        self.dashboard = StandInDashboard(latency=args.dashboard_latency, jitter=args.jitter)
+        self.mautic = StandInMautic(latency=args.mautic_latency, jitter=args.jitter)
+        self.twilio = StandInTwilio(latency=args.twilio_latency, jitter=args.jitter)
+        self.customer = StandInCustomer(latency=args.customer_latency, jitter=args.jitter)
+        self.turn_latencies: List[float] = []
+        self.failures = 0
+
+    async def start(self) -> None:
+        for server in (self.dashboard, self.mautic, self.twilio, self.customer):
+            await server.start()
+        self.dashboard.put(agent_config(self.customer.url))
+
+        # The worker modules read their configuration on first use
+        os.environ.update({
+            'DASHBOARD_URL': self.dashboard.url,
+            'MAUTIC_API_URL': self.mautic.url,
+            'MAUTIC_ACCESS_TOKEN': 'loadtest',
+            'TWILIO_ACCOUNT_SID': 'ACloadtest',
+            'TWILIO_AUTH_TOKEN': 'loadtest',
+            'TWILIO_API_BASE': self.twilio.url,
+            'TWILIO_PHONE_NUMBER': '+15550000000',
+            'SMS_RATE_PER_SENDER': str(self.args.sms_rate),
+            'GOOGLE_CREDENTIALS_PATH': os.path.join(self.workdir, 'no-google-creds.json'),
+            'CRM_SPOOL_DIR': os.path.join(self.workdir, 'crm-spool'),
+            'GREETING_CACHE_DIR': os.path.join(self.workdir, 'greetings'),
+            'TRACE_METRICS_DIR': os.path.join(self.workdir, 'trace-metrics'),
+            'CALL_LOG_DIR': os.path.join(self.workdir, 'call-logs'),
+        })
+        if self.args.strict_loop_ms:
+            os.environ['LOOP_STRICT_LIMIT_MS'] = str(self.args.strict_loop_ms)
+
+        import agent
+        self.agent = agent
+
+    def job_process(self) -> SimpleNamespace:
+        """Prewarmed userdata for one call.
+
+        A real job process runs one call at a time; calls here run side by
+        side, so each gets its own plugins (plugin metrics events would
+        otherwise reach every session sharing them).
+        """
+        tts = FakeTTS(ttfb=self.args.tts_ttfb)
+        return SimpleNamespace(userdata={
+            'vad': None,
+            'stt': FakeSTT(latency=self.args.stt_latency),
+            'llm': ScriptedLLM(ttft=self.args.llm_ttft, reply_latency=self.args.llm_ttft / 2),
+            'tts': {voice_id: tts for voice_id in self.agent.ELEVENLABS_VOICE_IDS.values()},
+            'prewarm_timings': {},
+            'jobs_served': 0,
+        })
+
+    async def stop(self) -> None:
+        from call_log import get_call_log_writer
+        from crm_queue import get_crm_queue
+        import http_pool
+
+        crm = get_crm_queue()
+        if crm is not None:
+            await crm.drain(timeout=30)
+        await http_pool.shutdown()
+
+        writer = get_call_log_writer()
+        await writer.shutdown()
+        log_dir = os.path.join(self.workdir, 'call-logs')
+        size = sum(os.path.getsize(os.path.join(log_dir, name)) for name in os.listdir(log_dir))
+        print(f"Call log: {writer.written} events ({writer.dropped} dropped), {size / 1024:.0f} KB compressed")
+        for server in (self.dashboard, self.mautic, self.twilio, self.customer):
+            await server.stop()
+        shutil.rmtree(self.workdir, ignore_errors=True)
+
+    async def call(self, number: int) -> None:
+        """One simulated call, mirroring the entrypoint's steps."""
+        agent = self.agent
+        from call_log import CallLog, get_call_log_writer
+        from crm_queue import get_crm_queue
+        from greeting_cache import get_greeting_cache, uses_per_call_variables
+        from livekit.agents import AgentSession
+        from loop_watchdog import get_loop_watchdog
+        from startup import StartupTimeline
+        from tracing import get_tracer, record_pipeline_metrics
+
+        room = f"loadtest-{number}"
+        tracer = get_tracer()
+        tracer.start_call(room=room, agent_id=AGENT_ID)
+        timeline = StartupTimeline(room=room)
+        watchdog = get_loop_watchdog()
+        if watchdog is not None:
+            watchdog.start()
+        crm = get_crm_queue()
+        if crm is not None:
+            crm.start()
+
+        proc = self.job_process()
+        await timeline.run('connect', asyncio.sleep(0.05))
+        agent_config = await timeline.run('load_config', agent.load_agent_config(AGENT_ID))
+        plugins = agent.get_pipeline_plugins(proc)
+        config = agent_config.get('config', {})
+        voice_id = agent_config.get('voiceId', 'rachel')
+
+        with timeline.stage('build_agent'):
+            tts = agent.get_tts(proc, voice_id)
+            # STT runs in the harness (see above), so the session gets none
+            session = AgentSession(llm=plugins['llm'], tts=tts)
+            assistant = agent.PloinkVoiceAssistant(
+                system_prompt=agent_config.get('systemPrompt', ''),
+                welcome_message=config.get('welcomeMessage', agent_config.get('welcomeMessage', '')),
+                custom_variables=config.get('customVariables', []),
+                http_tools=config.get('httpTools', []),
+                qualification_rules=config.get('qualification'),
+            )
+
+        session.on('metrics_collected', lambda ev: record_pipeline_metrics(ev.metrics))
+        call_log = CallLog(get_call_log_writer(), room=room, agent_id=AGENT_ID)
+        call_log.start(caller=None, voice_id=voice_id)
+        call_log.attach(session)
+        stt, llm = plugins['stt'], plugins['llm']
+        try:
+            await timeline.run('session_start', session.start(agent=assistant))
+            greeting = await get_greeting_cache().say_greeting(
+                session, tts, agent.ELEVENLABS_VOICE_IDS['rachel'], assistant.welcome_message,
+                cacheable=not uses_per_call_variables(agent_config.get('welcomeMessage', '')),
+            )
+            await timeline.run('greeting', greeting.wait_for_playout())
+
+            for utterance, calls in caller_script(number)[:self.args.turns]:
+                llm.script(utterance, calls)
+                await asyncio.sleep(self.args.think)
+                started = time.perf_counter()
+                with tracer.span('stt', 'pipeline'):
+                    event = await stt.recognize(FakeSTT.encode(utterance))
+                await session.run(user_input=event.alternatives[0].text)
+                self.turn_latencies.append(time.perf_counter() - started)
+        except Exception as e:
+            self.failures += 1
+            print(f"  call {number} failed: {e!r}", file=sys.stderr)
+        finally:
+            await session.aclose()
+
+    async def run_level(self, concurrency: int, first_call: int) -> Dict:
+        from loop_watchdog import get_loop_watchdog
+        from tracing import get_tracer
+
+        watchdog = get_loop_watchdog()
+        blocks_before = watchdog.blocks if watchdog is not None else 0
+        tracer = get_tracer()
+        tracer.histograms.clear()
+        tracer.errors.clear()
+        self.turn_latencies.clear()
+        self.failures = 0
+
+        gc.collect()
+        baseline_rss = rss_bytes()
+        monitor = LoopMonitor()
+        monitor.start()
+        started = time.perf_counter()
+        await asyncio.gather(*(self.call(first_call + i) for i in range(concurrency)))
+        elapsed = time.perf_counter() - started
+        await monitor.stop()
+
+        return {
+            'concurrency': concurrency,
+            'elapsed': elapsed,
+            'failures': self.failures,
+            'turn_p50': percentile(self.turn_latencies, 0.5),
+            'turn_p95': percentile(self.turn_latencies, 0.95),
+            'lag_p50': percentile(monitor.lags, 0.5),
+            'lag_p99': percentile(monitor.lags, 0.99),
+            'lag_max': max(monitor.lags, default=None),
+            'loop_blocks': (watchdog.blocks - blocks_before) if watchdog is not None else None,
+            'mb_per_session': max(0, monitor.peak_rss - baseline_rss) / concurrency / 1e6,
+            'spans': tracer.summary(),
+        }
+
+
+def fmt_ms(seconds: Optional[float]) -> str:
+    return '-' if seconds is None else f"{seconds * 1000:.0f}"
+
+
+def print_level(result: Dict) -> None:
+    print(
+        f"\n== {result['concurrency']} concurrent calls: {result['elapsed']:.1f}s, "
+        f"{result['failures']} failed, {result['mb_per_session']:.2f} MB/session"
+    )
+    print(f"   turn latency p50/p95: {fmt_ms(result['turn_p50'])}/{fmt_ms(result['turn_p95'])} ms   "
+          f"loop lag p50/p99/max: {fmt_ms(result['lag_p50'])}/{fmt_ms(result['lag_p99'])}/{fmt_ms(result['lag_max'])} ms   "
+          f"loop blocks: {'-' if result['loop_blocks'] is None else result['loop_blocks']}")
+    print(f"   {'span':<36}{'n':>6}{'p50':>9}{'p95':>9}{'p99':>9}")
+    for name, stats in result['spans'].items():
+        if name.split(':')[0] in ('tool', 'http_tool', 'config', 'pipeline', 'loop'):
+            print(f"   {name:<36}{stats['count']:>6}{stats['p50_ms']:>9}{stats['p95_ms']:>9}{stats['p99_ms']:>9}"
+                  + (f"   {stats['errors']} failed" if stats['errors'] else ''))
+
+
+async def main(args) -> None:
+    # "VAD is not set" and similar setup advice, once per session
+    logging.getLogger('livekit.agents').setLevel(logging.ERROR)
+
+    harness = Harness(args)
+    await harness.start()
+    results = []
+    try:
+        first_call = 0
+        for level in args.levels:
+            result = await harness.run_level(level, first_call)
+            first_call += level
+            print_level(result)
+            results.append(result)
+    finally:
+        await harness.stop()
+
+    within = [
+        r['concurrency'] for r in results
+        if not r['failures']
+        and (r['lag_p99'] or 0) * 1000 <= args.lag_slo_ms
+        and (r['turn_p95'] or 0) * 1000 <= args.turn_slo_ms
+    ]
+    print(f"\nMautic requests: {dict(harness.mautic.requests)}")
+    print(f"Twilio requests: {dict(harness.twilio.requests)}")
+    print(
+        f"\nSessions per worker within SLO (loop lag p99 <= {args.lag_slo_ms:.0f} ms, "
+        f"turn p95 <= {args.turn_slo_ms:.0f} ms): {max(within) if within else 'none of the tested levels'}"
+    )
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Offline worker load test")
+    parser.add_argument('--levels', default='10,25,50', type=lambda v: [int(x) for x in v.split(',')],
+                        help="comma-separated concurrent call counts")
+    parser.add_argument('--turns', type=int, default=5, help="caller turns per call (max 5)")
+    parser.add_argument('--think', type=float, default=1.0, help="caller pause before each turn (s)")
+    parser.add_argument('--stt-latency', type=float, default=0.15)
+    parser.add_argument('--llm-ttft', type=float, default=0.35)
+    parser.add_argument('--tts-ttfb', type=float, default=0.2)
+    parser.add_argument('--dashboard-latency', type=float, default=0.05)
+    parser.add_argument('--mautic-latency', type=float, default=0.15)
+    parser.add_argument('--twilio-latency', type=float, default=0.2)
+    parser.add_argument('--customer-latency', type=float, default=0.1)
+    parser.add_argument('--jitter', type=float, default=0.05, help="extra random latency per request (s)")
+    parser.add_argument('--sms-rate', type=float, default=1000.0,
+                        help="SMS per second per sender (all calls share one number here)")
+    parser.add_argument('--lag-slo-ms', type=float, default=100.0)
+    parser.add_argument('--turn-slo-ms', type=float, default=1500.0)
+    parser.add_argument('--strict-loop-ms', type=float, default=None,
+                        help="fail tools that block the event loop longer than this (loop watchdog strict mode)")
+    return parser.parse_args(argv)
+
+
+if __name__ == '__main__':
+    asyncio.run(main(parse_args()))
@@ -0,0 +1,207 @@
+"""
+Worker Admission Simulation
+===========================
+Dispatches a simulated stream of calls to several local workers and shows
+how they spread under LiveKit's default CPU load versus the combined load
+score (src/worker_load.py).
+
+Each worker is a real WorkerLoad reading real job-process reports from its
+own directory; only the calls, the clock and the resource usage are
+simulated. Per call, every worker spends VAD and CPU time, and:
+- a, b: healthy workers
+- c: its jobs make a slow sync call, so loop lag grows with sessions while
+  CPU stays low
+- d: far from Mautic, so CRM writes queue up while CPU stays low
+
+The dispatcher behaves like LiveKit's: workers report load and availability
+every 2.5s, a call goes to the least-loaded available worker, and a worker
+that turns the request away (admit) has it offered to the next one.
+
+Usage:
+    python benchmarks/sim_worker_admission.py [--duration 600] [--rate 0.7] [--seed 7]
+"""
+
+import argparse
+import asyncio
+import math
+import os
+import random
+import shutil
+import sys
+import tempfile
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from worker_load import LoadReport, LoadReporter, WorkerLoad  # noqa: E402
+
+STEP = 0.5              # simulation tick (s)
+STATUS_INTERVAL = 2.5   # LiveKit worker status updates
+REPORT_INTERVAL = 1.0   # job process load reports
+VAD_PER_CALL = 0.012    # VAD inference seconds per second of call
+CPU_PER_CALL = 0.022    # share of a 4-CPU worker per call (STT/TTS audio, LLM I/O)
+LAG_SLO = 0.1           # lag that starts to be heard as choppy audio (s)
+
+
+@dataclass
+class SimWorker:
+    name: str
+    cpus: float = 4.0
+    lag_per_call: float = 0.0005   # sustained loop lag added per live call (s)
+    backlog_per_call: float = 1.0  # CRM writes waiting per live call
+    calls: Dict[int, float] = field(default_factory=dict)  # call id -> end time
+    load: Optional[WorkerLoad] = None
+    status_load: float = 0.0
+    available: bool = True
+    assigned: int = 0
+    peak_sessions: int = 0
+    peak_lag: float = 0.0
+    peak_backlog: float = 0.0
+    over_slo: float = 0.0  # seconds spent with lag above LAG_SLO
+
+    def cpu(self) -> float:
+        return min(1.0, 0.05 + len(self.calls) * CPU_PER_CALL * 4.0 / self.cpus)
+
+    def lag(self) -> float:
+        # Queueing delay grows sharply as the CPU saturates
+        utilization = self.cpu()
+        return 0.001 + len(self.calls) * self.lag_per_call + 0.002 * utilization / max(0.05, 1.0 - utilization)
+
+    def report(self, directory: str, now: float) -> None:
+        """Every call runs in its own job process, which reports its signals."""
+        lag = self.lag()
+        backlog = len(self.calls) * self.backlog_per_call
+        for call_id in self.calls:
+            LoadReporter(directory, key=str(call_id)).write(LoadReport(
+                sessions=1,
+                vad=VAD_PER_CALL,
+                lag=lag,
+                backlog=int(self.backlog_per_call),
+                at=now,
+            ))
+        self.peak_sessions = max(self.peak_sessions, len(self.calls))
+        self.peak_lag = max(self.peak_lag, lag)
+        self.peak_backlog = max(self.peak_backlog, backlog)
+
+
+class Request:
+    """Stand-in for livekit.agents.JobRequest."""
+
+    def __init__(self, call_id: int) -> None:
+        self.id = f"job-{call_id}"
+        self.accepted: Optional[bool] = None
+
+    async def accept(self) -> None:
+        self.accepted = True
+
+    async def reject(self, terminate: bool = True) -> None:
+        self.accepted = False
+
+
+def workers() -> List[SimWorker]:
+    return [
+        SimWorker('a'),
+        SimWorker('b'),
+        SimWorker('c', lag_per_call=0.004),
+        SimWorker('d', backlog_per_call=8.0),
+    ]
+
+
+async def simulate(policy: str, args) -> Tuple[List[SimWorker], int]:
+    """Run one policy; returns the workers and the number of unplaced calls."""
+    rng = random.Random(args.seed)
+    root = tempfile.mkdtemp(prefix='ploink-admission-')
+    now = 0.0
+    pool = workers()
+    for worker in pool:
+        worker.load = WorkerLoad(
+            os.path.join(root, worker.name),
+            cpu_count=worker.cpus,
+            interval=REPORT_INTERVAL,
+            cpu=worker.cpu,
+            clock=lambda: now,
+        )
+
+    dropped = 0
+    call_id = 0
+    next_report = next_status = 0.0
+    try:
+        while now < args.duration:
+            for worker in pool:
+                for ended in [c for c, end in worker.calls.items() if end <= now]:
+                    del worker.calls[ended]
+                    os.remove(os.path.join(worker.load.load_dir, f"load-{ended}.json"))
+
+            if now >= next_report:
+                next_report += REPORT_INTERVAL
+                for worker in pool:
+                    worker.report(worker.load.load_dir, now)
+
+            if now >= next_status:
+                next_status += STATUS_INTERVAL
+                for worker in pool:
+                    signals = worker.load.signals()
+                    worker.status_load = signals['cpu'] if policy == 'cpu' else max(signals.values())
+                    worker.available = worker.status_load < worker.load.threshold
+
+            # Poisson arrivals, ramping up over the first third of the run
+            rate = args.rate * min(1.0, 3 * now / args.duration)
+            for _ in range(_poisson(rng, rate * STEP)):
+                call_id += 1
+                candidates = sorted((w for w in pool if w.available), key=lambda w: w.status_load)
+                for worker in candidates:
+                    request = Request(call_id)
+                    if policy == 'cpu':
+                        await request.accept()
+                    else:
+                        await worker.load.admit(request)
+                    if request.accepted:
+                        worker.calls[call_id] = now + rng.expovariate(1 / args.call_length)
+                        worker.assigned += 1
+                        # The job's process reports as soon as it starts
+                        worker.report(worker.load.load_dir, now)
+                        break
+                else:
+                    dropped += 1
+
+            for worker in pool:
+                if worker.lag() > LAG_SLO:
+                    worker.over_slo += STEP
+            now += STEP
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+    print(f"\n== {'CPU only (LiveKit default)' if policy == 'cpu' else 'combined load score'}: "
+          f"{call_id} calls, {dropped} found no available worker")
+    print(f"   {'worker':<8}{'calls':>7}{'peak live':>11}{'peak lag':>10}{'backlog':>9}"
+          f"{'lag>SLO':>9}{'turned away':>13}")
+    for worker in pool:
+        print(f"   {worker.name:<8}{worker.assigned:>7}{worker.peak_sessions:>11}"
+              f"{worker.peak_lag * 1000:>8.0f}ms{worker.peak_backlog:>9.0f}"
+              f"{worker.over_slo:>8.0f}s{worker.load.rejected:>13}")
+    return pool, dropped
+
+
+def _poisson(rng: random.Random, mean: float) -> int:
+    count, threshold, product = 0, math.exp(-mean), rng.random()
+    while product > threshold:
+        count += 1
+        product *= rng.random()
+    return count
+
+
+async def main(args) -> None:
+    print(f"{len(workers())} workers, {args.rate} calls/s at peak, {args.call_length:.0f}s average call, "
+          f"threshold 0.7")
+    for policy in ('cpu', 'combined'):
+        await simulate(policy, args)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Worker admission simulation")
+    parser.add_argument('--duration', type=float, default=600.0, help="simulated seconds")
+    parser.add_argument('--rate', type=float, default=0.7, help="peak call arrivals per second")
+    parser.add_argument('--call-length', type=float, default=120.0, help="average call length (s)")
+    parser.add_argument('--seed', type=int, default=7)
+    asyncio.run(main(parser.parse_args()))
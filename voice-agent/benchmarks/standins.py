@@ -0,0 +1,222 @@
+"""
+Stand-in Backends
+=================
+Local aiohttp servers that imitate the services the worker talks to, for
+offline load tests and benchmarks:
+- StandInDashboard: GET /api/voice/agents/{id} (with ETag / 304), the
+  paginated agent list, and signed config pushes to a worker's webhook
+- StandInMautic: contact search, batch create/edit, batch notes
+- StandInTwilio: the Messages.json endpoint
+- StandInCustomer: any path, echoes a short JSON message (dynamic HTTP tools)
+
+Every server adds a configurable latency (plus jitter) per request and
+counts requests per route.
+"""
+
+import asyncio
+import hashlib
+import hmac
+import json
+import random
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+
+from aiohttp import ClientSession, web
+
+
+class StandIn:
+    """A local HTTP server with per-request latency and request counters."""
+
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0) -> None:
+        self.latency = latency
+        self.jitter = jitter
+        self.requests: Counter = Counter()
+        self.app = web.Application(middlewares=[self._middleware])
+        self._runner: Optional[web.AppRunner] = None
+        self.url = ''
+
+    @web.middleware
+    async def _middleware(self, request: web.Request, handler):
+        route = request.match_info.route.resource
+        self.requests[f"{request.method} {route.canonical if route else request.path}"] += 1
+        delay = self.latency + random.uniform(0, self.jitter)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        return await handler(request)
+
+    async def start(self, host: str = '127.0.0.1', port: int = 0) -> str:
+        self._runner = web.AppRunner(self.app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        bound_port = site._server.sockets[0].getsockname()[1]
+        self.url = f"http://{host}:{bound_port}"
+        return self.url
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+
+class StandInDashboard(StandIn):
+    """
+    Serves agent configs the way the dashboard's agent routes do.
+
+    With a webhook URL set, publish() and delete() push the change to the
+    worker the way the dashboard's PATCH/DELETE handlers do.
+    """
+
+    def __init__(
+        self,
+        agents: Optional[Dict[str, Dict[str, Any]]] = None,
+        webhook_url: Optional[str] = None,
+        secret: Optional[str] = None,
+        **kwargs,
+    ) -> None:
+        super().__init__(**kwargs)
+        self.agents: Dict[str, Dict[str, Any]] = agents or {}
+        self.webhook_url = webhook_url
+        self.secret = secret
+        self.app.router.add_get('/api/voice/agents', self._list_agents)
+        self.app.router.add_get('/api/voice/agents/{agent_id}', self._get_agent)
+
+    def put(self, agent: Dict[str, Any]) -> Dict[str, Any]:
+        now = datetime.now(timezone.utc)
+        stored = dict(agent, updatedAt=now.isoformat(timespec='milliseconds').replace('+00:00', 'Z'))
+        stored.setdefault('status', 'active')
+        self.agents[agent['id']] = stored
+        return stored
+
+    async def publish(self, agent: Dict[str, Any]) -> None:
+        await self._push({'type': 'agent.updated', 'agent': self.put(agent)})
+
+    async def delete(self, agent_id: str) -> None:
+        self.agents.pop(agent_id, None)
+        await self._push({'type': 'agent.deleted', 'agentId': agent_id})
+
+    async def _push(self, event: Dict[str, Any]) -> None:
+        if not self.webhook_url:
+            return
+        body = json.dumps(event).encode()
+        headers = {'Content-Type': 'application/json'}
+        if self.secret:
+            digest = hmac.new(self.secret.encode(), body, hashlib.sha256).hexdigest()
+            headers['X-Ploink-Signature'] = f"sha256={digest}"
+        async with ClientSession() as session:
+            async with session.post(self.webhook_url, data=body, headers=headers) as response:
+                response.raise_for_status()
+
+    @staticmethod
+    def _etag(agent: Dict[str, Any]) -> str:
+        updated = datetime.fromisoformat(agent['updatedAt'].replace('Z', '+00:00'))
+        return f'W/"{agent["id"]}-{round(updated.timestamp() * 1000)}"'
+
+    async def _list_agents(self, request: web.Request) -> web.Response:
+        status = request.query.get('status')
+        agents = sorted(
+            (agent for agent in self.agents.values() if not status or agent.get('status') == status),
+            key=lambda agent: agent['id'],
+        )
+        if 'limit' not in request.query:
+            return web.json_response(agents)
+
+        limit = max(1, min(500, int(request.query['limit'])))
+        cursor = request.query.get('cursor')
+        if cursor:
+            agents = [agent for agent in agents if agent['id'] > cursor]
+        page = agents[:limit]
+        next_cursor = page[-1]['id'] if len(agents) > limit else None
+        return web.json_response({'agents': page, 'nextCursor': next_cursor})
+
+    async def _get_agent(self, request: web.Request) -> web.Response:
+        agent = self.agents.get(request.match_info['agent_id'])
+        if agent is None:
+            return web.json_response({'error': 'Agent not found'}, status=404)
+        etag = self._etag(agent)
+        if request.headers.get('If-None-Match') == etag:
+            return web.Response(status=304, headers={'ETag': etag})
+        return web.json_response(agent, headers={'ETag': etag})
+
+
+class StandInMautic(StandIn):
+    """In-memory Mautic contacts and notes behind the batch API."""
+
+    def __init__(self, **kwargs) -> None:
+        super().__init__(**kwargs)
+        self.contacts: Dict[str, Dict[str, Any]] = {}
+        self.notes = []
+        self._next_id = 1
+        router = self.app.router
+        router.add_get('/api/contacts', self._search)
+        router.add_post('/api/contacts/batch/new', self._batch_new)
+        router.add_patch('/api/contacts/batch/edit', self._batch_edit)
+        router.add_post('/api/notes/batch/new', self._batch_notes)
+
+    @staticmethod
+    def _digits(phone: str) -> str:
+        return ''.join(ch for ch in str(phone or '') if ch.isdigit())[-10:]
+
+    async def _search(self, request: web.Request) -> web.Response:
+        wanted = self._digits(request.query.get('search', ''))
+        found = {
+            contact_id: {'id': int(contact_id), 'fields': {'all': fields}}
+            for contact_id, fields in self.contacts.items()
+            if wanted and self._digits(fields.get('phone')) == wanted
+        }
+        return web.json_response({'total': len(found), 'contacts': found})
+
+    async def _batch_new(self, request: web.Request) -> web.Response:
+        created = []
+        for fields in await request.json():
+            contact_id = str(self._next_id)
+            self._next_id += 1
+            self.contacts[contact_id] = fields
+            created.append({'id': int(contact_id), 'fields': {'all': fields}})
+        return web.json_response({'contacts': created, 'statusCodes': [201] * len(created)})
+
+    async def _batch_edit(self, request: web.Request) -> web.Response:
+        edited = []
+        for fields in await request.json():
+            contact_id = str(fields.get('id'))
+            if contact_id in self.contacts:
+                self.contacts[contact_id].update({k: v for k, v in fields.items() if k != 'id'})
+            edited.append({'id': fields.get('id')})
+        return web.json_response({'contacts': edited, 'statusCodes': [200] * len(edited)})
+
+    async def _batch_notes(self, request: web.Request) -> web.Response:
+        items = await request.json()
+        self.notes.extend(items)
+        return web.json_response({'notes': [{'id': len(self.notes) - i} for i in range(len(items))]})
+
+
+class StandInTwilio(StandIn):
+    """Accepts SMS sends on the REST Messages endpoint."""
+
+    def __init__(self, **kwargs) -> None:
+        super().__init__(**kwargs)
+        self.messages = []
+        self.app.router.add_post('/2010-04-01/Accounts/{sid}/Messages.json', self._send)
+
+    async def _send(self, request: web.Request) -> web.Response:
+        form = await request.post()
+        self.messages.append(dict(form))
+        return web.json_response({'sid': f"SM{len(self.messages):032d}", 'status': 'queued'}, status=201)
+
+
+class StandInCustomer(StandIn):
+    """A customer webhook: any method, any path, answers with a message."""
+
+    def __init__(self, **kwargs) -> None:
+        super().__init__(**kwargs)
+        self.app.router.add_route('*', '/{path:.*}', self._handle)
+
+    async def _handle(self, request: web.Request) -> web.Response:
+        body = await request.text()
+        try:
+            payload = json.loads(body) if body else {}
+        except ValueError:
+            payload = {}
+        reference = payload.get('order_id') or request.match_info['path']
+        return web.json_response({'message': f"Order {reference} shipped yesterday"})
@@ -7,28 +7,52 @@ LiveKit-powered voice assistant for Ploink CRM with:
 - Custom variables: Personalized prompts with {{variable}} substitution
 """
 
+import asyncio
 import os
 import json
+import logging
 import re
+import time
 from datetime import datetime, timedelta
 from typing import Any, Callable, Dict, List, Optional
 from dotenv import load_dotenv
-import dateparser
-import httpx
 
 from livekit.agents import (
     Agent,
     AgentSession,
     JobContext,
+    JobProcess,
     WorkerOptions,
     function_tool,
     cli,
 )
+from livekit.agents.llm import ChatContext, is_function_tool
 from livekit.plugins import deepgram, openai, silero
-from twilio.rest import Client as TwilioClient
+
+import http_pool
+from calendar_service import CalendarNotConfigured, get_calendar_service
+from call_log import CallLog, get_call_log_writer
+from config_cache import get_config_cache
+from config_sync import start_config_sync
+from crm_queue import ADD_NOTE, TAG_CONTACT, UPSERT_CONTACT, get_crm_queue
+from date_parsing import parse_datetime
+from greeting_cache import get_greeting_cache, uses_per_call_variables
+from import_profile import log_startup_profile
+from lead_scoring import get_lead_scorer
+from prompt_assembly import get_prompt_assembler
+from loop_watchdog import get_loop_watchdog
+from sms import FAILED, get_sms_dispatcher
+from startup import StartupTimeline
+from templates import render as render_template
+from tool_memo import CACHEABLE, IDEMPOTENT, NEVER, ToolMemo, mark_failed, memoized
+from tool_registry import get_tool_registry
+from tracing import get_tracer, record_pipeline_metrics, start_exporter, traced
+from worker_load import get_load_reporter, get_worker_load
 
 load_dotenv()
 
+logger = logging.getLogger("ploink-voice-agent")
+
 
 # ═══════════════════════════════════════════════════════════════════════════════
 # DYNAMIC TOOL CREATION
@@ -39,85 +63,15 @@ def create_dynamic_http_tool(tool_config: Dict[str, Any]) -> Callable:
     Create a function_tool from user-configured HTTP tool.
 
     This allows users to define custom API endpoints in the dashboard
-    that the voice agent can call during conversations.
-    """
-    tool_name = tool_config.get('name', 'custom_tool').lower().replace(' ', '_')
-    tool_description = tool_config.get('description', 'A custom HTTP tool')
-    url = tool_config.get('url', '')
-    method = tool_config.get('method', 'POST')
-    headers = tool_config.get('headers', {})
-    body_template = tool_config.get('bodyTemplate', '')
-    parameters = tool_config.get('parameters', [])
-
-    # Build parameter documentation for the AI
-    param_docs = []
-    for param in parameters:
-        param_type = param.get('type', 'string')
-        required = 'required' if param.get('required', True) else 'optional'
-        param_docs.append(f"        {param['name']}: {param.get('description', '')} ({param_type}, {required})")
-
-    params_str = '\n'.join(param_docs) if param_docs else '        None'
-
-    @function_tool
-    async def dynamic_tool(**kwargs) -> str:
-        """Dynamic HTTP tool - description set below."""
-        try:
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                # Build the request body from template
-                body = body_template
-                for key, value in kwargs.items():
-                    body = body.replace(f'{{{{{key}}}}}', str(value))
-
-                # Make the HTTP request
-                response = await client.request(
-                    method=method,
-                    url=url,
-                    headers=headers,
-                    json=json.loads(body) if body else None,
-                )
-
-                if response.status_code >= 400:
-                    return f"The request failed with status {response.status_code}"
-
-                # Try to parse as JSON for cleaner response
-                try:
-                    result = response.json()
-                    if isinstance(result, dict):
-                        # Return a summary if it's a complex object
-                        if 'message' in result:
-                            return result['message']
-                        elif 'status' in result:
-                            return f"Success: {result.get('status')}"
-                    return f"Request completed successfully"
-                except:
-                    return f"Request completed: {response.text[:200]}"
-
-        except httpx.TimeoutException:
-            return "The request timed out. Please try again."
-        except Exception as e:
-            return f"There was an error: {str(e)}"
-
-    # Set the function's metadata for the AI
-    dynamic_tool.__doc__ = f"""{tool_description}
-
-    Args:
-{params_str}
+    that the voice agent can call during conversations. Tools are compiled
+    once per distinct config and shared across sessions in this process.
     """
-    dynamic_tool.__name__ = tool_name
-
-    return dynamic_tool
+    return get_tool_registry().compile(tool_config).tool
 
 
 def substitute_variables(text: str, variables: Dict[str, str]) -> str:
     """Replace {{variable}} placeholders with their values."""
-    if not text:
-        return text
-
-    result = text
-    for key, value in variables.items():
-        result = result.replace(f'{{{{{key}}}}}', str(value))
-
-    return result
+    return render_template(text, variables)
 
 
 # ═══════════════════════════════════════════════════════════════════════════════
@@ -128,18 +82,16 @@ async def load_agent_config(agent_id: str) -> Optional[Dict[str, Any]]:
     """
     Load agent configuration from the dashboard API.
 
-    In production, this fetches from the real API.
-    For development, returns mock data.
+    Served from the process-wide config cache; only a cold miss waits on the
+    dashboard. For development, returns mock data.
     """
-    dashboard_url = os.getenv('DASHBOARD_URL', 'http://localhost:3005')
-
     try:
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            response = await client.get(f"{dashboard_url}/api/voice/agents/{agent_id}")
-            if response.status_code == 200:
-                return response.json()
+        with get_tracer().span('load_agent_config', 'config'):
+            config = await get_config_cache().get(agent_id)
+        if config:
+            return config
     except Exception as e:
-        print(f"Failed to load agent config: {e}")
+        logger.warning(f"Failed to load agent config: {e}")
 
     # Return default config if API fails
     return {
@@ -166,6 +118,7 @@ class PloinkVoiceAssistant(Agent):
 
     Built-in actions:
     - book_appointment: Schedule via Google Calendar
+    - check_availability: Open slots from the cached free/busy view
     - save_contact: Save to Mautic CRM
     - send_text_message: Send SMS via Twilio
     - qualify_lead: Lead qualification scoring
@@ -180,6 +133,7 @@ class PloinkVoiceAssistant(Agent):
         welcome_message: str = None,
         custom_variables: Dict[str, str] = None,
         http_tools: List[Dict] = None,
+        qualification_rules: Dict[str, Any] = None,
     ) -> None:
         # Build variables dict with built-ins
         self.variables = {
@@ -195,20 +149,24 @@ class PloinkVoiceAssistant(Agent):
                 if isinstance(var, dict) and 'key' in var and 'value' in var:
                     self.variables[var['key']] = var['value']
 
-        # Substitute variables in system prompt
-        instructions = system_prompt or """You are a helpful assistant for Ploink CRM.
-        You can:
-        - Book appointments on the calendar
-        - Save contact information to the CRM
-        - Send text message confirmations
-        - Qualify leads by asking about budget, timeline, and needs
+        # Store HTTP tools for dynamic registration
+        self.http_tools = http_tools or []
 
-        Be friendly, professional, and concise.
-        Always confirm important details before taking actions."""
+        # Repeated tool calls in this session reuse earlier results
+        self.tool_memo = ToolMemo()
 
-        instructions = substitute_variables(instructions, self.variables)
+        # Compiled once per distinct rules config, shared across calls
+        self.lead_scorer = get_lead_scorer(qualification_rules)
 
-        super().__init__(instructions=instructions)
+        # Same instructions and tool list on every call of this agent, so the
+        # LLM provider's prompt cache applies; only the call details differ
+        prompt = get_prompt_assembler().assemble(
+            system_prompt, self.variables, self.http_tools, reserved=builtin_tool_names()
+        )
+        chat_ctx = ChatContext.empty()
+        if prompt.details:
+            chat_ctx.add_message(role='system', content=prompt.details)
+        super().__init__(instructions=prompt.instructions, tools=prompt.tools, chat_ctx=chat_ctx)
 
         # Store welcome message
         self.welcome_message = substitute_variables(
@@ -216,46 +174,31 @@ class PloinkVoiceAssistant(Agent):
             self.variables
         )
 
-        # Store HTTP tools for dynamic registration
-        self.http_tools = http_tools or []
-
-        # Initialize Twilio client for SMS
-        twilio_sid = os.getenv("TWILIO_ACCOUNT_SID")
-        twilio_token = os.getenv("TWILIO_AUTH_TOKEN")
-        if twilio_sid and twilio_token:
-            self.twilio = TwilioClient(twilio_sid, twilio_token)
-        else:
-            self.twilio = None
+        # Twilio SMS goes through the shared non-blocking dispatcher
+        self.sms = get_sms_dispatcher()
         self.twilio_number = os.getenv("TWILIO_PHONE_NUMBER")
 
         # Mautic CRM config
         self.mautic_url = os.getenv("MAUTIC_API_URL")
         self.mautic_token = os.getenv("MAUTIC_ACCESS_TOKEN")
 
-        # Google Calendar credentials path
-        self.google_creds_path = os.getenv("GOOGLE_CREDENTIALS_PATH", "google_creds.json")
-
         # Store caller info during conversation
         self.caller_phone = None
         self.caller_name = None
         self.caller_email = None
 
     def get_dynamic_tools(self) -> List[Callable]:
-        """Create dynamic tools from HTTP tool configurations."""
-        tools = []
-        for tool_config in self.http_tools:
-            try:
-                tool = create_dynamic_http_tool(tool_config)
-                tools.append(tool)
-            except Exception as e:
-                print(f"Failed to create tool '{tool_config.get('name', 'unknown')}': {e}")
-        return tools
+        """Compiled tools for the configured HTTP tools (cached per config)."""
+        compiled_tools = get_tool_registry().compile_all(self.http_tools, reserved=builtin_tool_names())
+        return [compiled.tool for compiled in compiled_tools]
 
     # ═══════════════════════════════════════════════════════════════════════
     # ACTION 1: BOOK APPOINTMENTS (Google Calendar)
     # ═══════════════════════════════════════════════════════════════════════
 
     @function_tool
+    @memoized(IDEMPOTENT, window=300, text=('date', 'time', 'purpose'))
+    @traced()
     async def book_appointment(
         self,
         date: str,
@@ -272,41 +215,45 @@ class PloinkVoiceAssistant(Agent):
             duration_minutes: Meeting duration (default 30 minutes)
         """
         try:
-            # Parse natural language date/time
-            combined = f"{date} {time}"
-            appointment_dt = dateparser.parse(combined, settings={
-                'PREFER_DATES_FROM': 'future',
-                'RELATIVE_BASE': datetime.now()
-            })
+            calendar = get_calendar_service()
+
+            # Parse natural language date/time in the calendar's timezone
+            appointment_dt = parse_datetime(f"{date} {time}", timezone=calendar.timezone_name)
 
             if not appointment_dt:
                 return "I couldn't understand that date/time. Could you say it differently?"
 
-            # Import Google Calendar API (lazy import)
-            try:
-                from google.oauth2.credentials import Credentials
-                from googleapiclient.discovery import build
-            except ImportError:
-                return "Calendar integration not configured. I've noted your request."
-
             # Check if credentials file exists
-            if not os.path.exists(self.google_creds_path):
+            if not calendar.configured:
                 return f"Appointment noted for {appointment_dt.strftime('%A, %B %d at %I:%M %p')}. Calendar sync pending setup."
 
-            # Create Google Calendar event
-            creds = Credentials.from_authorized_user_file(self.google_creds_path)
-            service = build('calendar', 'v3', credentials=creds)
+            end_dt = appointment_dt + timedelta(minutes=duration_minutes)
+
+            # Offer alternatives from the cached free/busy view instead of
+            # double-booking; a failed lookup shouldn't stop the booking
+            try:
+                if not await calendar.is_free(appointment_dt, end_dt):
+                    slots = await calendar.open_slots(appointment_dt.date(), duration_minutes)
+                    if not slots:
+                        return "That day is fully booked. Is there another day that works for you?"
+                    options = ", ".join(slot.strftime("%I:%M %p").lstrip("0") for slot in slots)
+                    return f"That time is already taken. Open times that day: {options}. Which works best?"
+            except CalendarNotConfigured:
+                raise
+            except Exception as e:
+                logger.warning(f"Free/busy lookup failed: {e}")
 
+            # Create Google Calendar event
             event = {
                 'summary': f'Call with {self.caller_name or "Lead"}',
                 'description': f'Purpose: {purpose}\nPhone: {self.caller_phone or "N/A"}',
                 'start': {
                     'dateTime': appointment_dt.isoformat(),
-                    'timeZone': 'America/New_York',
+                    'timeZone': calendar.timezone_name,
                 },
                 'end': {
-                    'dateTime': (appointment_dt + timedelta(minutes=duration_minutes)).isoformat(),
-                    'timeZone': 'America/New_York',
+                    'dateTime': end_dt.isoformat(),
+                    'timeZone': calendar.timezone_name,
                 },
                 'reminders': {
                     'useDefault': False,
@@ -320,23 +267,64 @@ class PloinkVoiceAssistant(Agent):
             if self.caller_email:
                 event['attendees'] = [{'email': self.caller_email}]
 
-            service.events().insert(
-                calendarId='primary',
-                body=event,
-                sendUpdates='all'
-            ).execute()
+            await calendar.insert_event(event)
+            # The slot is gone; don't offer it again from an earlier lookup
+            self.tool_memo.invalidate('check_availability')
 
             formatted_date = appointment_dt.strftime("%A, %B %d at %I:%M %p")
             return f"Appointment booked for {formatted_date}. Would you like me to send you a text confirmation?"
 
+        except CalendarNotConfigured:
+            return "Calendar integration not configured. I've noted your request."
         except Exception as e:
+            mark_failed()
             return f"I had trouble booking that appointment: {str(e)}"
 
+    @function_tool
+    @memoized(IDEMPOTENT, window=30, text=('date',))
+    @traced()
+    async def check_availability(
+        self,
+        date: str,
+        duration_minutes: int = 30
+    ) -> str:
+        """Check which appointment times are open on a given day.
+
+        Args:
+            date: The date (e.g., "Tuesday", "December 24", "tomorrow")
+            duration_minutes: Meeting duration (default 30 minutes)
+        """
+        try:
+            calendar = get_calendar_service()
+            day = parse_datetime(date, timezone=calendar.timezone_name)
+
+            if not day:
+                return "I couldn't understand that date. Could you say it differently?"
+
+            if not calendar.configured:
+                return "I can't see the calendar right now, but I can note your preferred time."
+
+            slots = await calendar.open_slots(day.date(), duration_minutes)
+            formatted_day = day.strftime("%A, %B %d")
+            if not slots:
+                return f"{formatted_day} is fully booked. Is there another day that works?"
+
+            options = ", ".join(slot.strftime("%I:%M %p").lstrip("0") for slot in slots)
+            return f"Open times on {formatted_day}: {options}."
+
+        except CalendarNotConfigured:
+            return "Calendar integration not configured. I can note your preferred time."
+        except Exception as e:
+            mark_failed()
+            return f"I had trouble checking the calendar: {str(e)}"
+
     # ═══════════════════════════════════════════════════════════════════════
     # ACTION 2: SAVE CONTACT TO CRM (Mautic)
     # ═══════════════════════════════════════════════════════════════════════
 
     @function_tool
+    @memoized(IDEMPOTENT, text=('name', 'notes'))
+    @traced()
     async def save_contact(
         self,
         name: str,
@@ -367,57 +355,29 @@ class PloinkVoiceAssistant(Agent):
             firstname = name_parts[0]
             lastname = " ".join(name_parts[1:]) if len(name_parts) > 1 else ""
 
-            if not self.mautic_url or not self.mautic_token:
+            crm = get_crm_queue()
+            if crm is None:
                 return f"Got it! I've noted your information, {firstname}."
 
-            async with httpx.AsyncClient() as client:
-                # Check if contact exists by phone
-                search_resp = await client.get(
-                    f"{self.mautic_url}/api/contacts",
-                    params={"search": phone},
-                    headers={"Authorization": f"Bearer {self.mautic_token}"}
-                )
-                existing = search_resp.json().get("contacts", {})
-
-                contact_data = {
-                    "firstname": firstname,
-                    "lastname": lastname,
-                    "phone": phone,
-                    "tags": ["voice-lead", "inbound-call"],
-                }
-                if email:
-                    contact_data["email"] = email
-
-                if existing:
-                    contact_id = list(existing.keys())[0]
-                    await client.patch(
-                        f"{self.mautic_url}/api/contacts/{contact_id}/edit",
-                        json=contact_data,
-                        headers={"Authorization": f"Bearer {self.mautic_token}"}
-                    )
-                else:
-                    resp = await client.post(
-                        f"{self.mautic_url}/api/contacts/new",
-                        json=contact_data,
-                        headers={"Authorization": f"Bearer {self.mautic_token}"}
-                    )
-                    result = resp.json()
-                    contact_id = result.get("contact", {}).get("id")
-
-                if notes and contact_id:
-                    await client.post(
-                        f"{self.mautic_url}/api/notes/new",
-                        json={
-                            "lead": contact_id,
-                            "text": f"[Voice Call] {notes}",
-                            "type": "general"
-                        },
-                        headers={"Authorization": f"Bearer {self.mautic_token}"}
-                    )
-
-                return f"Got it! I've saved your information, {firstname}."
+            # Written behind: the CRM worker finds or creates the contact
+            # and attaches the note without holding up the conversation
+            contact_data = {
+                "firstname": firstname,
+                "lastname": lastname,
+                "phone": phone,
+                "tags": ["voice-lead", "inbound-call"],
+            }
+            if email:
+                contact_data["email"] = email
+
+            crm.enqueue(UPSERT_CONTACT, phone, **contact_data)
+            if notes:
+                crm.enqueue(ADD_NOTE, phone, text=f"[Voice Call] {notes}")
+
+            return f"Got it! I've saved your information, {firstname}."
 
         except Exception:
+            mark_failed()
             return f"I've noted your information, {name}."
 
     # ═══════════════════════════════════════════════════════════════════════
@@ -425,6 +385,8 @@ class PloinkVoiceAssistant(Agent):
     # ═══════════════════════════════════════════════════════════════════════
 
     @function_tool
+    @memoized(IDEMPOTENT, text=('message',))
+    @traced()
     async def send_text_message(
         self,
         message: str,
@@ -440,20 +402,22 @@ class PloinkVoiceAssistant(Agent):
             to_number = phone_number or self.caller_phone
 
             if not to_number:
+                # Not a result to reuse: the caller's number may be known next time
+                mark_failed()
                 return "I need a phone number to send the text. What's the best number?"
 
-            if not self.twilio or not self.twilio_number:
+            if not self.sms or not self.twilio_number:
                 return f"I've noted to send you: '{message}'"
 
-            self.twilio.messages.create(
-                body=message,
-                from_=self.twilio_number,
-                to=to_number
-            )
+            result = await self.sms.send(self.twilio_number, to_number, message)
+            if result.status == FAILED:
+                mark_failed()
+                return "I had trouble sending that text. Let me make a note instead."
 
             return f"Done! I just sent a text to {to_number}."
 
         except Exception:
+            mark_failed()
             return "I had trouble sending that text. Let me make a note instead."
 
     # ═══════════════════════════════════════════════════════════════════════
@@ -461,6 +425,9 @@ class PloinkVoiceAssistant(Agent):
     # ═══════════════════════════════════════════════════════════════════════
 
     @function_tool
+    # Scoring ignores case, so "ASAP" and "asap" are the same answer
+    @memoized(CACHEABLE, text=('budget', 'timeline', 'needs'), fold_case=True)
+    @traced()
     async def qualify_lead(
         self,
         budget: str,
@@ -476,38 +443,23 @@ class PloinkVoiceAssistant(Agent):
         """
         try:
             qualification = f"Budget: {budget}, Timeline: {timeline}, Needs: {needs}"
-            budget_lower = budget.lower()
-            is_qualified = not any(x in budget_lower for x in ["none", "no budget", "0", "zero", "nothing"])
-
-            if self.caller_phone and self.mautic_url and self.mautic_token:
-                async with httpx.AsyncClient() as client:
-                    search_resp = await client.get(
-                        f"{self.mautic_url}/api/contacts",
-                        params={"search": self.caller_phone},
-                        headers={"Authorization": f"Bearer {self.mautic_token}"}
-                    )
-                    existing = search_resp.json().get("contacts", {})
-
-                    if existing:
-                        contact_id = list(existing.keys())[0]
-                        status = "QUALIFIED" if is_qualified else "NOT QUALIFIED"
-
-                        await client.post(
-                            f"{self.mautic_url}/api/notes/new",
-                            json={
-                                "lead": contact_id,
-                                "text": f"[Voice Qualification] {qualification}\nStatus: {status}",
-                                "type": "general"
-                            },
-                            headers={"Authorization": f"Bearer {self.mautic_token}"}
-                        )
-
-                        tag = "qualified-lead" if is_qualified else "not-qualified"
-                        await client.patch(
-                            f"{self.mautic_url}/api/contacts/{contact_id}/edit",
-                            json={"tags": [tag]},
-                            headers={"Authorization": f"Bearer {self.mautic_token}"}
-                        )
+            lead = self.lead_scorer.score(budget, timeline, needs)
+            is_qualified = lead.qualified
+
+            crm = get_crm_queue()
+            if self.caller_phone and crm is not None:
+                status = "QUALIFIED" if is_qualified else "NOT QUALIFIED"
+                tag = "qualified-lead" if is_qualified else "not-qualified"
+                crm.enqueue(
+                    ADD_NOTE,
+                    self.caller_phone,
+                    text=(
+                        f"[Voice Qualification] {qualification}\n"
+                        f"Status: {status} (score {lead.score:.0f}/100)"
+                        + (f"\nReasons: {'; '.join(lead.reasons)}" if lead.reasons else '')
+                    ),
+                )
+                crm.enqueue(TAG_CONTACT, self.caller_phone, tags=[tag])
 
             if is_qualified:
                 return "Great! Based on what you've told me, I think we can definitely help. Would you like to schedule a consultation?"
@@ -515,6 +467,7 @@ class PloinkVoiceAssistant(Agent):
                 return "Thanks for sharing that. Let me make a note and someone from our team will follow up."
 
         except Exception:
+            mark_failed()
             return "I've noted your requirements. Would you like to schedule a call to discuss further?"
 
     # ═══════════════════════════════════════════════════════════════════════
@@ -522,11 +475,18 @@ class PloinkVoiceAssistant(Agent):
     # ═══════════════════════════════════════════════════════════════════════
 
     @function_tool
+    @memoized(NEVER)
+    @traced()
     async def get_current_datetime(self) -> str:
         """Get the current date and time."""
         return datetime.now().strftime("%A, %B %d, %Y at %I:%M %p")
 
 
+def builtin_tool_names() -> set:
+    """Names of the built-in tools, which HTTP tools must not shadow."""
+    return {name for name, member in vars(PloinkVoiceAssistant).items() if is_function_tool(member)}
+
+
 # ═══════════════════════════════════════════════════════════════════════════════
 # ELEVENLABS VOICE MAPPING
 # ═══════════════════════════════════════════════════════════════════════════════
@@ -545,34 +505,178 @@ ELEVENLABS_VOICE_IDS = {
 }
 
 
+# ═══════════════════════════════════════════════════════════════════════════════
+# WORKER PREWARM
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def prewarm(proc: JobProcess):
+    """
+    Load reusable voice pipeline resources once per worker process.
+
+    The Silero VAD model is the slowest thing to load before the first
+    greeting; the STT/LLM plugins are stateless factories that every job in
+    this process can share. TTS instances depend on the agent's voice, so
+    they are built on first use and kept in the same userdata.
+    """
+    timings = {}
+
+    started = time.perf_counter()
+    proc.userdata['vad'] = silero.VAD.load()
+    timings['vad'] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    proc.userdata['stt'] = deepgram.STT(model="nova-2")
+    proc.userdata['llm'] = openai.LLM(model="gpt-4")
+    # ElevenLabs stays out of the worker's import path; job processes load
+    # it here, on the main thread where LiveKit plugins must register
+    from livekit.plugins import elevenlabs  # noqa: F401
+    timings['plugins'] = time.perf_counter() - started
+
+    # Read the agent config snapshot now rather than on the first call
+    get_config_cache()
+    # Load the CA bundle here rather than on the event loop at the first request
+    http_pool.ssl_context()
+
+    proc.userdata['tts'] = {}
+    proc.userdata['prewarm_timings'] = timings
+    proc.userdata['jobs_served'] = 0
+
+    logger.info(
+        f"Prewarm finished in {sum(timings.values()):.3f}s "
+        f"(vad={timings['vad']:.3f}s, plugins={timings['plugins']:.3f}s)"
+    )
+
+
+def get_pipeline_plugins(proc: JobProcess) -> Dict[str, Any]:
+    """
+    Return the shared VAD/STT/LLM for this worker process.
+
+    Falls back to loading anything prewarm didn't provide (e.g. when the
+    entrypoint is driven without a worker), so callers never need to care.
+    """
+    userdata = proc.userdata
+    loaded_inline = 'vad' not in userdata
+    if loaded_inline:
+        prewarm(proc)
+
+    # Whatever prewarm paid up front is time this job didn't spend before its greeting
+    userdata['jobs_served'] += 1
+    prewarm_seconds = sum(userdata['prewarm_timings'].values())
+    saved_seconds = 0.0 if loaded_inline else prewarm_seconds
+    logger.info(
+        f"Job {userdata['jobs_served']} in process: prewarm took {prewarm_seconds:.3f}s, "
+        f"job saved {saved_seconds:.3f}s"
+    )
+
+    return {
+        'vad': userdata['vad'],
+        'stt': userdata['stt'],
+        'llm': userdata['llm'],
+    }
+
+
+def get_tts(proc: JobProcess, voice_id: str):
+    """Return the ElevenLabs TTS for an agent voice, built once per process."""
+    from livekit.plugins import elevenlabs
+    elevenlabs_voice_id = ELEVENLABS_VOICE_IDS.get(voice_id, ELEVENLABS_VOICE_IDS['rachel'])
+    tts_by_voice = proc.userdata.setdefault('tts', {})
+    if elevenlabs_voice_id not in tts_by_voice:
+        tts_by_voice[elevenlabs_voice_id] = elevenlabs.TTS(voice_id=elevenlabs_voice_id)
+    return tts_by_voice[elevenlabs_voice_id]
+
+
 # ═══════════════════════════════════════════════════════════════════════════════
 # ENTRYPOINT
 # ═══════════════════════════════════════════════════════════════════════════════
 
-async def entrypoint(ctx: JobContext):
-    """Entry point for the voice agent."""
+def parse_room_metadata(raw: Optional[str]) -> Dict[str, Any]:
+    """Parse room metadata JSON, tolerating empty or malformed values."""
+    if not raw:
+        return {}
+    try:
+        metadata = json.loads(raw)
+    except json.JSONDecodeError:
+        return {}
+    return metadata if isinstance(metadata, dict) else {}
 
-    # Connect to the room first
-    await ctx.connect()
 
-    # Parse room metadata for agent configuration
-    agent_id = None
-    caller_phone = None
-    agent_config = None
+async def entrypoint(ctx: JobContext):
+    """
+    Entry point for the voice agent.
 
-    if ctx.room.metadata:
-        try:
-            metadata = json.loads(ctx.room.metadata)
-            agent_id = metadata.get("agentId")
-            caller_phone = metadata.get("phoneNumber")
-        except json.JSONDecodeError:
-            pass
+    Startup runs as a small pipeline: the room connect and the config fetch
+    overlap, and the prewarmed plugins are picked up while the config loads.
+    Only session.start needs both the room and the agent.
+    """
+    timeline = StartupTimeline(room=ctx.job.room.name)
+
+    # Tag every span from this call; tasks created below inherit the tags
+    tracer = get_tracer()
+    tracer.start_call(room=ctx.job.room.name)
+    ctx.add_shutdown_callback(tracer.shutdown)
+
+    # Sessions in this process share its event loop; report anything blocking it
+    watchdog = get_loop_watchdog()
+    if watchdog is not None:
+        watchdog.start()
+
+    # Publish this process's load signals for the worker's admission decisions
+    load_reporter = get_load_reporter()
+    load_reporter.start()
+
+    # Start the CRM writer (replaying any spooled work)
+    crm = get_crm_queue()
+    if crm is not None:
+        crm.start()
+
+    # Build the calendar client and keep its token fresh off the call path
+    calendar = get_calendar_service()
+    if calendar.configured:
+        calendar.start()
+
+    call_log_writer = get_call_log_writer()
+
+    # Shutdown callbacks run concurrently, so the ordered teardown is one
+    # callback: the CRM writes still need the pooled connections, and the
+    # call log should have the call's last events before the pool closes
+    async def _shutdown():
+        if crm is not None:
+            await crm.drain()
+        if call_log_writer is not None:
+            await call_log_writer.shutdown()
+        await http_pool.shutdown()
+
+    ctx.add_shutdown_callback(_shutdown)
+
+    # Connect to the room in the background
+    connect_task = asyncio.create_task(timeline.run('connect', ctx.connect()))
+
+    # The job carries the room metadata, so the config fetch doesn't have to
+    # wait for the connect; fall back to the live room if it wasn't set yet.
+    metadata = parse_room_metadata(ctx.job.room.metadata)
+    if not metadata:
+        await connect_task
+        metadata = parse_room_metadata(ctx.room.metadata)
+
+    agent_id = metadata.get("agentId")
+    caller_phone = metadata.get("phoneNumber")
+    timeline.agent_id = agent_id
+    tracer.bind(agent_id=agent_id or "default")
 
     # Load agent configuration from dashboard
-    if agent_id:
-        agent_config = await load_agent_config(agent_id)
-    else:
-        agent_config = await load_agent_config("default")
+    config_task = asyncio.create_task(
+        timeline.run('load_config', load_agent_config(agent_id or "default"))
+    )
+
+    # Prewarmed VAD/STT/LLM don't depend on the config
+    with timeline.stage('plugins'):
+        plugins = get_pipeline_plugins(ctx.proc)
+
+    try:
+        agent_config = await config_task
+    except BaseException:
+        connect_task.cancel()
+        raise
 
     # Extract configuration values
     config = agent_config.get('config', {})
@@ -580,48 +684,90 @@ async def entrypoint(ctx: JobContext):
     welcome_message = config.get('welcomeMessage', agent_config.get('welcomeMessage', ''))
     custom_variables = config.get('customVariables', [])
     http_tools = config.get('httpTools', [])
+    qualification_rules = config.get('qualification')
     voice_id = agent_config.get('voiceId', 'rachel')
 
-    # Use ElevenLabs TTS with voice from agent config
-    from livekit.plugins import elevenlabs
-    elevenlabs_voice_id = ELEVENLABS_VOICE_IDS.get(voice_id, ELEVENLABS_VOICE_IDS['rachel'])
-    tts = elevenlabs.TTS(voice_id=elevenlabs_voice_id)
-
-    # Create agent session with voice pipeline
-    session = AgentSession(
-        stt=deepgram.STT(model="nova-2"),
-        llm=openai.LLM(model="gpt-4"),
-        tts=tts,
-        vad=silero.VAD.load(),
-    )
+    with timeline.stage('build_agent'):
+        # Create agent session with voice pipeline, using the agent's voice
+        tts = get_tts(ctx.proc, voice_id)
+        session = AgentSession(
+            stt=plugins['stt'],
+            llm=plugins['llm'],
+            tts=tts,
+            vad=plugins['vad'],
+        )
 
-    # Create agent instance with configuration
-    agent = PloinkVoiceAssistant(
-        system_prompt=system_prompt,
-        welcome_message=welcome_message,
-        custom_variables=custom_variables,
-        http_tools=http_tools,
-    )
+        # Create agent instance with configuration
+        agent = PloinkVoiceAssistant(
+            system_prompt=system_prompt,
+            welcome_message=welcome_message,
+            custom_variables=custom_variables,
+            http_tools=http_tools,
+            qualification_rules=qualification_rules,
+        )
+
+        # Set caller phone if available
+        if caller_phone:
+            agent.caller_phone = caller_phone
+            agent.variables['caller_phone'] = caller_phone
+
+    @session.on("agent_state_changed")
+    def _on_agent_state(ev):
+        if ev.new_state == "speaking":
+            timeline.mark('first_greeting_audio')
+
+    @session.on("metrics_collected")
+    def _on_metrics(ev):
+        record_pipeline_metrics(ev.metrics)
+        load_reporter.record_metrics(ev.metrics)
 
-    # Set caller phone if available
-    if caller_phone:
-        agent.caller_phone = caller_phone
-        agent.variables['caller_phone'] = caller_phone
+    load_reporter.track(session)
 
-    # Start the session
-    await session.start(
+    # Stream the transcript and tool calls to the call log as they happen
+    if call_log_writer is not None:
+        call_log = CallLog(call_log_writer, room=ctx.job.room.name, agent_id=agent_id or "default")
+        call_log.start(caller=caller_phone, voice_id=voice_id)
+        call_log.attach(session)
+
+    async def _log_tool_memo():
+        stats = agent.tool_memo.stats()
+        if stats:
+            logger.info(f"Tool calls this session: {stats}")
+
+    ctx.add_shutdown_callback(_log_tool_memo)
+
+    # Start the session once the room is ready
+    await connect_task
+    await timeline.run('session_start', session.start(
         room=ctx.room,
         agent=agent,
-    )
+    ))
 
-    # Generate initial greeting using configured welcome message
-    await session.generate_reply(
-        instructions=f"Say exactly this greeting: {agent.welcome_message}"
+    # Speak the configured welcome message directly (no LLM round-trip),
+    # from cached audio unless it depends on per-call variables
+    elevenlabs_voice_id = ELEVENLABS_VOICE_IDS.get(voice_id, ELEVENLABS_VOICE_IDS['rachel'])
+    greeting = await get_greeting_cache().say_greeting(
+        session,
+        tts,
+        elevenlabs_voice_id,
+        agent.welcome_message,
+        cacheable=not uses_per_call_variables(welcome_message),
     )
+    await timeline.run('greeting', greeting.wait_for_playout())
+    timeline.emit()
 
 
 if __name__ == "__main__":
+    log_startup_profile()
+    start_exporter()
+    start_config_sync()
+    # Admission by VAD, session, loop-lag and CRM/SMS load, not CPU alone
+    worker_load = get_worker_load()
     cli.run_app(WorkerOptions(
         entrypoint_fnc=entrypoint,
+        request_fnc=worker_load.admit,
+        prewarm_fnc=prewarm,
+        load_fnc=worker_load,
+        load_threshold=worker_load.threshold,
         agent_name="ploink-voice-agent",
     ))
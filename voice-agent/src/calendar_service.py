@@ -0,0 +1,214 @@
+"""
+Google Calendar Service
+=======================
+Worker-wide Google Calendar access that never blocks the event loop:
+- Credentials are read and the API client is built once per worker
+- Tokens are refreshed in the background before they expire
+- Every API call runs on a small dedicated thread pool
+- Free/busy results are cached briefly per day so open slots can be
+  offered without a round-trip per proposal
+"""
+
+import asyncio
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, time as dt_time, timedelta, timezone as dt_timezone
+from typing import Any, Dict, List, Optional, Tuple
+from zoneinfo import ZoneInfo
+
+logger = logging.getLogger("ploink-voice-agent.calendar")
+
+
+Interval = Tuple[datetime, datetime]
+
+
+class CalendarNotConfigured(Exception):
+    """Raised when the Google libraries or credentials are missing."""
+
+
+class CalendarService:
+    """Shared Google Calendar client for every session in the worker."""
+
+    def __init__(
+        self,
+        credentials_path: str,
+        calendar_id: str = 'primary',
+        timezone: str = 'America/New_York',
+        freebusy_ttl: float = 60.0,
+        max_workers: int = 4,
+        business_hours: Tuple[int, int] = (9, 17),
+    ) -> None:
+        self.credentials_path = credentials_path
+        self.calendar_id = calendar_id
+        self.timezone = ZoneInfo(timezone)
+        self.timezone_name = timezone
+        self.freebusy_ttl = freebusy_ttl
+        self.business_hours = business_hours
+
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='gcal')
+        # googleapiclient/httplib2 objects aren't thread-safe: one client per pool thread
+        self._local = threading.local()
+        self._credentials = None
+        self._credentials_lock = threading.Lock()
+        self._refresh_task: Optional[asyncio.Task] = None
+        self._freebusy: Dict[date, Tuple[float, List[Interval]]] = {}
+
+    @property
+    def configured(self) -> bool:
+        return os.path.exists(self.credentials_path)
+
+    async def _run(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    # ═══════════════════════════════════════════════════════════════════════
+    # CREDENTIALS AND CLIENT (pool threads)
+    # ═══════════════════════════════════════════════════════════════════════
+
+    def _load_credentials(self):
+        with self._credentials_lock:
+            if self._credentials is None:
+                try:
+                    from google.oauth2.credentials import Credentials
+                except ImportError:
+                    raise CalendarNotConfigured("Google client libraries are not installed")
+                if not self.configured:
+                    raise CalendarNotConfigured(f"No credentials at {self.credentials_path}")
+                self._credentials = Credentials.from_authorized_user_file(self.credentials_path)
+            return self._credentials
+
+    def _refresh_if_needed(self, margin: float = 300.0) -> None:
+        credentials = self._load_credentials()
+        expiry = credentials.expiry
+        # google-auth expiries are naive UTC; no expiry means "valid until a 401"
+        if expiry is not None and expiry.tzinfo is None:
+            expiry = expiry.replace(tzinfo=dt_timezone.utc)
+        expiring = not credentials.valid or (
+            expiry is not None and (expiry - datetime.now(dt_timezone.utc)).total_seconds() < margin
+        )
+        if expiring and credentials.refresh_token:
+            from google.auth.transport.requests import Request
+            with self._credentials_lock:
+                credentials.refresh(Request())
+            logger.info("Refreshed Google Calendar access token")
+
+    def _client(self):
+        service = getattr(self._local, 'service', None)
+        if service is None:
+            from googleapiclient.discovery import build
+            service = build('calendar', 'v3', credentials=self._load_credentials(), cache_discovery=False)
+            self._local.service = service
+        return service
+
+    def _insert_event(self, event: Dict[str, Any]) -> Dict[str, Any]:
+        self._refresh_if_needed(margin=0)
+        return self._client().events().insert(
+            calendarId=self.calendar_id,
+            body=event,
+            sendUpdates='all',
+        ).execute()
+
+    def _query_freebusy(self, start: datetime, end: datetime) -> List[Interval]:
+        self._refresh_if_needed(margin=0)
+        result = self._client().freebusy().query(body={
+            'timeMin': start.isoformat(),
+            'timeMax': end.isoformat(),
+            'timeZone': self.timezone_name,
+            'items': [{'id': self.calendar_id}],
+        }).execute()
+        busy = result.get('calendars', {}).get(self.calendar_id, {}).get('busy', [])
+        return [
+            (datetime.fromisoformat(b['start'].replace('Z', '+00:00')),
+             datetime.fromisoformat(b['end'].replace('Z', '+00:00')))
+            for b in busy
+        ]
+
+    # ═══════════════════════════════════════════════════════════════════════
+    # ASYNC API
+    # ═══════════════════════════════════════════════════════════════════════
+
+    def localize(self, value: datetime) -> datetime:
+        """Attach the calendar timezone to naive datetimes."""
+        return value.replace(tzinfo=self.timezone) if value.tzinfo is None else value
+
+    def start(self, interval: float = 240.0) -> None:
+        """Build the client ahead of the first booking and keep its token fresh."""
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.create_task(self._refresh_loop(interval))
+
+    async def _refresh_loop(self, interval: float) -> None:
+        try:
+            await self._run(self._client)
+        except Exception as e:
+            logger.warning(f"Google Calendar unavailable: {e}")
+            return
+
+        while True:
+            try:
+                await self._run(self._refresh_if_needed)
+            except CalendarNotConfigured:
+                return
+            except Exception as e:
+                logger.warning(f"Background token refresh failed: {e}")
+            await asyncio.sleep(interval)
+
+    async def insert_event(self, event: Dict[str, Any]) -> Dict[str, Any]:
+        created = await self._run(self._insert_event, event)
+
+        # Keep the cached day consistent with what we just booked
+        start = datetime.fromisoformat(event['start']['dateTime'])
+        end = datetime.fromisoformat(event['end']['dateTime'])
+        cached = self._freebusy.get(start.date())
+        if cached is not None:
+            cached[1].append((self.localize(start), self.localize(end)))
+        return created
+
+    async def busy_intervals(self, day: date) -> List[Interval]:
+        """Busy intervals for a whole day, cached for freebusy_ttl seconds."""
+        cached = self._freebusy.get(day)
+        if cached is not None and time.monotonic() - cached[0] < self.freebusy_ttl:
+            return cached[1]
+
+        start = datetime.combine(day, dt_time.min, tzinfo=self.timezone)
+        busy = await self._run(self._query_freebusy, start, start + timedelta(days=1))
+        self._freebusy[day] = (time.monotonic(), busy)
+        return busy
+
+    async def is_free(self, start: datetime, end: datetime) -> bool:
+        start, end = self.localize(start), self.localize(end)
+        busy = await self.busy_intervals(start.date())
+        return not any(b_start < end and start < b_end for b_start, b_end in busy)
+
+    async def open_slots(self, day: date, duration_minutes: int = 30, limit: int = 5) -> List[datetime]:
+        """Free start times on day within business hours, earliest first."""
+        busy = await self.busy_intervals(day)
+        open_hour, close_hour = self.business_hours
+        slot = datetime.combine(day, dt_time(open_hour), tzinfo=self.timezone)
+        close = datetime.combine(day, dt_time(close_hour), tzinfo=self.timezone)
+        now = datetime.now(self.timezone)
+        length = timedelta(minutes=duration_minutes)
+
+        slots = []
+        while slot + length <= close and len(slots) < limit:
+            if slot >= now and not any(b_start < slot + length and slot < b_end for b_start, b_end in busy):
+                slots.append(slot)
+            slot += timedelta(minutes=30)
+        return slots
+
+
+_service: Optional[CalendarService] = None
+
+
+def get_calendar_service() -> CalendarService:
+    """Process-wide calendar service configured from the environment."""
+    global _service
+    if _service is None:
+        _service = CalendarService(
+            credentials_path=os.getenv("GOOGLE_CREDENTIALS_PATH", "google_creds.json"),
+            calendar_id=os.getenv("GOOGLE_CALENDAR_ID", "primary"),
+            timezone=os.getenv("CALENDAR_TIMEZONE", "America/New_York"),
+            freebusy_ttl=float(os.getenv("CALENDAR_FREEBUSY_TTL", "60")),
+        )
+    return _service
@@ -0,0 +1,380 @@
+"""
+Call Log
+========
+Append-only record of every call for post-call analytics and replay:
+- Transcript turns, tool calls (arguments, output, latency, errors) and the
+  call's start and end, one JSON object per line
+- Events are queued to a background writer thread, so sessions never wait
+  on disk and keep no history in memory (a sequence number and a few counters)
+- gzip-compressed files per process under CALL_LOG_DIR, rotated by size and
+  age; files older than CALL_LOG_RETENTION_DAYS are removed, then the oldest
+  until the directory is under CALL_LOG_MAX_TOTAL_MB (a job process writes
+  its own files, so a file count would say nothing about how much history
+  is kept)
+- Each batch is sync-flushed, so a crashed process loses at most the
+  events still queued, and a file can be read while it is being written
+
+If the writer falls behind, new events are dropped and counted rather than
+queued without bound.
+
+Usage:
+    python src/call_log.py [log_dir] [room]    # print events (of one call)
+"""
+
+import asyncio
+import atexit
+import glob
+import gzip
+import json
+import logging
+import os
+import queue
+import sys
+import threading
+import time
+import zlib
+from typing import Any, Dict, Iterator, Optional
+
+logger = logging.getLogger("ploink-voice-agent.call_log")
+
+DEFAULT_LOG_DIR = '.cache/call-logs'
+
+# Tool outputs are kept for replay but capped, so one chatty endpoint can't
+# dominate the log
+MAX_OUTPUT_CHARS = 2000
+
+# Events serialized per write (and per sync flush)
+BATCH_SIZE = 500
+
+_FLUSH = object()
+
+
+class CallLogWriter:
+    """Buffered background writer of rotating, compressed JSONL files."""
+
+    def __init__(
+        self,
+        log_dir: str,
+        max_bytes: int = 64 * 1024 * 1024,
+        max_age: float = 3600.0,
+        retention: float = 30 * 86400.0,
+        max_total_bytes: int = 2048 * 1024 * 1024,
+        flush_interval: float = 1.0,
+        queue_size: int = 10000,
+    ) -> None:
+        self.log_dir = log_dir
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.retention = retention
+        self.max_total_bytes = max_total_bytes
+        self.flush_interval = flush_interval
+        self.written = 0
+        self.dropped = 0
+        self.path: Optional[str] = None
+        self._queue: "queue.Queue[Any]" = queue.Queue(maxsize=queue_size)
+        self._raw = None
+        self._file: Optional[gzip.GzipFile] = None
+        self._opened_at = 0.0
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def write(self, event: Dict[str, Any]) -> None:
+        """Queue an event; never blocks (drops it if the writer is behind)."""
+        self._ensure_thread()
+        try:
+            self._queue.put_nowait(event)
+        except queue.Full:
+            self.dropped += 1
+            if self.dropped in (1, 100) or self.dropped % 10000 == 0:
+                logger.warning(f"Call log writer is behind; {self.dropped} events dropped")
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Wait until everything queued so far is on disk."""
+        if self._thread is None:
+            return True
+        done = threading.Event()
+        try:
+            self._queue.put((_FLUSH, done), timeout=timeout)
+        except queue.Full:
+            return False
+        return done.wait(timeout)
+
+    async def shutdown(self) -> None:
+        """Job shutdown callback: get the call's last events onto disk."""
+        await asyncio.to_thread(self.flush)
+
+    def close(self) -> None:
+        """Flush and finish the current file (process exit)."""
+        self.flush()
+        with self._lock:
+            self._close_file()
+
+    # ═══════════════════════════════════════════════════════════════════════
+    # WRITER THREAD
+    # ═══════════════════════════════════════════════════════════════════════
+
+    def _ensure_thread(self) -> None:
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name='call-log-writer', daemon=True)
+                    self._thread.start()
+                    atexit.register(self.close)
+
+    def _run(self) -> None:
+        while True:
+            try:
+                item = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+
+            lines = []
+            waiters = []
+            while True:
+                if isinstance(item, tuple) and item and item[0] is _FLUSH:
+                    waiters.append(item[1])
+                else:
+                    lines.append(json.dumps(item, default=str, separators=(',', ':')))
+                if len(lines) >= BATCH_SIZE:
+                    break
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+
+            if lines:
+                with self._lock:
+                    self._write_lines(lines)
+            for waiter in waiters:
+                waiter.set()
+
+    def _write_lines(self, lines: list) -> None:
+        try:
+            if self._file is None or self._should_rotate():
+                self._rotate()
+            self._file.write(('\n'.join(lines) + '\n').encode('utf-8'))
+            # Complete deflate blocks on disk: readable now, and after a crash
+            self._file.flush()
+            self.written += len(lines)
+        except OSError as e:
+            self.dropped += len(lines)
+            logger.warning(f"Failed to write call log: {e}")
+            self._close_file()
+
+    def _should_rotate(self) -> bool:
+        return self._raw.tell() >= self.max_bytes or time.time() - self._opened_at >= self.max_age
+
+    def _rotate(self) -> None:
+        self._close_file()
+        os.makedirs(self.log_dir, exist_ok=True)
+        stamp = time.strftime('%Y%m%d-%H%M%S')
+        self.path = os.path.join(self.log_dir, f"calls-{stamp}-{os.getpid()}.jsonl.gz")
+        self._raw = open(self.path, 'ab')
+        self._file = gzip.GzipFile(fileobj=self._raw, mode='ab')
+        self._opened_at = time.time()
+        self._prune()
+
+    def _close_file(self) -> None:
+        if self._file is not None:
+            try:
+                self._file.close()
+                self._raw.close()
+            except OSError as e:
+                logger.warning(f"Failed to close call log: {e}")
+            self._file = self._raw = None
+
+    def _prune(self) -> None:
+        files = []
+        for path in glob.glob(os.path.join(self.log_dir, 'calls-*.jsonl.gz')):
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, path))
+        files.sort()
+
+        cutoff = time.time() - self.retention
+        total = sum(size for _, size, _ in files)
+        for mtime, size, path in files:
+            if mtime >= cutoff and total <= self.max_total_bytes:
+                break
+            if path == self.path:
+                continue
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+
+
+def _mtime(path: str) -> float:
+    try:
+        return os.path.getmtime(path)
+    except OSError:
+        return 0.0
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# PER-CALL LOG
+# ═══════════════════════════════════════════════════════════════════════════════
+
+class CallLog:
+    """Streams one call's events to the writer; holds no history."""
+
+    def __init__(self, writer: CallLogWriter, room: str, agent_id: Optional[str] = None) -> None:
+        self.writer = writer
+        self.room = room
+        self.agent_id = agent_id
+        self.seq = 0
+        self.started = time.time()
+        self.turns = 0
+        self.tool_calls = 0
+        self.tool_errors = 0
+
+    def event(self, event_type: str, **fields: Any) -> None:
+        self.seq += 1
+        self.writer.write({
+            'ts': time.time(),
+            'room': self.room,
+            'agent_id': self.agent_id,
+            'seq': self.seq,
+            'type': event_type,
+            **fields,
+        })
+
+    def start(self, **fields: Any) -> None:
+        self.event('call_started', **fields)
+
+    def turn(self, role: str, text: str, **fields: Any) -> None:
+        self.turns += 1
+        self.event('turn', role=role, text=text, **fields)
+
+    def tool(
+        self,
+        name: str,
+        arguments: Any,
+        output: Optional[str],
+        is_error: bool,
+        latency: Optional[float],
+    ) -> None:
+        self.tool_calls += 1
+        if is_error:
+            self.tool_errors += 1
+        if isinstance(arguments, str):
+            try:
+                arguments = json.loads(arguments)
+            except ValueError:
+                pass
+        if output is not None and len(output) > MAX_OUTPUT_CHARS:
+            output = output[:MAX_OUTPUT_CHARS] + '…'
+        self.event(
+            'tool',
+            name=name,
+            arguments=arguments,
+            output=output,
+            is_error=is_error,
+            latency_ms=round(latency * 1000, 1) if latency is not None else None,
+        )
+
+    def end(self, reason: str, error: Optional[str] = None) -> None:
+        self.event(
+            'call_ended',
+            reason=reason,
+            error=error,
+            duration_s=round(time.time() - self.started, 1),
+            turns=self.turns,
+            tool_calls=self.tool_calls,
+            tool_errors=self.tool_errors,
+        )
+
+    def attach(self, session: Any) -> None:
+        """Log an AgentSession's finished turns, tool calls and close."""
+
+        @session.on("conversation_item_added")
+        def _on_item(ev):
+            item = ev.item
+            if getattr(item, 'type', None) != 'message':
+                return
+            self.turn(
+                item.role,
+                item.text_content or '',
+                interrupted=item.interrupted,
+                metrics=dict(item.metrics) or None,
+            )
+
+        @session.on("function_tools_executed")
+        def _on_tools(ev):
+            for call, output in ev.zipped():
+                self.tool(
+                    call.name,
+                    call.arguments,
+                    output.output if output is not None else None,
+                    output.is_error if output is not None else True,
+                    output.created_at - call.created_at if output is not None else None,
+                )
+
+        @session.on("close")
+        def _on_close(ev):
+            self.end(str(getattr(ev.reason, 'value', ev.reason)), error=str(ev.error) if ev.error else None)
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# READING
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def read_events(path: str) -> Iterator[Dict[str, Any]]:
+    """Events in a log file, including one still being written or cut short."""
+    decompressor = zlib.decompressobj(wbits=31)
+    pending = b''
+    with open(path, 'rb') as f:
+        while True:
+            chunk = f.read(1 << 16)
+            if not chunk:
+                break
+            while chunk:
+                pending += decompressor.decompress(chunk)
+                if decompressor.eof:
+                    # Next gzip member (a file reopened for append)
+                    chunk = decompressor.unused_data
+                    decompressor = zlib.decompressobj(wbits=31)
+                else:
+                    chunk = b''
+            *lines, pending = pending.split(b'\n')
+            for line in lines:
+                if line:
+                    yield json.loads(line)
+
+
+def iter_log(log_dir: str, room: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+    """Events across every log file, oldest file first; optionally one call's."""
+    for path in sorted(glob.glob(os.path.join(log_dir, 'calls-*.jsonl.gz')), key=_mtime):
+        for event in read_events(path):
+            if room is None or event.get('room') == room:
+                yield event
+
+
+_writer: Optional[CallLogWriter] = None
+
+
+def get_call_log_writer() -> Optional[CallLogWriter]:
+    """Process-wide writer, or None when CALL_LOG_DIR is set empty."""
+    global _writer
+    if _writer is None:
+        log_dir = os.getenv('CALL_LOG_DIR', DEFAULT_LOG_DIR)
+        if not log_dir:
+            return None
+        _writer = CallLogWriter(
+            log_dir,
+            max_bytes=int(float(os.getenv('CALL_LOG_MAX_MB', '64')) * 1024 * 1024),
+            max_age=float(os.getenv('CALL_LOG_ROTATE_INTERVAL', '3600')),
+            retention=float(os.getenv('CALL_LOG_RETENTION_DAYS', '30')) * 86400,
+            max_total_bytes=int(float(os.getenv('CALL_LOG_MAX_TOTAL_MB', '2048')) * 1024 * 1024),
+        )
+    return _writer
+
+
+if __name__ == '__main__':
+    directory = sys.argv[1] if len(sys.argv) > 1 else os.getenv('CALL_LOG_DIR') or DEFAULT_LOG_DIR
+    only_room = sys.argv[2] if len(sys.argv) > 2 else None
+    for event in iter_log(directory, only_room):
+        print(json.dumps(event, ensure_ascii=False))
@@ -0,0 +1,274 @@
+"""
+Circuit Breakers
+================
+Per-endpoint circuit breakers for outbound calls from tools:
+- A breaker opens after repeated failures (errors, 5xx/429, timeouts) or
+  responses slower than the slow-call threshold
+- While open, calls fail fast instead of leaving the caller in silence
+- After a cool-down one probe is let through (half-open); success closes
+  the breaker again
+- Breakers are shared by every session in the process; failure counts and
+  open breakers are kept in BREAKER_STATE_DIR, so failures add up across
+  the worker's job processes (one per call) and all of them skip an
+  endpoint once it opens
+- Recent latencies are kept per endpoint (used to time hedged retries)
+"""
+
+import fcntl
+import hashlib
+import json
+import logging
+import os
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Optional, Tuple
+
+logger = logging.getLogger("ploink-voice-agent.breaker")
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class CircuitOpenError(Exception):
+    """Raised (or reported) when a call is short-circuited by an open breaker."""
+
+
+class SharedBreakerState:
+    """Failure counts and open-until times per endpoint, shared between processes via files."""
+
+    def __init__(self, directory: str, check_interval: float = 1.0) -> None:
+        self.directory = directory
+        self.check_interval = check_interval
+        self._cache: Dict[str, Tuple[float, float]] = {}  # key -> (checked_at, open_until)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, hashlib.sha1(key.encode()).hexdigest()[:16])
+
+    def _update(self, key: str, change: Callable[[Dict[str, Any]], bool]) -> Dict[str, Any]:
+        """Apply change() to the endpoint's state under an exclusive lock."""
+        state: Dict[str, Any] = {'failures': 0, 'open_until': 0.0}
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(self._path(key), 'a+') as f:
+                fcntl.flock(f, fcntl.LOCK_EX)
+                f.seek(0)
+                state.update(_parse_state(f.read()))
+                if change(state):
+                    state['key'] = key
+                    f.seek(0)
+                    f.truncate()
+                    f.write(json.dumps(state))
+                    f.flush()
+        except OSError as e:
+            logger.warning(f"Failed to update breaker state for {key}: {e}")
+        self._cache[key] = (time.monotonic(), float(state['open_until']))
+        return state
+
+    def add_failure(self, key: str) -> int:
+        """Count a bad call; returns the consecutive failures across processes."""
+
+        def change(state: Dict[str, Any]) -> bool:
+            state['failures'] = int(state['failures']) + 1
+            return True
+
+        return int(self._update(key, change)['failures'])
+
+    def reset_failures(self, key: str) -> None:
+        def change(state: Dict[str, Any]) -> bool:
+            if not state['failures']:
+                return False
+            state['failures'] = 0
+            return True
+
+        self._update(key, change)
+
+    def publish(self, key: str, open_until: float) -> None:
+        def change(state: Dict[str, Any]) -> bool:
+            state['open_until'] = open_until
+            state['failures'] = 0
+            return True
+
+        self._update(key, change)
+
+    def open_until(self, key: str) -> float:
+        """Wall-clock time until which a peer process holds the breaker open."""
+        now = time.monotonic()
+        cached = self._cache.get(key)
+        if cached is not None and now - cached[0] < self.check_interval:
+            return cached[1]
+
+        try:
+            with open(self._path(key)) as f:
+                fcntl.flock(f, fcntl.LOCK_SH)
+                open_until = float(_parse_state(f.read()).get('open_until', 0.0))
+        except (OSError, ValueError, TypeError):
+            open_until = 0.0
+        self._cache[key] = (now, open_until)
+        return open_until
+
+
+def _parse_state(text: str) -> Dict[str, Any]:
+    try:
+        state = json.loads(text) if text else {}
+    except ValueError:
+        return {}
+    return state if isinstance(state, dict) else {}
+
+
+class CircuitBreaker:
+    """Closed -> open after `failure_threshold` consecutive bad calls."""
+
+    def __init__(
+        self,
+        key: str,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+        slow_call: float = 5.0,
+        shared: Optional[SharedBreakerState] = None,
+    ) -> None:
+        self.key = key
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.slow_call = slow_call
+        self.shared = shared
+
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._latencies: Deque[float] = deque(maxlen=200)
+
+        self.opened = 0
+        self.short_circuited = 0
+
+    def allow(self) -> bool:
+        """Whether a call may go out now; a True in half-open state is the probe."""
+        now = time.monotonic()
+
+        if self.state == CLOSED and self.shared is not None:
+            remaining = self.shared.open_until(self.key) - time.time()
+            if remaining > 0:
+                # A sibling process saw this endpoint fail; adopt its cool-down
+                self._open(now - (self.reset_timeout - remaining), publish=False)
+
+        if self.state == OPEN:
+            if now - self._opened_at < self.reset_timeout:
+                self.short_circuited += 1
+                return False
+            self.state = HALF_OPEN
+            self._probe_in_flight = False
+
+        if self.state == HALF_OPEN:
+            if self._probe_in_flight:
+                self.short_circuited += 1
+                return False
+            self._probe_in_flight = True
+        return True
+
+    def release_probe(self) -> None:
+        """Give up the half-open probe without an outcome (e.g. it was cancelled)."""
+        if self.state == HALF_OPEN:
+            self._probe_in_flight = False
+
+    def record(self, ok: bool, latency: Optional[float] = None) -> None:
+        """Record a call outcome; slow successes count against the endpoint."""
+        if latency is not None:
+            self._latencies.append(latency)
+        slow = ok and latency is not None and latency > self.slow_call
+
+        if ok and not slow:
+            if self.state != CLOSED:
+                logger.info(f"Circuit closed for {self.key}")
+            self.state = CLOSED
+            self.consecutive_failures = 0
+            self._probe_in_flight = False
+            if self.shared is not None:
+                self.shared.reset_failures(self.key)
+            return
+
+        if self.shared is not None:
+            self.consecutive_failures = self.shared.add_failure(self.key)
+        else:
+            self.consecutive_failures += 1
+        if self.state == HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+            reason = 'slow responses' if slow else 'failures'
+            logger.warning(
+                f"Circuit opened for {self.key} after {self.consecutive_failures} {reason}; "
+                f"failing fast for {self.reset_timeout:.0f}s"
+            )
+            self._open(time.monotonic())
+
+    def _open(self, opened_at: float, publish: bool = True) -> None:
+        self.state = OPEN
+        self._opened_at = opened_at
+        self._probe_in_flight = False
+        self.opened += 1
+        self.consecutive_failures = 0
+        if publish and self.shared is not None:
+            self.shared.publish(self.key, time.time() + self.reset_timeout)
+
+    def latency_quantile(self, q: float, min_samples: int = 20) -> Optional[float]:
+        if len(self._latencies) < min_samples:
+            return None
+        ordered = sorted(self._latencies)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    def snapshot(self) -> Dict[str, object]:
+        return {
+            'state': self.state,
+            'consecutive_failures': self.consecutive_failures,
+            'opened': self.opened,
+            'short_circuited': self.short_circuited,
+            'latency_p50': self.latency_quantile(0.5, min_samples=1),
+            'latency_p90': self.latency_quantile(0.9, min_samples=1),
+        }
+
+
+class BreakerRegistry:
+    """One breaker per endpoint, shared by every session in the process."""
+
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+        slow_call: float = 5.0,
+        shared: Optional[SharedBreakerState] = None,
+    ) -> None:
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.slow_call = slow_call
+        self.shared = shared
+        self._breakers: Dict[str, CircuitBreaker] = {}
+
+    def get(self, key: str) -> CircuitBreaker:
+        breaker = self._breakers.get(key)
+        if breaker is None:
+            breaker = self._breakers[key] = CircuitBreaker(
+                key,
+                failure_threshold=self.failure_threshold,
+                reset_timeout=self.reset_timeout,
+                slow_call=self.slow_call,
+                shared=self.shared,
+            )
+        return breaker
+
+    def snapshot(self) -> Dict[str, Dict[str, object]]:
+        return {key: breaker.snapshot() for key, breaker in self._breakers.items()}
+
+
+_registry: Optional[BreakerRegistry] = None
+
+
+def get_breaker_registry() -> BreakerRegistry:
+    """Process-wide breakers configured from the environment."""
+    global _registry
+    if _registry is None:
+        state_dir = os.getenv('BREAKER_STATE_DIR', '.cache/breakers')
+        _registry = BreakerRegistry(
+            failure_threshold=int(os.getenv('BREAKER_FAILURE_THRESHOLD', '5')),
+            reset_timeout=float(os.getenv('BREAKER_RESET_TIMEOUT', '30')),
+            slow_call=float(os.getenv('BREAKER_SLOW_CALL', '5')),
+            shared=SharedBreakerState(state_dir) if state_dir else None,
+        )
+    return _registry
@@ -0,0 +1,299 @@
+"""
+Agent Config Cache
+==================
+In-process cache for dashboard agent configurations:
+- TTL per entry, revalidated with ETag / If-None-Match
+- Stale entries are served immediately while a background refresh runs
+- On-disk snapshot (on by default) so a restarted worker can answer its
+  first calls without reaching the dashboard
+- With config sync on (see config_sync.py), the snapshot is owned by the
+  worker's sync thread and job processes pick up its changes within a second;
+  the sync keeps entries current, so they aren't revalidated after the TTL
+"""
+
+import asyncio
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, Optional, Set
+
+import http_pool
+
+logger = logging.getLogger("ploink-voice-agent.config")
+
+DEFAULT_SNAPSHOT_PATH = '.cache/agent-configs.json'
+
+
+@dataclass
+class CacheEntry:
+    config: Dict[str, Any]
+    etag: Optional[str]
+    fetched_at: float  # wall clock, so snapshot entries age correctly across restarts
+
+    def age(self) -> float:
+        return time.time() - self.fetched_at
+
+
+class AgentConfigCache:
+    """
+    Agent configs keyed by agent id.
+
+    A fresh entry is returned as-is. A stale entry is returned as-is too, but
+    triggers one background revalidation per agent (unless the snapshot is
+    watched). Only a cold miss waits on the dashboard, and concurrent misses
+    for the same agent share one request.
+    """
+
+    def __init__(
+        self,
+        dashboard_url: str,
+        ttl: float = 60.0,
+        snapshot_path: Optional[str] = None,
+        timeout: float = 10.0,
+        watch_snapshot: bool = False,
+        watch_interval: float = 1.0,
+    ) -> None:
+        self.dashboard_url = dashboard_url.rstrip('/')
+        self.ttl = ttl
+        self.snapshot_path = snapshot_path
+        self.timeout = timeout
+        # A watched snapshot is written by the config sync, never by this cache
+        self.watch_snapshot = watch_snapshot and bool(snapshot_path)
+        self.watch_interval = watch_interval
+
+        self._entries: Dict[str, CacheEntry] = {}
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._background: Set[asyncio.Task] = set()
+        self._snapshot_mtime = 0.0
+        self._snapshot_checked = 0.0
+        # Snapshot writes run in threads; a slow one mustn't replace a newer one
+        self._snapshot_lock = threading.Lock()
+        self._snapshot_scheduled = 0
+        self._snapshot_written = 0
+
+        if snapshot_path:
+            self._load_snapshot()
+
+    # ═══════════════════════════════════════════════════════════════════════
+    # LOOKUP
+    # ═══════════════════════════════════════════════════════════════════════
+
+    async def get(self, agent_id: str) -> Optional[Dict[str, Any]]:
+        """Return the config for agent_id, or None if the dashboard has none."""
+        if self.watch_snapshot:
+            self._check_snapshot()
+
+        entry = self._entries.get(agent_id)
+        if entry is None:
+            return await self.refresh(agent_id)
+
+        # A watched snapshot is kept current by the config sync
+        if not self.watch_snapshot and entry.age() > self.ttl and agent_id not in self._inflight:
+            task = asyncio.create_task(self.refresh(agent_id))
+            self._background.add(task)
+            task.add_done_callback(self._background.discard)
+
+        return entry.config
+
+    def put(self, agent_id: str, config: Dict[str, Any], etag: Optional[str] = None) -> None:
+        """Store a config obtained out of band (e.g. pushed by the dashboard)."""
+        self._entries[agent_id] = CacheEntry(config=config, etag=etag, fetched_at=time.time())
+        self._schedule_snapshot()
+
+    def invalidate(self, agent_id: str) -> None:
+        if self._entries.pop(agent_id, None) is not None:
+            self._schedule_snapshot()
+
+    # ═══════════════════════════════════════════════════════════════════════
+    # REVALIDATION
+    # ═══════════════════════════════════════════════════════════════════════
+
+    async def refresh(self, agent_id: str) -> Optional[Dict[str, Any]]:
+        """Revalidate agent_id against the dashboard, sharing any in-flight request."""
+        pending = self._inflight.get(agent_id)
+        if pending is not None:
+            return await asyncio.shield(pending)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[agent_id] = future
+        try:
+            config = await self._fetch(agent_id)
+            future.set_result(config)
+            return config
+        except BaseException as e:
+            future.set_exception(e)
+            # Mark retrieved so a failed refresh nobody else awaited doesn't log noise
+            future.exception()
+            raise
+        finally:
+            del self._inflight[agent_id]
+
+    async def _fetch(self, agent_id: str) -> Optional[Dict[str, Any]]:
+        entry = self._entries.get(agent_id)
+        headers = {}
+        if entry and entry.etag:
+            headers['If-None-Match'] = entry.etag
+
+        try:
+            response = await http_pool.request(
+                'GET',
+                f"{self.dashboard_url}/api/voice/agents/{agent_id}",
+                headers=headers,
+                timeout=self.timeout,
+            )
+        except Exception as e:
+            # Dashboard unreachable: keep serving whatever we have
+            logger.warning(f"Failed to load agent config {agent_id}: {e}")
+            return entry.config if entry else None
+
+        if response.status_code == 304 and entry:
+            entry.fetched_at = time.time()
+            return entry.config
+
+        if response.status_code == 200:
+            try:
+                config = response.json()
+                if not isinstance(config, dict):
+                    raise TypeError(f"expected an object, got {type(config).__name__}")
+            except (ValueError, TypeError) as e:
+                # Same as an error status: keep serving whatever we have
+                logger.warning(f"Unreadable agent config {agent_id} from dashboard: {e}")
+                return entry.config if entry else None
+            self._entries[agent_id] = CacheEntry(
+                config=config,
+                etag=response.headers.get('etag'),
+                fetched_at=time.time(),
+            )
+            self._schedule_snapshot()
+            return config
+
+        if response.status_code == 404:
+            self.invalidate(agent_id)
+            return None
+
+        logger.warning(f"Dashboard returned {response.status_code} for agent config {agent_id}")
+        return entry.config if entry else None
+
+    # ═══════════════════════════════════════════════════════════════════════
+    # DISK SNAPSHOT
+    # ═══════════════════════════════════════════════════════════════════════
+
+    def _load_snapshot(self) -> None:
+        try:
+            self._snapshot_mtime = os.stat(self.snapshot_path).st_mtime
+            with open(self.snapshot_path) as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable config snapshot {self.snapshot_path}: {e}")
+            return
+
+        loaded = 0
+        for agent_id, raw in data.get('entries', {}).items():
+            try:
+                entry = CacheEntry(**raw)
+            except TypeError:
+                continue
+            # Keep anything this process fetched more recently than the snapshot
+            current = self._entries.get(agent_id)
+            if current is None or current.fetched_at <= entry.fetched_at:
+                self._entries[agent_id] = entry
+                loaded += 1
+
+        # Deletions pushed by the dashboard
+        for agent_id, deleted_at in data.get('deleted', {}).items():
+            current = self._entries.get(agent_id)
+            if current is not None and current.fetched_at <= deleted_at:
+                del self._entries[agent_id]
+
+        logger.info(f"Loaded {loaded} agent configs from {self.snapshot_path}")
+
+    def _check_snapshot(self) -> None:
+        """Reload the watched snapshot if it changed (stat at most once per interval)."""
+        now = time.monotonic()
+        if now - self._snapshot_checked < self.watch_interval:
+            return
+        self._snapshot_checked = now
+        try:
+            mtime = os.stat(self.snapshot_path).st_mtime
+        except OSError:
+            return
+        if mtime != self._snapshot_mtime:
+            self._load_snapshot()
+
+    def _write_snapshot(self, entries: Dict[str, Dict[str, Any]], generation: int = 0) -> None:
+        directory = os.path.dirname(self.snapshot_path) or '.'
+        os.makedirs(directory, exist_ok=True)
+        # A temp file of its own: overlapping writes (threads, job processes) can't share one
+        fd, tmp_path = tempfile.mkstemp(
+            dir=directory, prefix=f"{os.path.basename(self.snapshot_path)}.", suffix='.tmp'
+        )
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump({'entries': entries}, f)
+            with self._snapshot_lock:
+                if generation < self._snapshot_written:
+                    os.remove(tmp_path)
+                    return
+                os.replace(tmp_path, self.snapshot_path)
+                self._snapshot_written = generation
+        except BaseException:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
+
+    def _schedule_snapshot(self) -> None:
+        if not self.snapshot_path or self.watch_snapshot:
+            return
+        entries = {agent_id: asdict(entry) for agent_id, entry in self._entries.items()}
+        self._snapshot_scheduled += 1
+        generation = self._snapshot_scheduled
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self._write_snapshot(entries, generation)
+            return
+
+        task = loop.create_task(asyncio.to_thread(self._write_snapshot, entries, generation))
+        self._background.add(task)
+        task.add_done_callback(self._snapshot_done)
+
+    def _snapshot_done(self, task: asyncio.Task) -> None:
+        self._background.discard(task)
+        if not task.cancelled() and task.exception():
+            logger.warning(f"Failed to write config snapshot: {task.exception()}")
+
+
+_cache: Optional[AgentConfigCache] = None
+
+
+def get_config_cache() -> AgentConfigCache:
+    """Process-wide cache configured from the environment."""
+    global _cache
+    if _cache is None:
+        _cache = AgentConfigCache(
+            dashboard_url=os.getenv('DASHBOARD_URL', 'http://localhost:3005'),
+            ttl=float(os.getenv('AGENT_CONFIG_TTL', '60')),
+            snapshot_path=snapshot_path(),
+            watch_snapshot=sync_enabled(),
+        )
+    return _cache
+
+
+def sync_enabled() -> bool:
+    return os.getenv('AGENT_CONFIG_SYNC', 'false').lower() in ('1', 'true', 'yes')
+
+
+def snapshot_path() -> Optional[str]:
+    """The snapshot file, None if AGENT_CONFIG_SNAPSHOT_PATH is set empty (config sync needs one)."""
+    path = os.getenv('AGENT_CONFIG_SNAPSHOT_PATH', DEFAULT_SNAPSHOT_PATH) or None
+    if path is None and sync_enabled():
+        path = DEFAULT_SNAPSHOT_PATH
+    return path
@@ -0,0 +1,319 @@
+"""
+Agent Config Sync
+=================
+Keeps every active agent config on the worker before a call asks for it:
+- At startup all active configs are bulk-loaded from the dashboard's
+  paginated agent list (authenticated with the shared secret) and written to
+  the shared config snapshot
+- The dashboard pushes updates and deletions to a small webhook listener in
+  the worker (POST /agent-config-events, HMAC-signed); each one is applied
+  to the snapshot right away
+- A periodic full resync catches anything a missed push left behind
+- Job processes watch the snapshot (see config_cache.py), so a call never
+  waits on the dashboard and edits show up within seconds
+"""
+
+import hashlib
+import hmac
+import json
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Iterator, Mapping, Optional
+
+import httpx
+
+from config_cache import snapshot_path, sync_enabled
+
+logger = logging.getLogger("ploink-voice-agent.config-sync")
+
+EVENTS_PATH = '/agent-config-events'
+SIGNATURE_HEADER = 'X-Ploink-Signature'
+# Authenticates the bulk load (every user's agents) with the dashboard
+SECRET_HEADER = 'X-Ploink-Config-Secret'
+MAX_EVENT_BYTES = 1024 * 1024
+
+# Deletions are remembered this long so job processes can't resurrect them
+TOMBSTONE_TTL = 3600.0
+
+
+def agent_etag(agent: Mapping[str, Any]) -> Optional[str]:
+    """The ETag the dashboard's agent route sends for this agent."""
+    try:
+        updated = datetime.fromisoformat(str(agent['updatedAt']).replace('Z', '+00:00'))
+    except (KeyError, ValueError):
+        return None
+    return f'W/"{agent["id"]}-{round(updated.timestamp() * 1000)}"'
+
+
+def sign(body: bytes, secret: str) -> str:
+    return 'sha256=' + hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+
+
+class ConfigSync:
+    """
+    The worker's copy of all active agent configs, mirrored to the snapshot.
+
+    Preload, pushes and resyncs run on background threads; every change is
+    written to the snapshot atomically under one lock.
+    """
+
+    def __init__(
+        self,
+        dashboard_url: str,
+        snapshot_path: str,
+        secret: Optional[str] = None,
+        page_size: int = 200,
+        timeout: float = 10.0,
+    ) -> None:
+        self.dashboard_url = dashboard_url.rstrip('/')
+        self.snapshot_path = snapshot_path
+        self.secret = secret
+        self.page_size = page_size
+        self.timeout = timeout
+
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._deleted: Dict[str, float] = {}
+        self._server: Optional[ThreadingHTTPServer] = None
+
+        self.last_sync = 0.0
+        self.pushes = 0
+        self.rejected = 0
+
+        # Start from the last snapshot so a push before the first successful
+        # preload doesn't wipe it
+        self._load()
+
+    def _load(self) -> None:
+        try:
+            with open(self.snapshot_path) as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable config snapshot {self.snapshot_path}: {e}")
+            return
+        self._entries = dict(data.get('entries', {}))
+        self._deleted = dict(data.get('deleted', {}))
+
+    # ═══════════════════════════════════════════════════════════════════════
+    # BULK LOAD
+    # ═══════════════════════════════════════════════════════════════════════
+
+    def _fetch_active(self) -> Iterator[Dict[str, Any]]:
+        cursor = None
+        headers = {SECRET_HEADER: self.secret} if self.secret else {}
+        with httpx.Client(timeout=self.timeout, headers=headers) as client:
+            while True:
+                params = {'status': 'active', 'allUsers': 'true', 'limit': str(self.page_size)}
+                if cursor:
+                    params['cursor'] = cursor
+                response = client.get(f"{self.dashboard_url}/api/voice/agents", params=params)
+                response.raise_for_status()
+                page = response.json()
+                yield from page.get('agents', [])
+                cursor = page.get('nextCursor')
+                if not cursor:
+                    return
+
+    def preload(self) -> int:
+        """Replace the snapshot with every active agent; returns the count."""
+        started = time.time()
+        agents = [agent for agent in self._fetch_active() if agent.get('id')]
+
+        with self._lock:
+            entries = {agent['id']: self._entry(agent, started) for agent in agents}
+            # Pushes that landed while the list was loading are newer than it
+            for agent_id, entry in self._entries.items():
+                if entry['fetched_at'] > started:
+                    entries[agent_id] = entry
+            for agent_id, deleted_at in self._deleted.items():
+                if deleted_at > started:
+                    entries.pop(agent_id, None)
+            self._entries = entries
+            self.last_sync = time.time()
+            self._write()
+        return len(agents)
+
+    @staticmethod
+    def _entry(agent: Dict[str, Any], fetched_at: float) -> Dict[str, Any]:
+        # Same shape as config_cache.CacheEntry
+        return {'config': agent, 'etag': agent_etag(agent), 'fetched_at': fetched_at}
+
+    # ═══════════════════════════════════════════════════════════════════════
+    # PUSHED EVENTS
+    # ═══════════════════════════════════════════════════════════════════════
+
+    def apply(self, event: Mapping[str, Any]) -> bool:
+        """
+        Apply one pushed event; returns False if it was older than what we have.
+
+        Raises ValueError for events that aren't understood.
+        """
+        if not isinstance(event, Mapping):
+            raise ValueError("event must be a JSON object")
+        kind = event.get('type')
+        if kind == 'agent.updated':
+            agent = event.get('agent')
+            if not isinstance(agent, dict) or not agent.get('id'):
+                raise ValueError("agent.updated needs an agent with an id")
+            with self._lock:
+                current = self._entries.get(agent['id'])
+                # Pushes can arrive out of order; ISO timestamps compare as strings
+                if current and str(current['config'].get('updatedAt', '')) > str(agent.get('updatedAt', '')):
+                    return False
+                self._entries[agent['id']] = self._entry(agent, time.time())
+                self._deleted.pop(agent['id'], None)
+                self._write()
+        elif kind == 'agent.deleted':
+            agent_id = event.get('agentId')
+            if not agent_id:
+                raise ValueError("agent.deleted needs an agentId")
+            with self._lock:
+                self._entries.pop(agent_id, None)
+                self._deleted[agent_id] = time.time()
+                self._write()
+        else:
+            raise ValueError(f"unknown event type {kind!r}")
+
+        self.pushes += 1
+        return True
+
+    def verify(self, body: bytes, signature: Optional[str]) -> bool:
+        if not self.secret:
+            return True
+        return bool(signature) and hmac.compare_digest(sign(body, self.secret), signature)
+
+    def _write(self) -> None:
+        cutoff = time.time() - TOMBSTONE_TTL
+        self._deleted = {agent_id: at for agent_id, at in self._deleted.items() if at > cutoff}
+
+        directory = os.path.dirname(self.snapshot_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.snapshot_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({'entries': self._entries, 'deleted': self._deleted}, f)
+        os.replace(tmp_path, self.snapshot_path)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'agents': len(self._entries),
+            'pushes': self.pushes,
+            'rejected': self.rejected,
+            'last_sync': self.last_sync,
+        }
+
+    # ═══════════════════════════════════════════════════════════════════════
+    # BACKGROUND THREADS
+    # ═══════════════════════════════════════════════════════════════════════
+
+    def start(self, resync_interval: float = 300.0) -> None:
+        """Preload now and resync periodically, on a daemon thread."""
+        threading.Thread(
+            target=self._run, args=(resync_interval,), name='config-sync', daemon=True
+        ).start()
+
+    def _run(self, resync_interval: float) -> None:
+        backoff = 1.0
+        while not self._stop.is_set():
+            started = time.perf_counter()
+            try:
+                count = self.preload()
+            except Exception as e:
+                logger.warning(f"Agent config sync failed, retrying in {backoff:.0f}s: {e}")
+                wait = min(backoff, resync_interval)
+                backoff = min(backoff * 2, 60.0)
+            else:
+                logger.info(
+                    f"Synced {count} active agent configs in {time.perf_counter() - started:.3f}s"
+                )
+                wait = resync_interval
+                backoff = 1.0
+            self._stop.wait(wait)
+
+    def serve(self, port: int, host: str = '127.0.0.1') -> ThreadingHTTPServer:
+        """Accept pushed config events on a daemon thread."""
+        sync = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def _reply(self, status: int, payload: Optional[Dict[str, Any]] = None):
+                body = json.dumps(payload).encode() if payload is not None else b''
+                self.send_response(status)
+                if body:
+                    self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                if self.path.split('?')[0] != '/healthz':
+                    self.send_error(404)
+                    return
+                self._reply(200, sync.stats())
+
+            def do_POST(self):
+                if self.path.split('?')[0] != EVENTS_PATH:
+                    self.send_error(404)
+                    return
+                length = int(self.headers.get('Content-Length') or 0)
+                if length > MAX_EVENT_BYTES:
+                    self._reply(413, {'error': 'event too large'})
+                    return
+                body = self.rfile.read(length)
+                if not sync.verify(body, self.headers.get(SIGNATURE_HEADER)):
+                    sync.rejected += 1
+                    self._reply(401, {'error': 'bad signature'})
+                    return
+                try:
+                    applied = sync.apply(json.loads(body))
+                except ValueError as e:
+                    sync.rejected += 1
+                    self._reply(400, {'error': str(e)})
+                    return
+                except OSError as e:
+                    logger.warning(f"Failed to write pushed agent config: {e}")
+                    self._reply(500, {'error': 'snapshot write failed'})
+                    return
+                self._reply(200, {'applied': applied})
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=self._server.serve_forever, name='config-push', daemon=True).start()
+        logger.info(f"Accepting agent config pushes on http://{host}:{port}{EVENTS_PATH}")
+        return self._server
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+
+def start_config_sync() -> Optional[ConfigSync]:
+    """Start bulk sync (and the push listener if a port is set) when AGENT_CONFIG_SYNC is on."""
+    if not sync_enabled():
+        return None
+    if not os.getenv('AGENT_CONFIG_PUSH_SECRET'):
+        logger.warning("AGENT_CONFIG_PUSH_SECRET is not set; the dashboard will refuse the bulk load")
+
+    sync = ConfigSync(
+        dashboard_url=os.getenv('DASHBOARD_URL', 'http://localhost:3005'),
+        snapshot_path=snapshot_path(),
+        secret=os.getenv('AGENT_CONFIG_PUSH_SECRET') or None,
+        page_size=int(os.getenv('AGENT_CONFIG_PAGE_SIZE', '200')),
+    )
+    sync.start(resync_interval=float(os.getenv('AGENT_CONFIG_RESYNC_INTERVAL', '300')))
+
+    port = os.getenv('AGENT_CONFIG_PUSH_PORT')
+    if port:
+        sync.serve(int(port), host=os.getenv('AGENT_CONFIG_PUSH_HOST', '127.0.0.1'))
+    return sync
@@ -0,0 +1,272 @@
+"""
+Contact Resolution
+==================
+Phone -> Mautic contact id lookups with two cache layers:
+- Per session: every lookup for the caller after the first is free
+- Per worker: bounded LRU with TTL, so repeat callers often skip the search.
+  Each call runs in its own job process, so entries are also written to
+  CONTACT_CACHE_DIR (one small file per number) and a later call's process
+  finds them there
+- Phone numbers are normalized to E.164 so formatting differences still hit
+- Entries are replaced/invalidated when we create or edit a contact
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import random
+import re
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+import httpx
+
+logger = logging.getLogger("ploink-voice-agent.contacts")
+
+_NON_DIGITS = re.compile(r'\D')
+
+DEFAULT_CACHE_DIR = '.cache/contacts'
+
+# Share of writes that also trim the cache directory to max_size
+PRUNE_EVERY = 64
+
+
+class ContactLookupError(Exception):
+    """Mautic answered a contact search with something other than a result."""
+
+
+def normalize_phone(phone: str, default_country_code: Optional[str] = None) -> Optional[str]:
+    """
+    Normalize a phone number to E.164 (+15551234567).
+
+    National numbers get the default country code (DEFAULT_COUNTRY_CODE,
+    "1" if unset). Returns None if there are no usable digits.
+    """
+    if not phone:
+        return None
+
+    phone = phone.strip()
+    digits = _NON_DIGITS.sub('', phone)
+    if not digits:
+        return None
+
+    if phone.startswith('+'):
+        return f"+{digits}"
+    if digits.startswith('00'):
+        return f"+{digits[2:]}"
+
+    country_code = default_country_code or os.getenv('DEFAULT_COUNTRY_CODE', '1')
+    if digits.startswith(country_code) and len(digits) > 10:
+        return f"+{digits}"
+    return f"+{country_code}{digits.lstrip('0')}"
+
+
+class ContactCache:
+    """Worker-wide phone -> contact id LRU with TTL, shared through a directory."""
+
+    def __init__(self, max_size: int = 10000, ttl: float = 3600.0, directory: Optional[str] = None) -> None:
+        self.max_size = max_size
+        self.ttl = ttl
+        self.directory = directory
+        self._entries: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, phone: str) -> Optional[str]:
+        entry = self._entries.get(phone)
+        if entry is None and self.directory:
+            entry = self._read(phone)
+            if entry is not None:
+                self._remember(phone, entry)
+        if entry is None or entry[1] < time.time():
+            if entry is not None:
+                self.invalidate(phone)
+            self.misses += 1
+            return None
+        self._entries.move_to_end(phone)
+        self.hits += 1
+        return entry[0]
+
+    def put(self, phone: str, contact_id: str) -> None:
+        entry = (contact_id, time.time() + self.ttl)
+        self._remember(phone, entry)
+        if self.directory:
+            self._write(phone, entry)
+
+    def invalidate(self, phone: str) -> None:
+        self._entries.pop(phone, None)
+        if self.directory:
+            try:
+                os.remove(self._path(phone))
+            except OSError:
+                pass
+
+    def _remember(self, phone: str, entry: Tuple[str, float]) -> None:
+        self._entries[phone] = entry
+        self._entries.move_to_end(phone)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    # ═══════════════════════════════════════════════════════════════════════
+    # SHARED DIRECTORY
+    # ═══════════════════════════════════════════════════════════════════════
+
+    def _path(self, phone: str) -> str:
+        # Hashed, so the directory listing doesn't hold phone numbers
+        return os.path.join(self.directory, hashlib.sha1(phone.encode()).hexdigest()[:20])
+
+    def _read(self, phone: str) -> Optional[Tuple[str, float]]:
+        try:
+            with open(self._path(phone)) as f:
+                data = json.load(f)
+            return str(data['id']), float(data['expires'])
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+
+    def _write(self, phone: str, entry: Tuple[str, float]) -> None:
+        path = self._path(phone)
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump({'id': entry[0], 'expires': entry[1]}, f)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Failed to write contact cache entry: {e}")
+            return
+        if random.randrange(PRUNE_EVERY) == 0:
+            self._prune()
+
+    def _prune(self) -> None:
+        """Drop expired entries, then the least recently written beyond max_size."""
+        now = time.time()
+        entries = []
+        try:
+            with os.scandir(self.directory) as it:
+                for item in it:
+                    if item.name.endswith('.tmp'):
+                        continue
+                    try:
+                        entries.append((item.stat().st_mtime, item.path))
+                    except OSError:
+                        continue
+        except OSError:
+            return
+        entries.sort()
+        excess = len(entries) - self.max_size
+        for index, (mtime, path) in enumerate(entries):
+            if index >= excess and mtime + self.ttl >= now:
+                continue
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+_shared_cache: Optional[ContactCache] = None
+
+
+def get_contact_cache() -> ContactCache:
+    """Process-wide contact cache configured from the environment."""
+    global _shared_cache
+    if _shared_cache is None:
+        _shared_cache = ContactCache(
+            max_size=int(os.getenv('CONTACT_CACHE_SIZE', '10000')),
+            ttl=float(os.getenv('CONTACT_CACHE_TTL', '3600')),
+            directory=os.getenv('CONTACT_CACHE_DIR', DEFAULT_CACHE_DIR) or None,
+        )
+    return _shared_cache
+
+
+# A missing contact is remembered for the session only; another worker may
+# create it at any time, so it is never cached worker-wide.
+_NOT_FOUND = ''
+
+
+class ContactResolver:
+    """
+    Per-session resolver in front of the worker-wide cache.
+
+    `mautic_request` is the session's authenticated Mautic request function
+    (method, path, **kwargs) -> httpx.Response.
+    """
+
+    def __init__(
+        self,
+        mautic_request: Callable[..., Awaitable[httpx.Response]],
+        shared: Optional[ContactCache] = None,
+    ) -> None:
+        self._mautic_request = mautic_request
+        self._shared = shared or get_contact_cache()
+        self._session: Dict[str, str] = {}
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self.searches = 0
+
+    async def resolve(self, phone: str) -> Optional[str]:
+        """Return the Mautic contact id for phone, searching at most once."""
+        key = normalize_phone(phone)
+        if key is None:
+            return None
+
+        if key in self._session:
+            return self._session[key] or None
+
+        contact_id = self._shared.get(key)
+        if contact_id is not None:
+            self._session[key] = contact_id
+            return contact_id
+
+        pending = self._inflight.get(key)
+        if pending is not None:
+            return await asyncio.shield(pending)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            contact_id = await self._search(phone)
+            future.set_result(contact_id)
+        except BaseException as e:
+            future.set_exception(e)
+            future.exception()
+            raise
+        finally:
+            del self._inflight[key]
+
+        self._session[key] = contact_id or _NOT_FOUND
+        if contact_id:
+            self._shared.put(key, contact_id)
+        return contact_id
+
+    async def _search(self, phone: str) -> Optional[str]:
+        self.searches += 1
+        response = await self._mautic_request("GET", "/api/contacts", params={"search": phone})
+        # A 401/429/5xx is not "no such contact": reading it as one creates a duplicate
+        response.raise_for_status()
+        try:
+            existing = response.json().get("contacts") or {}
+        except (ValueError, AttributeError) as e:
+            raise ContactLookupError(f"unexpected contact search response: {e}")
+        if not existing:
+            return None
+        if not isinstance(existing, dict):
+            raise ContactLookupError("unexpected contact search response: contacts is not an object")
+        return str(next(iter(existing)))
+
+    def remember(self, phone: str, contact_id) -> None:
+        """Record the id of a contact we just created or edited."""
+        key = normalize_phone(phone)
+        if key is None or not contact_id:
+            return
+        self._session[key] = str(contact_id)
+        self._shared.put(key, str(contact_id))
+
+    def invalidate(self, phone: str) -> None:
+        """Forget a phone number, e.g. after an edit failed for its cached id."""
+        key = normalize_phone(phone)
+        if key is None:
+            return
+        self._session.pop(key, None)
+        self._shared.invalidate(key)
@@ -0,0 +1,516 @@
+"""
+Write-Behind CRM Queue
+======================
+Background writer for Mautic so tools never wait on the CRM:
+- Tools enqueue operations and return at once
+- A worker task coalesces them per contact and sends them in batches,
+  using Mautic's batch endpoints for contacts and notes
+- Within a batch, requests that don't depend on each other (creating new
+  contacts, editing known ones, notes on known contacts) run concurrently
+- Failed batches are retried with exponential backoff
+- Every operation is spooled to an append-only file first, so a crash
+  loses nothing: the next process on the host replays unacknowledged work
+- Queue depth and enqueue-to-write latency are exposed as metrics
+"""
+
+import asyncio
+import glob
+import json
+import logging
+import os
+import random
+import time
+import uuid
+from collections import deque
+from dataclasses import asdict, dataclass, field
+from typing import Any, Deque, Dict, List, Optional, Set
+
+import httpx
+
+import http_pool
+from contacts import ContactLookupError, ContactResolver, get_contact_cache, normalize_phone
+from fanout import FanOut
+
+logger = logging.getLogger("ploink-voice-agent.crm")
+
+# Operation kinds
+UPSERT_CONTACT = 'upsert_contact'
+ADD_NOTE = 'add_note'
+TAG_CONTACT = 'tag_contact'
+
+
+@dataclass
+class CrmOperation:
+    kind: str
+    phone: str
+    data: Dict[str, Any]
+    id: str = field(default_factory=lambda: uuid.uuid4().hex)
+    enqueued_at: float = field(default_factory=time.time)
+
+
+class RetryableError(Exception):
+    """A batch failed in a way worth retrying (network error, 429, 5xx)."""
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# SPOOL
+# ═══════════════════════════════════════════════════════════════════════════════
+
+class Spool:
+    """
+    Append-only JSONL journal of operations and acknowledgements.
+
+    Each process writes its own file (crm-<pid>.jsonl) so job processes on
+    the same host never interleave writes. Files left behind by processes
+    that are no longer running are claimed and replayed on startup.
+    """
+
+    def __init__(self, directory: str, fsync: bool = False, compact_bytes: int = 1024 * 1024) -> None:
+        self.directory = directory
+        self.fsync = fsync
+        self.compact_bytes = compact_bytes
+        os.makedirs(directory, exist_ok=True)
+        self.path = os.path.join(directory, f"crm-{os.getpid()}.jsonl")
+        self._file = open(self.path, 'a', encoding='utf-8')
+
+    def append(self, op: CrmOperation) -> None:
+        self._write({'t': 'op', **asdict(op)})
+
+    def ack(self, op_ids: List[str]) -> None:
+        if op_ids:
+            self._write({'t': 'ack', 'ids': op_ids})
+
+    def _write(self, record: Dict[str, Any]) -> None:
+        # The flush hands the line to the OS, which is enough to survive a
+        # process crash; fsync additionally survives a host crash.
+        self._file.write(json.dumps(record, separators=(',', ':')) + '\n')
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+
+    def compact(self, pending: List[CrmOperation]) -> None:
+        """Rewrite the spool with only pending operations once it grows large."""
+        if self._file.tell() < self.compact_bytes:
+            return
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            for op in pending:
+                f.write(json.dumps({'t': 'op', **asdict(op)}, separators=(',', ':')) + '\n')
+        self._file.close()
+        os.replace(tmp_path, self.path)
+        self._file = open(self.path, 'a', encoding='utf-8')
+
+    @staticmethod
+    def read_pending(path: str) -> List[CrmOperation]:
+        ops: Dict[str, CrmOperation] = {}
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # A torn final line from a crash mid-write
+                    continue
+                kind = record.pop('t', None)
+                if kind == 'op':
+                    try:
+                        op = CrmOperation(**record)
+                    except TypeError:
+                        continue
+                    ops[op.id] = op
+                elif kind == 'ack':
+                    for op_id in record.get('ids', []):
+                        ops.pop(op_id, None)
+        return list(ops.values())
+
+    def recover(self) -> List[CrmOperation]:
+        """Claim spool files of dead processes and return their pending ops."""
+        recovered: List[CrmOperation] = []
+        for path in sorted(glob.glob(os.path.join(self.directory, 'crm-*.jsonl'))):
+            if path == self.path:
+                continue
+            try:
+                pid = int(os.path.basename(path)[4:-6])
+            except ValueError:
+                continue
+            if _pid_alive(pid):
+                continue
+
+            # Rename first: only one process can win the claim
+            claimed = f"{self.path}.claim-{pid}"
+            try:
+                os.rename(path, claimed)
+            except OSError:
+                continue
+            ops = self.read_pending(claimed)
+            for op in ops:
+                self.append(op)
+            os.remove(claimed)
+            recovered.extend(ops)
+
+        if recovered:
+            logger.info(f"Recovered {len(recovered)} CRM operations from spool")
+        return recovered
+
+    def close(self) -> None:
+        self._file.close()
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# QUEUE
+# ═══════════════════════════════════════════════════════════════════════════════
+
+class CrmQueue:
+    """Process-wide write-behind queue for Mautic operations."""
+
+    def __init__(
+        self,
+        mautic_url: str,
+        mautic_token: str,
+        spool: Optional[Spool] = None,
+        batch_size: int = 50,
+        linger: float = 0.05,
+        max_attempts: int = 8,
+        timeout: float = 15.0,
+        concurrent: bool = True,
+    ) -> None:
+        self.mautic_url = mautic_url.rstrip('/')
+        self.mautic_token = mautic_token
+        self.spool = spool
+        self.batch_size = batch_size
+        self.linger = linger
+        self.max_attempts = max_attempts
+        self.timeout = timeout
+        self.concurrent = concurrent
+
+        self._pending: Deque[CrmOperation] = deque()
+        # Given up on in this process; kept in the spool for a later one
+        self._held: List[CrmOperation] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self._idle: Optional[asyncio.Event] = None
+        self._worker: Optional[asyncio.Task] = None
+
+        # Metrics
+        self.enqueued = 0
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        self.retries = 0
+        self.batches = 0
+        self._latencies: Deque[float] = deque(maxlen=1000)
+
+        if spool is not None:
+            self._pending.extend(spool.recover())
+
+    # ═══════════════════════════════════════════════════════════════════════
+    # PRODUCER SIDE
+    # ═══════════════════════════════════════════════════════════════════════
+
+    def enqueue(self, kind: str, phone: str, /, **data: Any) -> CrmOperation:
+        """Record an operation and return immediately.
+
+        kind and phone are positional-only, so contact data may carry its
+        own 'phone' field.
+        """
+        op = CrmOperation(kind=kind, phone=phone, data=data)
+        if self.spool is not None:
+            self.spool.append(op)
+        self._pending.append(op)
+        self.enqueued += 1
+        self.start()
+        return op
+
+    def start(self) -> None:
+        """Start the worker task (if needed) and wake it for pending work."""
+        if self._worker is None or self._worker.done():
+            self._wakeup = asyncio.Event()
+            self._idle = asyncio.Event()
+            self._worker = asyncio.create_task(self._run())
+        if self._pending:
+            self._idle.clear()
+            self._wakeup.set()
+
+    async def drain(self, timeout: float = 10.0) -> None:
+        """Wait until nothing is queued or in flight (e.g. on job shutdown)."""
+        if self._worker is None or self._idle.is_set():
+            return
+        try:
+            await asyncio.wait_for(self._idle.wait(), timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"CRM queue not drained; {len(self._pending)} operations left in spool")
+
+    def metrics(self) -> Dict[str, Any]:
+        latencies = sorted(self._latencies)
+        return {
+            'depth': len(self._pending),
+            'enqueued': self.enqueued,
+            'written': self.written,
+            'dropped': self.dropped,
+            'failed': self.failed,
+            'retries': self.retries,
+            'batches': self.batches,
+            'latency_p50': _percentile(latencies, 0.50),
+            'latency_p95': _percentile(latencies, 0.95),
+            'latency_max': latencies[-1] if latencies else None,
+        }
+
+    # ═══════════════════════════════════════════════════════════════════════
+    # WORKER
+    # ═══════════════════════════════════════════════════════════════════════
+
+    async def _run(self) -> None:
+        while True:
+            if not self._pending:
+                self._idle.set()
+                self._wakeup.clear()
+                await self._wakeup.wait()
+            self._idle.clear()
+
+            # Give concurrent tools a moment so their operations share a batch
+            if len(self._pending) < self.batch_size:
+                await asyncio.sleep(self.linger)
+
+            batch = [self._pending.popleft() for _ in range(min(self.batch_size, len(self._pending)))]
+            try:
+                await self._process_with_retry(batch)
+            except Exception:
+                # A bug or an unexpected payload must not stop the queue; the
+                # batch stays in the spool and is replayed by a later process
+                self.failed += len(batch)
+                self._held.extend(batch)
+                logger.exception(f"CRM batch of {len(batch)} operations failed")
+
+    async def _process_with_retry(self, batch: List[CrmOperation]) -> None:
+        state = _BatchState(batch)
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                await self._process(state)
+                break
+            except RetryableError as e:
+                if attempt == self.max_attempts:
+                    # Left unacknowledged: the spool replays it in a later process
+                    logger.error(f"Giving up on CRM batch after {attempt} attempts: {e}")
+                    self._held.extend(batch)
+                    return
+                self.retries += 1
+                delay = min(30.0, 0.5 * 2 ** (attempt - 1)) * random.uniform(0.8, 1.2)
+                logger.warning(f"CRM batch failed ({e}); retrying in {delay:.1f}s")
+                await asyncio.sleep(delay)
+
+        now = time.time()
+        for op in batch:
+            self._latencies.append(now - op.enqueued_at)
+        self.batches += 1
+        self.written += len(batch) - state.dropped
+        self.dropped += state.dropped
+        if self.spool is not None:
+            self.spool.ack([op.id for op in batch])
+            self.spool.compact(list(self._pending) + self._held)
+
+    async def _process(self, state: "_BatchState") -> None:
+        """
+        Write a batch as a dependency graph:
+
+            resolve ─┬─ create ── notes on new contacts
+                     ├─ edit (incl. tags of known contacts)
+                     └─ notes on known contacts
+
+        Steps finished by an earlier attempt are skipped on retry.
+        """
+        resolver = ContactResolver(self._request, get_contact_cache())
+        graph = FanOut(state.done, concurrent=self.concurrent)
+        graph.add('resolve', lambda: self._resolve_step(resolver, state))
+        graph.add('create', lambda: self._create_step(resolver, state), after=['resolve'])
+        graph.add('edit', lambda: self._edit_step(state), after=['resolve'])
+        graph.add('notes_known', lambda: self._notes_step(state, new=False), after=['resolve'])
+        graph.add('notes_new', lambda: self._notes_step(state, new=True), after=['create'])
+        await graph.run()
+
+    async def _resolve_step(self, resolver: ContactResolver, state: "_BatchState") -> None:
+        state.contact_ids = await self._resolve_all(resolver, state)
+
+    async def _create_step(self, resolver: ContactResolver, state: "_BatchState") -> None:
+        # One batch create for numbers Mautic doesn't know yet
+        new_contacts = []
+        for phone in state.phones:
+            contact = state.contacts.get(phone)
+            if contact is not None and not state.contact_ids.get(phone):
+                contact['tags'] = _merge_tags(contact.get('tags', []), state.tags.get(phone, []))
+                new_contacts.append(contact)
+        if not new_contacts:
+            return
+
+        created = await self._batch('POST', '/api/contacts/batch/new', new_contacts, 'contacts')
+        for contact, result in zip(new_contacts, created):
+            if result and result.get('id'):
+                resolver.remember(contact['phone'], result['id'])
+                state.created_ids[normalize_phone(contact['phone'])] = str(result['id'])
+
+    async def _edit_step(self, state: "_BatchState") -> None:
+        # One batch edit for known contacts; their tags ride along
+        edits, orphaned = [], 0
+        for phone in state.phones:
+            contact_id = state.contact_ids.get(phone)
+            contact = state.contacts.get(phone)
+            tags = state.tags.get(phone, [])
+            if contact_id and (contact is not None or tags):
+                edit = dict(contact or {})
+                edit['tags'] = _merge_tags(edit.get('tags', []), tags)
+                edit['id'] = contact_id
+                edits.append(edit)
+            elif not contact_id and contact is None and tags:
+                # Not in Mautic and nothing in the batch creates it
+                orphaned += state.tag_ops[phone]
+        if edits:
+            await self._batch('PATCH', '/api/contacts/batch/edit', edits, 'contacts')
+        if orphaned:
+            logger.warning(f"Dropped {orphaned} tag operations for numbers with no Mautic contact")
+        state.dropped += orphaned
+
+    async def _notes_step(self, state: "_BatchState", new: bool) -> None:
+        """Notes for contacts found by the search, or for those just created."""
+        ids = state.created_ids if new else state.contact_ids
+        notes, orphaned = [], 0
+        for phone, texts in state.notes.items():
+            if bool(state.contact_ids.get(phone)) == new:
+                continue  # handled by the other notes step
+            contact_id = ids.get(phone)
+            if not contact_id:
+                # Same as a direct write: no contact, nothing to attach to
+                orphaned += len(texts)
+                continue
+            notes.extend({'lead': contact_id, 'text': text, 'type': 'general'} for text in texts)
+        if notes:
+            await self._batch('POST', '/api/notes/batch/new', notes, 'notes')
+        state.dropped += orphaned
+
+    async def _resolve_all(self, resolver: ContactResolver, state: "_BatchState") -> Dict[str, Optional[str]]:
+        # Search with the number as the caller gave it; Mautic matches stored text
+        try:
+            results = await asyncio.gather(*(resolver.resolve(state.raw_phones[phone]) for phone in state.phones))
+        except (httpx.HTTPError, ContactLookupError) as e:
+            # Includes non-2xx answers (raise_for_status) and unreadable bodies
+            raise RetryableError(f"contact search failed: {e}")
+        return dict(zip(state.phones, results))
+
+    async def _request(self, method: str, path: str, **kwargs: Any) -> httpx.Response:
+        return await http_pool.request(
+            method,
+            f"{self.mautic_url}{path}",
+            headers={"Authorization": f"Bearer {self.mautic_token}"},
+            timeout=self.timeout,
+            **kwargs,
+        )
+
+    async def _batch(self, method: str, path: str, items: List[Dict[str, Any]], key: str) -> List[Optional[Dict]]:
+        """Send a Mautic batch request; returns the per-item results in order."""
+        try:
+            response = await self._request(method, path, json=items)
+        except httpx.HTTPError as e:
+            raise RetryableError(f"{method} {path}: {e}")
+
+        if response.status_code == 429 or response.status_code >= 500:
+            raise RetryableError(f"{method} {path}: HTTP {response.status_code}")
+        if response.status_code >= 400:
+            # Retrying a rejected payload won't help; log it and move on
+            logger.error(f"Mautic rejected {method} {path}: HTTP {response.status_code} {response.text[:200]}")
+            return [None] * len(items)
+
+        try:
+            results = response.json().get(key) or []
+        except (ValueError, AttributeError) as e:
+            raise RetryableError(f"{method} {path}: unreadable response: {e}")
+        if isinstance(results, dict):
+            results = list(results.values())
+        return list(results) + [None] * (len(items) - len(results))
+
+
+class _BatchState:
+    """A coalesced view of a batch, plus progress so retries resume."""
+
+    def __init__(self, batch: List[CrmOperation]) -> None:
+        self.phones: List[str] = []
+        self.raw_phones: Dict[str, str] = {}
+        self.contacts: Dict[str, Dict[str, Any]] = {}
+        self.tags: Dict[str, List[str]] = {}
+        self.notes: Dict[str, List[str]] = {}
+        self.tag_ops: Dict[str, int] = {}
+        self.contact_ids: Dict[str, Optional[str]] = {}   # found by the search
+        self.created_ids: Dict[str, Optional[str]] = {}   # created by this batch
+        self.done: Set[str] = set()                       # finished graph steps
+        self.dropped = 0
+
+        for op in batch:
+            phone = normalize_phone(op.phone)
+            if phone is None:
+                self.dropped += 1
+                continue
+            if phone not in self.raw_phones:
+                self.phones.append(phone)
+                self.raw_phones[phone] = op.phone
+
+            if op.kind == UPSERT_CONTACT:
+                # Later saves of the same contact win field by field
+                contact = self.contacts.setdefault(phone, {})
+                tags = _merge_tags(contact.get('tags', []), op.data.get('tags', []))
+                contact.update({k: v for k, v in op.data.items() if v is not None})
+                contact['tags'] = tags
+                contact['phone'] = op.phone
+            elif op.kind == TAG_CONTACT:
+                self.tags[phone] = _merge_tags(self.tags.get(phone, []), op.data.get('tags', []))
+                self.tag_ops[phone] = self.tag_ops.get(phone, 0) + 1
+            elif op.kind == ADD_NOTE:
+                texts = self.notes.setdefault(phone, [])
+                if op.data.get('text') and op.data['text'] not in texts:
+                    texts.append(op.data['text'])
+            else:
+                logger.warning(f"Unknown CRM operation {op.kind!r}")
+                self.dropped += 1
+
+
+def _merge_tags(existing: List[str], extra: List[str]) -> List[str]:
+    return list(dict.fromkeys([*existing, *extra]))
+
+
+def _percentile(sorted_values: List[float], q: float) -> Optional[float]:
+    if not sorted_values:
+        return None
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+_queue: Optional[CrmQueue] = None
+
+
+def get_crm_queue() -> Optional[CrmQueue]:
+    """Process-wide queue, or None when Mautic isn't configured."""
+    global _queue
+    if _queue is None:
+        mautic_url = os.getenv("MAUTIC_API_URL")
+        mautic_token = os.getenv("MAUTIC_ACCESS_TOKEN")
+        if not mautic_url or not mautic_token:
+            return None
+
+        spool_dir = os.getenv('CRM_SPOOL_DIR', '.cache/crm-spool')
+        spool = Spool(
+            spool_dir,
+            fsync=os.getenv('CRM_SPOOL_FSYNC', 'false').lower() in ('1', 'true', 'yes'),
+        ) if spool_dir else None
+
+        _queue = CrmQueue(
+            mautic_url,
+            mautic_token,
+            spool=spool,
+            batch_size=int(os.getenv('CRM_BATCH_SIZE', '50')),
+            max_attempts=int(os.getenv('CRM_MAX_ATTEMPTS', '8')),
+            concurrent=os.getenv('CRM_CONCURRENT_WRITES', 'true').lower() in ('1', 'true', 'yes'),
+        )
+    return _queue
@@ -0,0 +1,255 @@
+"""
+Date Parsing
+============
+Fast natural-language date/time parsing for the phrasings callers use:
+- Relative days ("today", "tomorrow", "day after tomorrow", "in 3 days",
+  "next week"), weekday names ("Tuesday", "this Friday", "next Monday"),
+  month/day ("December 24th", "24 Dec", "12/24") and clock times ("2pm",
+  "2:30 p.m.", "14:00", "noon", "3 o'clock", "at 3")
+- Results are memoized on (phrase, base date, timezone)
+- Anything the fast path can't decide falls back to a lazily imported
+  dateparser, with the same settings book_appointment always used
+"""
+
+import re
+from datetime import date, datetime, time, timedelta
+from functools import lru_cache
+from typing import Optional, Tuple
+from zoneinfo import ZoneInfo
+
+WEEKDAYS = {
+    'monday': 0, 'mon': 0,
+    'tuesday': 1, 'tue': 1, 'tues': 1,
+    'wednesday': 2, 'wed': 2,
+    'thursday': 3, 'thu': 3, 'thur': 3, 'thurs': 3,
+    'friday': 4, 'fri': 4,
+    'saturday': 5, 'sat': 5,
+    'sunday': 6, 'sun': 6,
+}
+
+MONTHS = {
+    'january': 1, 'jan': 1, 'february': 2, 'feb': 2, 'march': 3, 'mar': 3,
+    'april': 4, 'apr': 4, 'may': 5, 'june': 6, 'jun': 6, 'july': 7, 'jul': 7,
+    'august': 8, 'aug': 8, 'september': 9, 'sep': 9, 'sept': 9,
+    'october': 10, 'oct': 10, 'november': 11, 'nov': 11, 'december': 12, 'dec': 12,
+}
+
+NUMBER_WORDS = {
+    'one': 1, 'two': 2, 'three': 3, 'four': 4, 'five': 5, 'six': 6, 'seven': 7,
+    'a': 1, 'an': 1,
+}
+
+_MONTH = '|'.join(sorted(MONTHS, key=len, reverse=True))
+_WEEKDAY = '|'.join(sorted(WEEKDAYS, key=len, reverse=True))
+
+# Clock times, most specific first
+_TIME_MERIDIEM = re.compile(r'\b(\d{1,2})(?::(\d{2}))?\s*(am|pm)\b')
+_TIME_24H = re.compile(r'\b(\d{1,2}):(\d{2})\b')
+_TIME_OCLOCK = re.compile(r"\b(\d{1,2})\s*o'?clock\b")
+_TIME_AT_HOUR = re.compile(r'\bat\s+(\d{1,2})\b(?!\s*(?:st|nd|rd|th|/))')
+_TIME_WORDS = re.compile(r'\b(noon|midday|midnight)\b')
+
+# Date phrases; each must consume the whole remaining text
+_RELATIVE_DAY = re.compile(r'^(today|tonight|tomorrow|day after tomorrow|the day after tomorrow)$')
+_IN_N = re.compile(r'^in\s+(\d+|' + '|'.join(NUMBER_WORDS) + r')\s+(day|days|week|weeks)$')
+_NEXT_WEEK = re.compile(r'^next week$')
+_WEEKDAY_PHRASE = re.compile(r'^(?:(this|next|coming|this coming)\s+)?(' + _WEEKDAY + r')$')
+_MONTH_DAY = re.compile(r'^(' + _MONTH + r')\s+(\d{1,2})(?:st|nd|rd|th)?(?:\s+(\d{4}))?$')
+_DAY_MONTH = re.compile(r'^(?:the\s+)?(\d{1,2})(?:st|nd|rd|th)?\s+(?:of\s+)?(' + _MONTH + r')(?:\s+(\d{4}))?$')
+_NUMERIC = re.compile(r'^(\d{1,2})/(\d{1,2})(?:/(\d{2,4}))?$')
+
+# (date, time or None, whether a missing time means "the base time",
+#  whether the phrase was only a clock time)
+FastResult = Tuple[date, Optional[time], bool, bool]
+
+
+def _normalize(phrase: str) -> str:
+    text = phrase.lower().strip()
+    text = re.sub(r'\b([ap])\.\s*m\.?', r'\1m', text)
+    text = re.sub(r'[,.!?]', ' ', text)
+    text = re.sub(r'\b(on|at around|around|about)\b', ' ', text)
+    return re.sub(r'\s+', ' ', text).strip()
+
+
+def _bare_hour(hour: int) -> Optional[time]:
+    # "at 3" on a business call means the afternoon: 8-11 are mornings,
+    # 12-7 are noon through the evening
+    if 8 <= hour <= 11:
+        return time(hour)
+    if hour == 12:
+        return time(12)
+    if 1 <= hour <= 7:
+        return time(hour + 12)
+    return None
+
+
+def _extract_time(text: str) -> Tuple[Optional[time], str, bool]:
+    """Return (time, text without the time, whether a time was found but invalid)."""
+    match = _TIME_MERIDIEM.search(text)
+    if match:
+        hour, minute = int(match.group(1)), int(match.group(2) or 0)
+        if not 1 <= hour <= 12 or minute > 59:
+            return None, text, True
+        hour = hour % 12 + (12 if match.group(3) == 'pm' else 0)
+        return time(hour, minute), _remove(text, match), False
+
+    match = _TIME_24H.search(text)
+    if match:
+        hour, minute = int(match.group(1)), int(match.group(2))
+        if hour > 23 or minute > 59:
+            return None, text, True
+        return time(hour, minute), _remove(text, match), False
+
+    match = _TIME_WORDS.search(text)
+    if match:
+        value = time(0) if match.group(1) == 'midnight' else time(12)
+        return value, _remove(text, match), False
+
+    match = _TIME_OCLOCK.search(text) or _TIME_AT_HOUR.search(text)
+    if match:
+        value = _bare_hour(int(match.group(1)))
+        if value is None:
+            return None, text, True
+        return value, _remove(text, match), False
+
+    return None, text, False
+
+
+def _remove(text: str, match: 're.Match') -> str:
+    text = text[:match.start()] + ' ' + text[match.end():]
+    text = re.sub(r'\bat\b', ' ', text)
+    return re.sub(r'\s+', ' ', text).strip()
+
+
+def _upcoming_weekday(base: date, weekday: int) -> date:
+    # Same weekday as today means next week's, like dateparser with
+    # PREFER_DATES_FROM=future
+    days = (weekday - base.weekday()) % 7 or 7
+    return base + timedelta(days=days)
+
+
+def _future_month_day(base: date, month: int, day: int, year: Optional[str]) -> Optional[date]:
+    try:
+        if year:
+            return date(int(year) + (2000 if len(year) == 2 else 0), month, day)
+        candidate = date(base.year, month, day)
+        if candidate < base:
+            candidate = date(base.year + 1, month, day)
+        return candidate
+    except ValueError:
+        return None
+
+
+def _parse_date(text: str, base: date) -> Optional[Tuple[date, bool]]:
+    """Return (date, keeps base time) for a date phrase, or None."""
+    if not text:
+        return None
+
+    match = _RELATIVE_DAY.match(text)
+    if match:
+        word = match.group(1)
+        offset = 0 if word in ('today', 'tonight') else 1 if word == 'tomorrow' else 2
+        return base + timedelta(days=offset), True
+
+    if _NEXT_WEEK.match(text):
+        return base + timedelta(days=7), True
+
+    match = _IN_N.match(text)
+    if match:
+        count = match.group(1)
+        count = int(count) if count.isdigit() else NUMBER_WORDS[count]
+        days = count * (7 if match.group(2).startswith('week') else 1)
+        return base + timedelta(days=days), True
+
+    match = _WEEKDAY_PHRASE.match(text)
+    if match:
+        target = _upcoming_weekday(base, WEEKDAYS[match.group(2)])
+        if match.group(1) == 'next':
+            # "next Tuesday" skips the one still in the current Mon-Sun week
+            week_end = base + timedelta(days=6 - base.weekday())
+            if target <= week_end:
+                target += timedelta(days=7)
+        return target, False
+
+    match = _MONTH_DAY.match(text)
+    if match:
+        result = _future_month_day(base, MONTHS[match.group(1)], int(match.group(2)), match.group(3))
+        return (result, False) if result else None
+
+    match = _DAY_MONTH.match(text)
+    if match:
+        result = _future_month_day(base, MONTHS[match.group(2)], int(match.group(1)), match.group(3))
+        return (result, False) if result else None
+
+    match = _NUMERIC.match(text)
+    if match:
+        result = _future_month_day(base, int(match.group(1)), int(match.group(2)), match.group(3))
+        return (result, False) if result else None
+
+    return None
+
+
+@lru_cache(maxsize=4096)
+def _parse_fast(phrase: str, base_date: date, timezone: Optional[str]) -> Optional[FastResult]:
+    # timezone is part of the key only: base_date is already local to it
+    text = _normalize(phrase)
+    if not text:
+        return None
+
+    clock, rest, invalid = _extract_time(text)
+    if invalid:
+        return None
+
+    if not rest:
+        if clock is None:
+            return None
+        return base_date, clock, True, True
+
+    parsed = _parse_date(rest, base_date)
+    if parsed is None:
+        return None
+    return parsed[0], clock, parsed[1], False
+
+
+@lru_cache(maxsize=1024)
+def _parse_fallback(phrase: str, base: datetime) -> Optional[datetime]:
+    import dateparser
+
+    return dateparser.parse(phrase, settings={
+        'PREFER_DATES_FROM': 'future',
+        'RELATIVE_BASE': base,
+    })
+
+
+def parse_datetime(
+    phrase: str,
+    base: Optional[datetime] = None,
+    timezone: Optional[str] = None,
+) -> Optional[datetime]:
+    """
+    Parse a spoken date/time into a naive local datetime.
+
+    `base` defaults to now (in `timezone` if given). Returns None when
+    neither the fast path nor dateparser understands the phrase.
+    """
+    if base is None:
+        base = datetime.now(ZoneInfo(timezone)).replace(tzinfo=None) if timezone else datetime.now()
+
+    fast = _parse_fast(phrase, base.date(), timezone)
+    if fast is not None:
+        day, clock, keeps_base_time, time_only = fast
+        if clock is None:
+            clock = base.time().replace(microsecond=0) if keeps_base_time else time(0)
+        result = datetime.combine(day, clock)
+        # A bare clock time that already passed today means tomorrow
+        if time_only and result < base:
+            result += timedelta(days=1)
+        return result
+
+    # Minute resolution keeps the fallback memo useful within a call
+    return _parse_fallback(phrase, base.replace(second=0, microsecond=0))
+
+
+def cache_info():
+    """Memo statistics for the fast path and the dateparser fallback."""
+    return {'fast': _parse_fast.cache_info(), 'fallback': _parse_fallback.cache_info()}
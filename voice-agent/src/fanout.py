@@ -0,0 +1,81 @@
+"""
+Request Fan-Out
+===============
+Small dependency graphs of async steps, for work made of several HTTP calls:
+- Each step starts as soon as the steps it depends on are done, so
+  independent requests run concurrently and the total time is the critical
+  path rather than the sum
+- Shared failure policy: a failed step stops its dependents, but siblings
+  already in flight are allowed to finish (a sent write can't be unsent),
+  then the first failure is raised
+- Completed steps are recorded in a caller-owned set, so a retry of the
+  graph resumes where the last attempt stopped
+"""
+
+import asyncio
+import logging
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+logger = logging.getLogger("ploink-voice-agent.fanout")
+
+Step = Callable[[], Awaitable[None]]
+
+
+class FanOut:
+    """Run named steps in dependency order, concurrently where possible."""
+
+    def __init__(self, done: Optional[Set[str]] = None, concurrent: bool = True) -> None:
+        self.done: Set[str] = done if done is not None else set()
+        self.concurrent = concurrent
+        self._steps: Dict[str, Tuple[Step, Tuple[str, ...]]] = {}
+
+    def add(self, name: str, step: Step, after: Iterable[str] = ()) -> None:
+        after = tuple(after)
+        for dependency in after:
+            if dependency not in self._steps:
+                raise ValueError(f"step {name!r} depends on unknown step {dependency!r}")
+        self._steps[name] = (step, after)
+
+    def _ready(self, started: Set[str], failed: bool) -> List[str]:
+        if failed:
+            return []
+        return [
+            name for name, (_, after) in self._steps.items()
+            if name not in self.done and name not in started and all(dep in self.done for dep in after)
+        ]
+
+    async def run(self) -> None:
+        """Run every step not already done; raises the first step failure."""
+        running: Dict[asyncio.Task, str] = {}
+        started: Set[str] = set()
+        error: Optional[BaseException] = None
+
+        try:
+            while True:
+                ready = self._ready(started, error is not None)
+                if not self.concurrent:
+                    # One step at a time, still in dependency order
+                    ready = ready[:1] if not running else []
+                for name in ready:
+                    started.add(name)
+                    running[asyncio.ensure_future(self._steps[name][0]())] = name
+
+                if not running:
+                    break
+
+                finished, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                for task in finished:
+                    name = running.pop(task)
+                    if task.exception() is None:
+                        self.done.add(name)
+                    elif error is None:
+                        error = task.exception()
+                    else:
+                        logger.warning(f"Step {name} also failed: {task.exception()}")
+        finally:
+            # Only reached with tasks left when run() itself is cancelled
+            for task in running:
+                task.cancel()
+
+        if error is not None:
+            raise error
@@ -0,0 +1,216 @@
+"""
+Greeting Audio Cache
+====================
+Pre-synthesized welcome-message audio, keyed by (voice, rendered text):
+- Stored on disk as WAV files with LRU eviction by total size
+- A hit is played straight into the room, with no LLM or TTS round-trip
+- A miss is synthesized once: frames are played as they arrive and stored
+  when the synthesis completes, even if the caller interrupts the greeting
+- Greetings that use per-call variables are never cached
+"""
+
+import asyncio
+import hashlib
+import logging
+import os
+import wave
+from typing import AsyncIterator, Optional, Set
+
+from livekit import rtc
+from livekit.agents import AgentSession, tts as agents_tts
+
+from templates import PER_CALL_VARIABLES, compile_template
+
+logger = logging.getLogger("ploink-voice-agent.greeting")
+
+# 20ms frames, the same granularity the TTS plugins emit
+FRAME_MS = 20
+
+
+def uses_per_call_variables(template: str) -> bool:
+    """True if the (unrendered) template references a per-call variable."""
+    return not compile_template(template or '').variables.isdisjoint(PER_CALL_VARIABLES)
+
+
+class GreetingCache:
+    """Disk-backed LRU of greeting audio, bounded by total bytes."""
+
+    def __init__(self, directory: str, max_bytes: int) -> None:
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._pending: Set[str] = set()
+        self._background: Set[asyncio.Task] = set()
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, voice_id: str, text: str) -> str:
+        digest = hashlib.sha256(f"{voice_id}\0{text}".encode('utf-8')).hexdigest()
+        return os.path.join(self.directory, f"{digest}.wav")
+
+    # ═══════════════════════════════════════════════════════════════════════
+    # DISK STORAGE (runs in a thread)
+    # ═══════════════════════════════════════════════════════════════════════
+
+    def _read(self, path: str) -> Optional[rtc.AudioFrame]:
+        try:
+            with wave.open(path, 'rb') as f:
+                sample_rate = f.getframerate()
+                num_channels = f.getnchannels()
+                samples = f.getnframes()
+                data = f.readframes(samples)
+        except (FileNotFoundError, wave.Error, EOFError):
+            return None
+
+        # Touch so eviction sees this entry as recently used
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return rtc.AudioFrame(data, sample_rate, num_channels, samples)
+
+    def _write(self, path: str, frame: rtc.AudioFrame) -> None:
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with wave.open(tmp_path, 'wb') as f:
+            f.setnchannels(frame.num_channels)
+            f.setsampwidth(2)
+            f.setframerate(frame.sample_rate)
+            f.writeframes(bytes(frame.data))
+        os.replace(tmp_path, path)
+        self._evict()
+
+    def _evict(self) -> None:
+        entries = []
+        for name in os.listdir(self.directory):
+            if not name.endswith('.wav'):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+
+    # ═══════════════════════════════════════════════════════════════════════
+    # PLAYBACK
+    # ═══════════════════════════════════════════════════════════════════════
+
+    async def get(self, voice_id: str, text: str) -> Optional[rtc.AudioFrame]:
+        return await asyncio.to_thread(self._read, self._path(voice_id, text))
+
+    async def fill(
+        self,
+        tts: agents_tts.TTS,
+        voice_id: str,
+        text: str,
+        frames: Optional[asyncio.Queue] = None,
+    ) -> None:
+        """
+        Synthesize text with tts and store it, once per key at a time.
+
+        With `frames`, each frame is also put on the queue as it arrives,
+        then None when the synthesis ends, so it can be played meanwhile.
+        """
+        path = self._path(voice_id, text)
+        store = path not in self._pending
+        if not store and frames is None:
+            return
+        if store:
+            self._pending.add(path)
+        try:
+            collected = []
+            try:
+                stream = tts.synthesize(text)
+                try:
+                    async for event in stream:
+                        collected.append(event.frame)
+                        if frames is not None:
+                            frames.put_nowait(event.frame)
+                finally:
+                    await stream.aclose()
+            except Exception as e:
+                logger.warning(f"Failed to synthesize greeting audio: {e}")
+                return
+            finally:
+                if frames is not None:
+                    frames.put_nowait(None)
+
+            if store and collected:
+                await asyncio.to_thread(self._write, path, rtc.combine_audio_frames(collected))
+        except Exception as e:
+            logger.warning(f"Failed to cache greeting audio: {e}")
+        finally:
+            if store:
+                self._pending.discard(path)
+
+    async def say_greeting(
+        self,
+        session: AgentSession,
+        tts: agents_tts.TTS,
+        voice_id: str,
+        text: str,
+        cacheable: bool = True,
+    ):
+        """
+        Speak the greeting without an LLM round-trip.
+
+        Returns the SpeechHandle from session.say().
+        """
+        if not cacheable:
+            return session.say(text)
+
+        frame = await self.get(voice_id, text)
+        if frame is not None:
+            return session.say(text, audio=_split_frames(frame))
+
+        # Play the synthesis as it streams and keep it for the next call; it
+        # runs to the end (and is cached) even if the greeting is interrupted
+        frames: asyncio.Queue = asyncio.Queue()
+        task = asyncio.create_task(self.fill(tts, voice_id, text, frames))
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+        return session.say(text, audio=_queued_frames(frames))
+
+
+async def _queued_frames(frames: asyncio.Queue) -> AsyncIterator[rtc.AudioFrame]:
+    while True:
+        frame = await frames.get()
+        if frame is None:
+            return
+        yield frame
+
+
+async def _split_frames(frame: rtc.AudioFrame) -> AsyncIterator[rtc.AudioFrame]:
+    samples_per_frame = frame.sample_rate * FRAME_MS // 1000
+    bytes_per_frame = samples_per_frame * frame.num_channels * 2
+    data = bytes(frame.data)
+    for offset in range(0, len(data), bytes_per_frame):
+        chunk = data[offset:offset + bytes_per_frame]
+        yield rtc.AudioFrame(
+            chunk,
+            frame.sample_rate,
+            frame.num_channels,
+            len(chunk) // (2 * frame.num_channels),
+        )
+
+
+_cache: Optional[GreetingCache] = None
+
+
+def get_greeting_cache() -> GreetingCache:
+    """Process-wide greeting cache configured from the environment."""
+    global _cache
+    if _cache is None:
+        _cache = GreetingCache(
+            directory=os.getenv('GREETING_CACHE_DIR', '.cache/greetings'),
+            max_bytes=int(float(os.getenv('GREETING_CACHE_MAX_MB', '100')) * 1024 * 1024),
+        )
+    return _cache
@@ -0,0 +1,223 @@
+"""
+Shared HTTP Connection Pool
+===========================
+Worker-wide pooled HTTP clients for every outbound call the voice agent makes:
+- One keep-alive httpx.AsyncClient per origin (scheme://host:port)
+- Per-host connection limits and optional HTTP/2
+- Pool hit/miss counters (a miss is a request that had to open a new connection)
+- One TLS context (CA bundle load) per process, shared by every client
+- Clean shutdown hook for the job/worker
+"""
+
+import asyncio
+import functools
+import logging
+import os
+import ssl
+import weakref
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Dict, Optional, Tuple
+
+import httpx
+
+logger = logging.getLogger("ploink-voice-agent.http")
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# SETTINGS
+# ═══════════════════════════════════════════════════════════════════════════════
+
+@dataclass(frozen=True)
+class PoolSettings:
+    """Connection pool settings, read from the environment once per process."""
+
+    max_connections_per_host: int = 10
+    max_keepalive_per_host: int = 10
+    keepalive_expiry: float = 30.0
+    default_timeout: float = 30.0
+    http2: bool = False
+
+    @classmethod
+    def from_env(cls) -> "PoolSettings":
+        return cls(
+            max_connections_per_host=int(os.getenv('HTTP_POOL_MAX_CONNECTIONS', '10')),
+            max_keepalive_per_host=int(os.getenv('HTTP_POOL_MAX_KEEPALIVE', '10')),
+            keepalive_expiry=float(os.getenv('HTTP_POOL_KEEPALIVE_EXPIRY', '30')),
+            default_timeout=float(os.getenv('HTTP_POOL_TIMEOUT', '30')),
+            http2=os.getenv('HTTP_POOL_HTTP2', 'false').lower() in ('1', 'true', 'yes'),
+        )
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+@functools.lru_cache(maxsize=None)
+def ssl_context() -> ssl.SSLContext:
+    """
+    The process's TLS context. httpx loads the CA bundle for every new client
+    (tens of ms, on the event loop); build it once, ideally in prewarm.
+    """
+    return httpx.create_ssl_context()
+
+
+def _origin(url: str) -> Tuple[str, str, int]:
+    parsed = httpx.URL(url)
+    port = parsed.port or (443 if parsed.scheme == 'https' else 80)
+    return parsed.scheme, parsed.host, port
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# POOL
+# ═══════════════════════════════════════════════════════════════════════════════
+
+class HttpPool:
+    """
+    Keep-alive clients keyed by origin.
+
+    httpx limits apply to a whole client, so giving each origin its own client
+    turns them into per-host limits: one slow customer endpoint can't exhaust
+    the connections Mautic or the dashboard need.
+    """
+
+    def __init__(self, settings: Optional[PoolSettings] = None) -> None:
+        self.settings = settings or PoolSettings.from_env()
+        self.http2 = self.settings.http2 and _http2_available()
+        if self.settings.http2 and not self.http2:
+            logger.warning("HTTP_POOL_HTTP2 is set but the 'h2' package is missing; using HTTP/1.1")
+
+        self._clients: Dict[Tuple[str, str, int], httpx.AsyncClient] = {}
+        self._stats: Dict[str, Dict[str, int]] = {}
+        self._closed = False
+
+    def client_for(self, url: str) -> httpx.AsyncClient:
+        """Return the pooled client for the URL's origin, creating it on first use."""
+        if self._closed:
+            raise RuntimeError("HTTP pool has been shut down")
+
+        key = _origin(url)
+        client = self._clients.get(key)
+        if client is None:
+            client = httpx.AsyncClient(
+                verify=ssl_context(),
+                http2=self.http2,
+                timeout=self.settings.default_timeout,
+                limits=httpx.Limits(
+                    max_connections=self.settings.max_connections_per_host,
+                    max_keepalive_connections=self.settings.max_keepalive_per_host,
+                    keepalive_expiry=self.settings.keepalive_expiry,
+                ),
+            )
+            self._clients[key] = client
+        return client
+
+    def _host_stats(self, url: str) -> Dict[str, int]:
+        scheme, host, port = _origin(url)
+        return self._stats.setdefault(
+            f"{scheme}://{host}:{port}", {'requests': 0, 'hits': 0, 'misses': 0}
+        )
+
+    def _tracer(self, opened: list):
+        # httpcore reports every new TCP connection through the "trace"
+        # extension; a request that never sees one reused a pooled connection.
+        async def trace(event_name: str, info: Dict[str, Any]) -> None:
+            if event_name == 'connection.connect_tcp.started':
+                opened.append(True)
+
+        return trace
+
+    def _record(self, url: str, opened: list) -> None:
+        stats = self._host_stats(url)
+        stats['requests'] += 1
+        if opened:
+            stats['misses'] += 1
+        else:
+            stats['hits'] += 1
+
+    async def request(self, method: str, url: str, **kwargs: Any) -> httpx.Response:
+        """Send a request through the pooled client for the URL's origin."""
+        opened: list = []
+        extensions = dict(kwargs.pop('extensions', None) or {})
+        extensions['trace'] = self._tracer(opened)
+        try:
+            return await self.client_for(url).request(method, url, extensions=extensions, **kwargs)
+        finally:
+            self._record(url, opened)
+
+    @asynccontextmanager
+    async def stream(self, method: str, url: str, **kwargs: Any) -> AsyncIterator[httpx.Response]:
+        """Streaming variant of request(); the body is read by the caller."""
+        opened: list = []
+        extensions = dict(kwargs.pop('extensions', None) or {})
+        extensions['trace'] = self._tracer(opened)
+        try:
+            async with self.client_for(url).stream(method, url, extensions=extensions, **kwargs) as response:
+                yield response
+        finally:
+            self._record(url, opened)
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """Per-origin request/hit/miss counters."""
+        return {origin: dict(counts) for origin, counts in self._stats.items()}
+
+    async def aclose(self) -> None:
+        self._closed = True
+        clients, self._clients = list(self._clients.values()), {}
+        for client in clients:
+            try:
+                await client.aclose()
+            except Exception as e:
+                logger.debug(f"Error closing pooled client: {e}")
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# PROCESS-WIDE ACCESS
+# ═══════════════════════════════════════════════════════════════════════════════
+
+# httpx clients are bound to the event loop that created them, so there is one
+# pool per running loop (normally exactly one per worker process).
+_pools: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, HttpPool]" = weakref.WeakKeyDictionary()
+
+
+def get_pool() -> HttpPool:
+    """Return the pool for the running event loop."""
+    loop = asyncio.get_running_loop()
+    pool = _pools.get(loop)
+    if pool is None or pool._closed:
+        pool = HttpPool()
+        _pools[loop] = pool
+    return pool
+
+
+async def request(method: str, url: str, **kwargs: Any) -> httpx.Response:
+    """Shortcut for get_pool().request(...)."""
+    return await get_pool().request(method, url, **kwargs)
+
+
+def stream(method: str, url: str, **kwargs: Any):
+    """Shortcut for get_pool().stream(...); use as an async context manager."""
+    return get_pool().stream(method, url, **kwargs)
+
+
+def stats() -> Dict[str, Dict[str, int]]:
+    """Hit/miss counters merged across every live pool in the process."""
+    merged: Dict[str, Dict[str, int]] = {}
+    for pool in list(_pools.values()):
+        for origin, counts in pool.stats().items():
+            total = merged.setdefault(origin, {'requests': 0, 'hits': 0, 'misses': 0})
+            for name, value in counts.items():
+                total[name] += value
+    return merged
+
+
+async def shutdown() -> None:
+    """Close the pool for the running loop. Safe to call more than once."""
+    pool = _pools.pop(asyncio.get_running_loop(), None)
+    if pool is not None:
+        logger.info(f"Closing HTTP pool: {pool.stats()}")
+        await pool.aclose()
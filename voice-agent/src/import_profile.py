@@ -0,0 +1,170 @@
+"""
+Import Profiling
+================
+Cold-start import cost of the worker, measured in a fresh interpreter:
+- Runs `python -X importtime -c "import agent"` and parses its report
+- Reports per-module and per-package (top-level) self/cumulative time
+- Verifies the heavy optional integrations stay off the import path
+  (they are loaded on first use)
+- Fails (exit 1) when total import time exceeds a budget, for CI
+
+Usage:
+    python src/import_profile.py [--module agent] [--top 20] [--budget-ms 4000]
+
+Set STARTUP_PROFILE_IMPORTS=1 to print the same report to stderr when the
+worker starts (before the LiveKit CLI has configured logging). The budget
+check also runs as a test: pytest tests/test_import_profile.py
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+# Integrations that must only be imported when a call actually uses them
+LAZY_MODULES = (
+    'dateparser',
+    'twilio',
+    'googleapiclient',
+    'google.oauth2',
+    'livekit.plugins.elevenlabs',
+)
+
+DEFAULT_BUDGET_MS = 4000.0
+
+
+@dataclass
+class ImportRecord:
+    name: str
+    self_us: int
+    cumulative_us: int
+    depth: int
+
+
+@dataclass
+class ImportProfile:
+    module: str
+    records: List[ImportRecord] = field(default_factory=list)
+
+    @property
+    def total_ms(self) -> float:
+        top = [r for r in self.records if r.name == self.module]
+        return (top[-1].cumulative_us if top else sum(r.self_us for r in self.records)) / 1000
+
+    def slowest(self, top: int = 20) -> List[ImportRecord]:
+        return sorted(self.records, key=lambda r: r.self_us, reverse=True)[:top]
+
+    def by_package(self) -> Dict[str, float]:
+        """Self time in ms summed per top-level package."""
+        totals: Dict[str, float] = {}
+        for record in self.records:
+            package = record.name.split('.')[0]
+            totals[package] = totals.get(package, 0.0) + record.self_us / 1000
+        return dict(sorted(totals.items(), key=lambda item: item[1], reverse=True))
+
+    def eager_lazy_modules(self) -> List[str]:
+        """Modules from LAZY_MODULES that were imported at startup anyway."""
+        names = {r.name for r in self.records}
+        return [
+            lazy for lazy in LAZY_MODULES
+            if any(name == lazy or name.startswith(lazy + '.') for name in names)
+        ]
+
+
+def parse_importtime(output: str, module: str) -> ImportProfile:
+    """Parse the stderr of `python -X importtime`."""
+    profile = ImportProfile(module)
+    for line in output.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        parts = line[len('import time:'):].split('|')
+        if len(parts) != 3 or not parts[0].strip().isdigit():
+            continue  # header line
+        name = parts[2].rstrip()
+        profile.records.append(ImportRecord(
+            name=name.strip(),
+            self_us=int(parts[0]),
+            cumulative_us=int(parts[1]),
+            depth=(len(name) - len(name.lstrip())) // 2,
+        ))
+    return profile
+
+
+def profile_imports(module: str = 'agent', python: Optional[str] = None) -> ImportProfile:
+    """Import module in a fresh interpreter and return its import profile."""
+    src_dir = os.path.dirname(os.path.abspath(__file__))
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [src_dir, os.getenv('PYTHONPATH')])))
+    env.pop('STARTUP_PROFILE_IMPORTS', None)
+    result = subprocess.run(
+        [python or sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=src_dir,
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{result.stderr[-2000:]}")
+    return parse_importtime(result.stderr, module)
+
+
+def format_report(profile: ImportProfile, top: int = 20) -> str:
+    lines = [f"Import time for {profile.module}: {profile.total_ms:.0f} ms ({len(profile.records)} modules)"]
+
+    lines.append(f"\n{'package':<32}{'self (ms)':>12}")
+    for package, ms in list(profile.by_package().items())[:top]:
+        lines.append(f"{package:<32}{ms:>12.1f}")
+
+    lines.append(f"\n{'module':<56}{'self (ms)':>12}{'cumulative (ms)':>17}")
+    for record in profile.slowest(top):
+        lines.append(f"{record.name[:55]:<56}{record.self_us / 1000:>12.1f}{record.cumulative_us / 1000:>17.1f}")
+
+    eager = profile.eager_lazy_modules()
+    lines.append(f"\nLazy integrations imported at startup: {', '.join(eager) if eager else 'none'}")
+    return '\n'.join(lines)
+
+
+def log_startup_profile(module: str = 'agent') -> None:
+    """Print the import profile to stderr when STARTUP_PROFILE_IMPORTS is set."""
+    if os.getenv('STARTUP_PROFILE_IMPORTS', '').lower() not in ('1', 'true', 'yes'):
+        return
+    # Runs before cli.run_app sets up logging, so a log record would go nowhere
+    try:
+        print(format_report(profile_imports(module)), file=sys.stderr, flush=True)
+    except Exception as e:
+        print(f"Import profiling failed: {e}", file=sys.stderr, flush=True)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Profile cold-start import time")
+    parser.add_argument('--module', default='agent')
+    parser.add_argument('--top', type=int, default=20)
+    parser.add_argument(
+        '--budget-ms',
+        type=float,
+        default=float(os.getenv('STARTUP_IMPORT_BUDGET_MS', DEFAULT_BUDGET_MS)),
+        help="fail when total import time exceeds this (STARTUP_IMPORT_BUDGET_MS)",
+    )
+    parser.add_argument('--runs', type=int, default=3, help="best of N runs, to ignore disk cache noise")
+    args = parser.parse_args(argv)
+
+    profile = min((profile_imports(args.module) for _ in range(max(1, args.runs))), key=lambda p: p.total_ms)
+    print(format_report(profile, args.top))
+
+    failures = []
+    if profile.total_ms > args.budget_ms:
+        failures.append(f"import time {profile.total_ms:.0f} ms exceeds budget {args.budget_ms:.0f} ms")
+    eager = profile.eager_lazy_modules()
+    if eager:
+        failures.append(f"lazy integrations imported at startup: {', '.join(eager)}")
+
+    for failure in failures:
+        print(f"FAIL: {failure}", file=sys.stderr)
+    if not failures:
+        print(f"\nOK: within {args.budget_ms:.0f} ms budget")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,569 @@
+"""
+Lead Scoring
+============
+Rule-based lead qualification for qualify_lead, configurable per agent
+(config.qualification in the dashboard):
+- Budget, timeline and needs each score 0..1 from the terms they mention,
+  weighted into a 0-100 score and compared with the agent's threshold
+- Any dimension can list disqualifying terms ("no budget", "just looking")
+- Budgets are read as amounts ("$5,000", "5-10k", "a few thousand"), so a
+  minimum budget is a number, and "10000" never matches "0"; a number only
+  counts as an amount with a currency sign or word, a scale ("k", "grand"),
+  a budget word it belongs to ("budget of 100", "spend 100", "100 budget")
+  or nothing else in the answer, so "my 3 partners", "50/50" or "100
+  employees, budget tbd" is not a budget of 3, 50 or 100
+- Rules compile once per distinct config into a single Aho-Corasick
+  automaton over every term; terms match whole words only
+
+score_batch() re-scores large sets of past qualifications (e.g. from the
+call log) with numpy: each distinct answer is analyzed once and the scores
+are computed column-wise, so rule changes can be checked against history.
+
+Usage:
+    python src/lead_scoring.py [rules.json] [call_log_dir]    # re-score logged calls
+"""
+
+import json
+import logging
+import re
+import sys
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Mapping, NamedTuple, Optional, Sequence, Set, Tuple
+
+logger = logging.getLogger("ploink-voice-agent.lead_scoring")
+
+BUDGET = 'budget'
+TIMELINE = 'timeline'
+NEEDS = 'needs'
+
+DIMENSIONS = (BUDGET, TIMELINE, NEEDS)
+
+# Used for any key an agent's rules leave out; an agent with no rules is
+# qualified unless it says it has no budget (or under $500) or is only looking
+DEFAULT_RULES: Dict[str, Any] = {
+    'threshold': 40,
+    BUDGET: {
+        'weight': 50,
+        'unknown': 0.5,
+        'min': 500,
+        'target': 2500,
+        'terms': {'flexible': 0.8, 'whatever it takes': 1.0},
+        'disqualify': [
+            'none', 'no budget', 'zero', 'nothing', 'no money', "can't afford", 'cannot afford',
+            "don't have a budget", "don't have any money",
+        ],
+    },
+    TIMELINE: {
+        'weight': 30,
+        'unknown': 0.5,
+        'terms': {
+            'asap': 1.0, 'as soon as possible': 1.0, 'immediately': 1.0, 'urgent': 1.0, 'emergency': 1.0,
+            'today': 1.0, 'tomorrow': 1.0, 'this week': 1.0, 'next week': 0.9, 'this month': 0.8,
+            'next month': 0.6, 'few weeks': 0.7, 'couple of weeks': 0.7, 'few months': 0.4,
+            'this quarter': 0.5, 'this year': 0.3, 'next year': 0.1, 'no rush': 0.2,
+            'not sure': 0.3, 'someday': 0.0,
+        },
+        'disqualify': ['just looking', 'just browsing', 'just curious'],
+    },
+    NEEDS: {
+        'weight': 20,
+        'unknown': 0.5,
+        'terms': {},
+        'disqualify': [],
+    },
+}
+
+
+class InvalidRules(ValueError):
+    """Raised when an agent's qualification rules can't be compiled."""
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# MULTI-PATTERN MATCHER
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def normalize_text(text: str) -> str:
+    return ' '.join(str(text or '').lower().replace('’', "'").split())
+
+
+class PatternMatcher:
+    """Aho-Corasick automaton over normalized terms, matching whole words only."""
+
+    def __init__(self, patterns: Sequence[str]) -> None:
+        self.patterns = list(patterns)
+        self._goto: List[Dict[str, int]] = [{}]
+        self._out: List[List[int]] = [[]]
+
+        for index, pattern in enumerate(self.patterns):
+            state = 0
+            for char in pattern:
+                following = self._goto[state].get(char)
+                if following is None:
+                    following = len(self._goto)
+                    self._goto[state][char] = following
+                    self._goto.append({})
+                    self._out.append([])
+                state = following
+            self._out[state].append(index)
+
+        # Failure links, breadth first: the longest proper suffix that is
+        # also a prefix of some pattern
+        self._fail = [0] * len(self._goto)
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, following in self._goto[state].items():
+                queue.append(following)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[following] = self._goto[fallback].get(char, 0) if state else 0
+                self._out[following].extend(self._out[self._fail[following]])
+
+    def find(self, text: str) -> Set[int]:
+        """Indexes of the patterns occurring as whole words in normalized text."""
+        found: Set[int] = set()
+        goto, fail, out, patterns = self._goto, self._fail, self._out, self.patterns
+        state = 0
+        last = len(text) - 1
+        for position, char in enumerate(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            for index in out[state]:
+                start = position - len(patterns[index]) + 1
+                if (start == 0 or not text[start - 1].isalnum()) and (
+                        position == last or not text[position + 1].isalnum()):
+                    found.add(index)
+        return found
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# BUDGET AMOUNTS
+# ═══════════════════════════════════════════════════════════════════════════════
+
+_UNITS = {
+    'zero': 0, 'one': 1, 'two': 2, 'three': 3, 'four': 4, 'five': 5, 'six': 6, 'seven': 7,
+    'eight': 8, 'nine': 9, 'ten': 10, 'eleven': 11, 'twelve': 12, 'thirteen': 13,
+    'fourteen': 14, 'fifteen': 15, 'sixteen': 16, 'seventeen': 17, 'eighteen': 18,
+    'nineteen': 19, 'couple': 2, 'few': 3,
+}
+_TENS = {
+    'twenty': 20, 'thirty': 30, 'forty': 40, 'fifty': 50, 'sixty': 60, 'seventy': 70,
+    'eighty': 80, 'ninety': 90,
+}
+_SCALES = {'thousand': 1_000, 'grand': 1_000, 'million': 1_000_000}
+_SUFFIXES = {
+    'k': 1_000, 'thousand': 1_000, 'grand': 1_000, 'hundred': 100,
+    'm': 1_000_000, 'mm': 1_000_000, 'mil': 1_000_000, 'million': 1_000_000,
+}
+
+_CURRENCY_WORDS = {'dollar', 'dollars', 'bucks', 'usd', 'euro', 'euros', 'eur', 'pound', 'pounds', 'gbp'}
+_BUDGET_WORDS = {
+    'budget', 'budgeted', 'spend', 'spending', 'afford', 'pay', 'paying', 'invest', 'investing',
+    'allocate', 'allocated', 'price', 'cost', 'max', 'maximum', 'cap',
+}
+_RANGE_WORDS = ('-', '–', 'to', 'and', 'or')
+# May stand between a budget word and its number ("budget is about 100",
+# "100 is our budget"); any other word means the number is about something else
+_CUE_LINKS = {
+    'is', 'was', 'of', 'around', 'about', 'roughly', 'approximately', 'up', 'to', 'at', 'most',
+    'like', 'only', 'just', 'maybe', 'our', 'my', 'the', 'total',
+}
+_MAX_LINKS = 3
+
+_AMOUNT = re.compile(
+    r'(?<![\w./])([$€£]\s*)?(\d+(?:,\d{3})*(?:\.\d+)?|\.\d+)\s*'
+    r'(k|mm|m|mil|million|thousand|grand|hundred)?\b(?![/%])'
+)
+_RANGE = re.compile(r'\s*(?:-|–|to|and|or)\s*$')
+# What may surround a bare number that is the whole answer ("around 2500, I think")
+_FILLER = re.compile(
+    r'[\s,.!?;:\-–]+|\b(?:to|and|or|between|around|about|roughly|approximately|maybe|probably|i think)\b'
+)
+_NUMERIC = re.compile(r'[$€£]?\d')
+
+
+def _is_number(token: str) -> bool:
+    word = token.strip('.,!?;:')
+    return word in _UNITS or word in _TENS or bool(_NUMERIC.match(word))
+
+
+def _words_to_digits(text: str) -> str:
+    """
+    Spell out number words as digits ("a few thousand" -> "3 thousand").
+
+    Only numbers that read as amounts are converted: with a scale ("a few
+    thousand", "two hundred"), a currency word ("fifty dollars") or as one
+    end of a range ("five to ten thousand"); "no one" stays as it is.
+    """
+    tokens = text.split()
+    result: List[str] = []
+    total = current = 0
+    active = False
+    scaled = False
+    scale = ''  # last scale word, kept as a suffix when the number ends on it
+    words: List[str] = []  # the number as spoken, kept if it isn't an amount
+
+    def flush(position: int) -> None:
+        nonlocal total, current, active, scaled, scale
+        if active:
+            following = tokens[position].strip('.,!?;:') if position < len(tokens) else ''
+            after = tokens[position + 1] if position + 1 < len(tokens) else ''
+            in_range = (
+                (following in _RANGE_WORDS and _is_number(after))
+                or (len(result) > 1 and result[-1] in _RANGE_WORDS and _NUMERIC.match(result[-2]))
+            )
+            if scaled or following in _CURRENCY_WORDS or in_range:
+                # "5 to ten thousand" must still read as a range of thousands
+                result.append(f"{total // _SCALES[scale]} {scale}" if scale and not current else str(total + current))
+            else:
+                result.extend(words)
+        total = current = 0
+        active = scaled = False
+        scale = ''
+        words.clear()
+
+    previous = ''
+    for position, token in enumerate(tokens):
+        word = token.strip('.,!?;:')
+        following = tokens[position + 1].strip('.,!?;:') if position + 1 < len(tokens) else ''
+        if word in _UNITS or word in _TENS:
+            current += _UNITS.get(word) or _TENS.get(word, 0)
+            active = True
+        elif word == 'a' and not active and following in ('hundred', 'couple', 'few', *_SCALES):
+            active = True
+        elif word == 'hundred' and active:
+            current = max(current, 1) * 100
+            scaled = True
+        elif word in _SCALES and active:
+            total += max(current, 1) * _SCALES[word]
+            current = 0
+            scale = word
+            scaled = True
+        elif word == 'and' and previous in ('hundred', *_SCALES) and following in (*_UNITS, *_TENS):
+            # "five hundred and twenty"; "five and ten" is two numbers
+            pass
+        else:
+            flush(position)
+            result.append(token)
+            previous = ''
+            continue
+        words.append(token)
+        previous = word
+    flush(len(tokens))
+    return ' '.join(result)
+
+
+def _governed_by_budget_word(words: List[str]) -> bool:
+    """words run outward from the number; True if a budget word is reached through linking words only."""
+    for word in words[:_MAX_LINKS + 1]:
+        bare = word.strip('.,!?;:')
+        if bare in _BUDGET_WORDS:
+            return True
+        if bare not in _CUE_LINKS or bare != word:
+            # Another noun ("100 employees") or a clause boundary ("100, budget")
+            return False
+    return False
+
+
+def _budget_word_governs(text: str, start: int, end: int) -> bool:
+    return _governed_by_budget_word(text[:start].split()[::-1]) or _governed_by_budget_word(text[end:].split())
+
+
+def extract_amount(text: str) -> Optional[float]:
+    """
+    The lowest amount a budget answer names, or None if it names none.
+
+    Amounts with a currency sign or word or a scale win over bare numbers;
+    a bare number needs a budget word it belongs to, or to be the whole answer.
+    """
+    text = _words_to_digits(normalize_text(text))
+    matches = list(_AMOUNT.finditer(text))
+    if not matches:
+        return None
+    whole_answer = not _FILLER.sub('', _AMOUNT.sub('', text))
+
+    amounts = []
+    strong = []
+    for position, match in enumerate(matches):
+        suffix = match.group(3)
+        if suffix is None and position + 1 < len(matches):
+            # "5-10k", "between 5 and 10 thousand": the range shares the suffix
+            following = matches[position + 1]
+            if following.group(3) and _RANGE.match(text, match.end(), following.start()):
+                suffix = following.group(3)
+        next_word = text[match.end():].split()[:1]
+        strong.append(bool(
+            match.group(1) or suffix or (next_word and next_word[0].strip('.,!?;:') in _CURRENCY_WORDS)
+        ))
+        amount = float(match.group(2).replace(',', ''))
+        amounts.append(amount * _SUFFIXES.get(suffix, 1))
+
+    # "$5 to 10": both ends of a range are amounts if either is
+    for position in range(len(matches) - 1):
+        if _RANGE.match(text, matches[position].end(), matches[position + 1].start()):
+            strong[position] = strong[position + 1] = strong[position] or strong[position + 1]
+
+    if any(strong):
+        return min(amount for amount, is_strong in zip(amounts, strong) if is_strong)
+    bare = [
+        amount for amount, match in zip(amounts, matches)
+        if whole_answer or _budget_word_governs(text, match.start(), match.end())
+    ]
+    return min(bare) if bare else None
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# RULES
+# ═══════════════════════════════════════════════════════════════════════════════
+
+@dataclass(frozen=True)
+class DimensionRules:
+    weight: float
+    unknown: float
+    terms: Dict[str, float] = field(default_factory=dict)
+    disqualify: Tuple[str, ...] = ()
+
+
+def _number(value: Any, name: str) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        raise InvalidRules(f"{name} must be a number, got {value!r}")
+
+
+def _dimension_rules(name: str, raw: Any) -> DimensionRules:
+    defaults = DEFAULT_RULES[name]
+    if raw is None:
+        raw = {}
+    if not isinstance(raw, Mapping):
+        raise InvalidRules(f"{name} rules must be an object")
+    merged = {**defaults, **raw}
+
+    terms = merged.get('terms') or {}
+    if isinstance(terms, (list, tuple)):
+        terms = {term: 1.0 for term in terms}
+    if not isinstance(terms, Mapping):
+        raise InvalidRules(f"{name}.terms must be an object or a list")
+    values = {}
+    for term, value in terms.items():
+        value = _number(value, f"{name}.terms[{term!r}]")
+        if not 0.0 <= value <= 1.0:
+            raise InvalidRules(f"{name}.terms[{term!r}] must be between 0 and 1")
+        if normalize_text(term):
+            values[normalize_text(term)] = value
+
+    disqualify = merged.get('disqualify') or []
+    if not isinstance(disqualify, (list, tuple)):
+        raise InvalidRules(f"{name}.disqualify must be a list")
+
+    weight = _number(merged.get('weight', 0), f"{name}.weight")
+    unknown = _number(merged.get('unknown', 0.5), f"{name}.unknown")
+    if weight < 0 or not 0.0 <= unknown <= 1.0:
+        raise InvalidRules(f"{name}: weight must be >= 0 and unknown between 0 and 1")
+    return DimensionRules(
+        weight=weight,
+        unknown=unknown,
+        terms=values,
+        disqualify=tuple(normalize_text(term) for term in disqualify if normalize_text(term)),
+    )
+
+
+class LeadScore(NamedTuple):
+    score: float            # 0-100
+    qualified: bool
+    budget_amount: Optional[float]
+    reasons: Tuple[str, ...]
+
+
+class _Analysis(NamedTuple):
+    value: Optional[float]  # None = the answer matched no term
+    disqualified: bool
+    amount: Optional[float]
+    reason: Optional[str]
+
+
+class LeadScorer:
+    """One agent's qualification rules, compiled."""
+
+    def __init__(self, rules: Optional[Mapping[str, Any]] = None) -> None:
+        rules = rules or {}
+        if not isinstance(rules, Mapping):
+            raise InvalidRules("qualification rules must be an object")
+        self.threshold = _number(rules.get('threshold', DEFAULT_RULES['threshold']), 'threshold')
+        self.dimensions = {name: _dimension_rules(name, rules.get(name)) for name in DIMENSIONS}
+
+        budget = {**DEFAULT_RULES[BUDGET], **(rules.get(BUDGET) or {})}
+        self.min_budget = _number(budget.get('min') or 0, 'budget.min')
+        self.target_budget = _number(budget['target'], 'budget.target') if budget.get('target') else None
+
+        # One automaton for every term; each pattern maps back to the
+        # dimensions it counts for
+        self._entries: Dict[str, List[Tuple[str, Optional[float]]]] = {}
+        for name, dimension in self.dimensions.items():
+            for term, value in dimension.terms.items():
+                self._entries.setdefault(term, []).append((name, value))
+            for term in dimension.disqualify:
+                self._entries.setdefault(term, []).append((name, None))
+        self._patterns = list(self._entries)
+        self._matcher = PatternMatcher(self._patterns)
+        self._weight_total = sum(d.weight for d in self.dimensions.values())
+
+    def analyze(self, dimension: str, answer: str) -> _Analysis:
+        """Score one answer for one dimension."""
+        text = normalize_text(answer)
+        value: Optional[float] = None
+        disqualified_by: Optional[str] = None
+        for index in self._matcher.find(text):
+            term = self._patterns[index]
+            for name, term_value in self._entries[term]:
+                if name != dimension:
+                    continue
+                if term_value is None:
+                    disqualified_by = disqualified_by or term
+                elif value is None or term_value > value:
+                    value = term_value
+
+        amount = extract_amount(text) if dimension == BUDGET else None
+        if amount is not None:
+            # A stated amount outweighs the words around it ("nothing over 5k")
+            if amount < self.min_budget:
+                return _Analysis(0.0, True, amount, f"budget {amount:,.0f} below {self.min_budget:,.0f}")
+            value = min(1.0, amount / self.target_budget) if self.target_budget else 1.0
+            return _Analysis(value, False, amount, f"budget {amount:,.0f}")
+
+        if disqualified_by is not None:
+            return _Analysis(value, True, None, f"{dimension}: {disqualified_by!r}")
+        return _Analysis(value, False, None, None)
+
+    def _total(self, values: Mapping[str, Any]) -> Any:
+        # Same operation order in score() and score_batch(), so both agree exactly
+        total = 0.0
+        for name in DIMENSIONS:
+            total = total + self.dimensions[name].weight * values[name]
+        if not self._weight_total:
+            return total * 0.0 + 100.0
+        return total / self._weight_total * 100.0
+
+    def score(self, budget: str, timeline: str, needs: str) -> LeadScore:
+        analyses = {
+            BUDGET: self.analyze(BUDGET, budget),
+            TIMELINE: self.analyze(TIMELINE, timeline),
+            NEEDS: self.analyze(NEEDS, needs),
+        }
+        values = {
+            name: analysis.value if analysis.value is not None else self.dimensions[name].unknown
+            for name, analysis in analyses.items()
+        }
+        score = self._total(values)
+        disqualified = any(analysis.disqualified for analysis in analyses.values())
+        return LeadScore(
+            score=score,
+            qualified=not disqualified and score >= self.threshold,
+            budget_amount=analyses[BUDGET].amount,
+            reasons=tuple(analysis.reason for analysis in analyses.values() if analysis.reason),
+        )
+
+    # ═══════════════════════════════════════════════════════════════════════
+    # BATCH RE-SCORING
+    # ═══════════════════════════════════════════════════════════════════════
+
+    def score_batch(
+        self,
+        budgets: Sequence[str],
+        timelines: Sequence[str],
+        needs: Sequence[str],
+    ) -> 'BatchScores':
+        """Score many qualifications at once; agrees with score() record by record."""
+        # numpy comes with livekit-agents; only batch mode needs it
+        import numpy as np
+
+        columns = {BUDGET: budgets, TIMELINE: timelines, NEEDS: needs}
+        values = {}
+        disqualified = np.zeros(len(budgets), dtype=bool)
+        amounts = None
+        for name, answers in columns.items():
+            if len(answers) != len(budgets):
+                raise ValueError("budgets, timelines and needs must have the same length")
+            # Historical answers repeat a lot: analyze each distinct one once
+            codes: Dict[str, int] = {}
+            index = np.fromiter((codes.setdefault(answer, len(codes)) for answer in answers),
+                                dtype=np.int64, count=len(answers))
+            unknown = self.dimensions[name].unknown
+            analyses = [self.analyze(name, answer) for answer in codes]
+            unique_values = np.array([a.value if a.value is not None else unknown for a in analyses], dtype=float)
+            unique_disqualified = np.array([a.disqualified for a in analyses], dtype=bool)
+            values[name] = unique_values[index] if analyses else np.zeros(0)
+            if analyses:
+                disqualified |= unique_disqualified[index]
+            if name == BUDGET:
+                unique_amounts = np.array([np.nan if a.amount is None else a.amount for a in analyses], dtype=float)
+                amounts = unique_amounts[index] if analyses else np.zeros(0)
+
+        scores = self._total(values)
+        if np.ndim(scores) == 0:
+            scores = np.full(len(budgets), float(scores))
+        return BatchScores(scores, ~disqualified & (scores >= self.threshold), amounts)
+
+
+class BatchScores(NamedTuple):
+    scores: Any        # float array, 0-100
+    qualified: Any     # bool array
+    budget_amounts: Any  # float array, nan where no amount was named
+
+
+@lru_cache(maxsize=256)
+def _compile(canonical: str) -> LeadScorer:
+    return LeadScorer(json.loads(canonical))
+
+
+def compile_rules(rules: Optional[Mapping[str, Any]]) -> LeadScorer:
+    """Compile an agent's rules once per distinct config; raises InvalidRules."""
+    return _compile(json.dumps(rules or {}, sort_keys=True, separators=(',', ':')))
+
+
+def get_lead_scorer(rules: Optional[Mapping[str, Any]]) -> LeadScorer:
+    """The agent's scorer, falling back to the default rules if its own are invalid."""
+    try:
+        return compile_rules(rules)
+    except InvalidRules as e:
+        logger.warning(f"Invalid qualification rules, using defaults: {e}")
+        return compile_rules(None)
+
+
+def logged_qualifications(log_dir: str) -> Iterable[Dict[str, str]]:
+    """qualify_lead arguments from the call log (see call_log)."""
+    from call_log import iter_log
+
+    for event in iter_log(log_dir):
+        if event.get('type') == 'tool' and event.get('name') == 'qualify_lead':
+            arguments = event.get('arguments')
+            if isinstance(arguments, dict):
+                yield {
+                    'agent_id': event.get('agent_id'),
+                    **{name: str(arguments.get(name) or '') for name in DIMENSIONS},
+                }
+
+
+if __name__ == '__main__':
+    rules_path = sys.argv[1] if len(sys.argv) > 1 else None
+    log_dir = sys.argv[2] if len(sys.argv) > 2 else '.cache/call-logs'
+    new_rules = None
+    if rules_path:
+        with open(rules_path) as f:
+            new_rules = json.load(f)
+
+    records = list(logged_qualifications(log_dir))
+    started = time.perf_counter()
+    columns = [[record[name] for record in records] for name in DIMENSIONS]
+    before = compile_rules(None).score_batch(*columns)
+    after = compile_rules(new_rules).score_batch(*columns)
+    elapsed = time.perf_counter() - started
+    changed = int((before.qualified != after.qualified).sum())
+    print(f"{len(records)} logged qualifications re-scored in {elapsed:.2f}s")
+    print(f"qualified with default rules: {int(before.qualified.sum())}, "
+          f"with {rules_path or 'default rules'}: {int(after.qualified.sum())} ({changed} changed)")
@@ -0,0 +1,250 @@
+"""
+Event-Loop Watchdog
+===================
+Every session in a job process shares one event loop, so a sync call inside
+an async tool (an SDK's blocking request, a file read) stalls every call's
+audio. The watchdog makes that visible:
+- A heartbeat task measures event-loop lag continuously and records it to
+  the event_loop_lag histogram (exported with the span metrics)
+- A watcher thread notices when the heartbeat is overdue by more than
+  LOOP_BLOCK_THRESHOLD_MS and captures the loop thread's stack while it is
+  still blocked, so the report shows the offending call, not the aftermath
+- Each block is tied to the tool running in the blocked task and its call's
+  room/agent, logged with the stack and recorded as an event_loop_blocked span
+- Strict mode (LOOP_STRICT_LIMIT_MS, for tests and load tests) fails any
+  tool that blocked the loop longer than the limit with LoopBlocked
+
+Tools are tracked through watch_tool(), which @traced tools and dynamic HTTP
+tools enter for the duration of the call.
+"""
+
+import asyncio
+import contextvars
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Deque, Dict, Iterator, List, Optional
+
+from tracing import current_tags, get_tracer
+
+logger = logging.getLogger("ploink-voice-agent.watchdog")
+
+# Innermost frames kept from the blocked thread's stack
+STACK_DEPTH = 12
+
+
+class LoopBlocked(Exception):
+    """A tool blocked the event loop longer than the strict-mode limit."""
+
+
+@dataclass
+class ToolActivity:
+    tool: str
+    tags: Dict[str, str]
+    blocked: float = 0.0  # longest loop block seen while the tool ran (s)
+
+
+@dataclass
+class _Stall:
+    started: float
+    stack: List[str] = field(default_factory=list)
+    activity: Optional[ToolActivity] = None
+    task: str = ''
+
+
+# Tool running in each task; read by the watcher thread while the loop is blocked
+_running: Dict[asyncio.Task, ToolActivity] = {}
+
+
+@contextmanager
+def watch_tool(name: str) -> Iterator[ToolActivity]:
+    """Attribute loop blocks in the current task to a tool, enforcing strict mode."""
+    try:
+        task = asyncio.current_task()
+    except RuntimeError:
+        task = None
+    activity = ToolActivity(name, dict(current_tags()))
+    if task is None:
+        yield activity
+        return
+
+    previous = _running.get(task)
+    _running[task] = activity
+    try:
+        yield activity
+    finally:
+        if previous is None:
+            _running.pop(task, None)
+        else:
+            _running[task] = previous
+            previous.blocked = max(previous.blocked, activity.blocked)
+
+    watchdog = _watchdog
+    limit = watchdog.strict_limit if watchdog is not None else None
+    if limit is not None and activity.blocked >= limit:
+        raise LoopBlocked(
+            f"{name} blocked the event loop for {activity.blocked * 1000:.0f}ms "
+            f"(strict limit {limit * 1000:.0f}ms)"
+        )
+
+
+class LoopWatchdog:
+    """Lag sampling and blocking-call detection for one event loop."""
+
+    def __init__(
+        self,
+        interval: float = 0.1,
+        threshold: float = 0.1,
+        strict_limit: Optional[float] = None,
+    ) -> None:
+        self.interval = interval
+        self.threshold = threshold
+        self.strict_limit = strict_limit
+        self.blocks = 0
+        self._recent: Deque[float] = deque(maxlen=max(1, int(2.0 / interval)))
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+        self._beat = time.monotonic()
+        self._stall: Optional[_Stall] = None
+        self._lock = threading.Lock()
+
+    @property
+    def trigger(self) -> float:
+        """Overdue time after which the watcher captures a stall."""
+        if self.strict_limit is None:
+            return self.threshold
+        return min(self.threshold, self.strict_limit)
+
+    def start(self) -> None:
+        """Watch the running loop; a no-op if already watching it."""
+        loop = asyncio.get_running_loop()
+        if self._loop is loop and self._task is not None and not self._task.done():
+            return
+        self._loop = loop
+        self._loop_thread = threading.get_ident()
+        self._beat = time.monotonic()
+        # Created outside any call's context, so lag isn't tagged with one call
+        self._task = contextvars.Context().run(loop.create_task, self._heartbeat())
+
+        if self._thread is None or not self._thread.is_alive():
+            self._stopped.clear()
+            self._thread = threading.Thread(target=self._watch, name='loop-watchdog', daemon=True)
+            self._thread.start()
+
+    async def stop(self) -> None:
+        self._stopped.set()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def recent_lag(self) -> float:
+        """Mean lag over the last ~2s (sustained lag, not one-off blocks)."""
+        samples = list(self._recent)
+        return sum(samples) / len(samples) if samples else 0.0
+
+    # ═══════════════════════════════════════════════════════════════════════
+    # LOOP SIDE
+    # ═══════════════════════════════════════════════════════════════════════
+
+    async def _heartbeat(self) -> None:
+        tracer = get_tracer()
+        while True:
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            lag = max(0.0, now - self._beat - self.interval)
+            self._beat = now
+            self._recent.append(lag)
+            tracer.observe('event_loop_lag', 'loop', lag)
+
+            with self._lock:
+                stall, self._stall = self._stall, None
+            if stall is not None or lag >= self.threshold:
+                self._report(stall, lag)
+
+    def _report(self, stall: Optional[_Stall], lag: float) -> None:
+        activity = stall.activity if stall is not None else None
+        if activity is not None:
+            activity.blocked = max(activity.blocked, lag)
+        if lag < self.threshold:
+            # Only captured for a strict limit below the threshold
+            return
+
+        self.blocks += 1
+        tool = activity.tool if activity is not None else None
+        tags = activity.tags if activity is not None else {}
+        stack = stall.stack if stall is not None else []
+        get_tracer().record(
+            'event_loop_blocked', 'loop', lag,
+            tags=tags,
+            tool=tool,
+            task=stall.task if stall is not None else None,
+            stack=stack,
+        )
+        where = f" in tool {tool}" if tool else ''
+        room = f" (room {tags['room']})" if 'room' in tags else ''
+        logger.warning(
+            f"Event loop blocked for {lag * 1000:.0f}ms{where}{room}"
+            + (":\n" + ''.join(stack).rstrip() if stack else " (stack not captured)")
+        )
+
+    # ═══════════════════════════════════════════════════════════════════════
+    # WATCHER THREAD
+    # ═══════════════════════════════════════════════════════════════════════
+
+    def _watch(self) -> None:
+        while not self._stopped.wait(self.trigger / 4):
+            beat = self._beat
+            overdue = time.monotonic() - beat - self.interval
+            if overdue < self.trigger:
+                continue
+
+            with self._lock:
+                stall = self._stall
+                if stall is None or stall.started != beat:
+                    stall = self._stall = self._capture(beat)
+            if stall.activity is not None:
+                # Kept current during the block, so strict mode sees it even
+                # when the tool returns without yielding to the loop again
+                stall.activity.blocked = max(stall.activity.blocked, overdue)
+
+    def _capture(self, beat: float) -> _Stall:
+        stall = _Stall(started=beat)
+        frame = sys._current_frames().get(self._loop_thread)
+        if frame is not None:
+            # Import machinery frames say nothing about who blocked (a lazy import does)
+            frames = [line for line in traceback.format_stack(frame) if '<frozen importlib' not in line]
+            stall.stack = frames[-STACK_DEPTH:]
+        task = asyncio.current_task(self._loop)
+        if task is not None:
+            stall.task = task.get_name()
+            stall.activity = _running.get(task)
+        return stall
+
+
+_watchdog: Optional[LoopWatchdog] = None
+
+
+def get_loop_watchdog() -> Optional[LoopWatchdog]:
+    """Process-wide watchdog configured from the environment (None if disabled)."""
+    global _watchdog
+    if _watchdog is None and os.getenv('LOOP_WATCHDOG', 'true').lower() in ('1', 'true', 'yes'):
+        strict = os.getenv('LOOP_STRICT_LIMIT_MS')
+        _watchdog = LoopWatchdog(
+            interval=float(os.getenv('LOOP_LAG_INTERVAL_MS', '100')) / 1000,
+            threshold=float(os.getenv('LOOP_BLOCK_THRESHOLD_MS', '100')) / 1000,
+            strict_limit=float(strict) / 1000 if strict else None,
+        )
+    return _watchdog
@@ -0,0 +1,127 @@
+"""
+Prompt Assembly
+===============
+Builds an agent's instructions and tool list so that every call of the same
+agent sends the LLM the same prefix, which provider-side prompt caching
+(OpenAI caches on exact prefixes) can reuse:
+- Stable content first: the agent's prompt rendered with its own variables
+  (company, agent name, custom variables), then tools in canonical order
+- Per-call values (current_date, current_time, ...) last, in a separate
+  call details message after the instructions; {{placeholders}} for them in
+  the prompt are left in place and point at that message
+- The stable part is assembled once per agent config (content hash, LRU),
+  so a call only renders the details
+
+The details can't simply be appended to the instructions: the provider
+renders tool definitions right after them, so a changing tail there would
+still cost the tools their cache.
+"""
+
+from collections import OrderedDict
+from typing import Any, List, Mapping, NamedTuple, Optional, Tuple
+
+from templates import PER_CALL_VARIABLES, compile_template
+from tool_registry import config_hash, get_tool_registry
+
+DEFAULT_PROMPT = """You are a helpful assistant for Ploink CRM.
+You can:
+- Book appointments on the calendar
+- Save contact information to the CRM
+- Send text message confirmations
+- Qualify leads by asking about budget, timeline, and needs
+
+Be friendly, professional, and concise.
+Always confirm important details before taking actions."""
+
+
+class PromptPrefix(NamedTuple):
+    """The part of an agent's prompt that is the same on every call."""
+
+    key: str                   # agent config hash
+    text: str                  # the instructions
+    tools: Tuple[Any, ...]     # dynamic tools, in canonical (name) order
+    placeholders: bool         # text refers to per-call {{variables}}
+
+
+class AssembledPrompt(NamedTuple):
+    instructions: str
+    tools: List[Any]
+    details: str               # call details message ('' if none)
+
+
+class PromptAssembler:
+    """Process-wide LRU of assembled prompt prefixes keyed by config hash."""
+
+    def __init__(self, max_size: int = 256) -> None:
+        self.max_size = max_size
+        self._prefixes: "OrderedDict[str, PromptPrefix]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def prefix(
+        self,
+        system_prompt: Optional[str],
+        variables: Mapping[str, Any],
+        http_tools: List[Mapping[str, Any]],
+        reserved: Optional[set] = None,
+    ) -> PromptPrefix:
+        """The stable prefix for an agent config, assembled on first use."""
+        prompt = system_prompt or DEFAULT_PROMPT
+        stable = {name: value for name, value in variables.items() if name not in PER_CALL_VARIABLES}
+        key = config_hash({
+            'prompt': prompt,
+            'variables': stable,
+            'tools': http_tools,
+            'reserved': sorted(reserved or ()),
+        })
+
+        cached = self._prefixes.get(key)
+        if cached is not None:
+            self._prefixes.move_to_end(key)
+            self.hits += 1
+            return cached
+
+        self.misses += 1
+        template = compile_template(prompt)
+        compiled_tools = get_tool_registry().compile_all(http_tools, reserved=reserved)
+        cached = PromptPrefix(
+            key=key,
+            # Per-call placeholders aren't in `stable`, so they render as written
+            text=template.render(stable).rstrip(),
+            # Dashboard order is incidental; the schema list shouldn't depend on it
+            tools=tuple(compiled.tool for compiled in sorted(compiled_tools, key=lambda c: c.name)),
+            placeholders=not template.variables.isdisjoint(PER_CALL_VARIABLES),
+        )
+        self._prefixes[key] = cached
+        if len(self._prefixes) > self.max_size:
+            self._prefixes.popitem(last=False)
+        return cached
+
+    def assemble(
+        self,
+        system_prompt: Optional[str],
+        variables: Mapping[str, Any],
+        http_tools: List[Mapping[str, Any]],
+        reserved: Optional[set] = None,
+    ) -> AssembledPrompt:
+        """Instructions, dynamic tools and call details for one call."""
+        prefix = self.prefix(system_prompt, variables, http_tools, reserved)
+        return AssembledPrompt(prefix.text, list(prefix.tools), call_details(prefix, variables))
+
+
+def call_details(prefix: PromptPrefix, variables: Mapping[str, Any]) -> str:
+    """The call details message that follows the stable prefix."""
+    lines = [f"- {name}: {variables[name]}" for name in PER_CALL_VARIABLES if variables.get(name)]
+    if not lines:
+        return ''
+    heading = "Details for this call"
+    if prefix.placeholders:
+        heading += " ({{placeholders}} above refer to these)"
+    return f"{heading}:\n" + '\n'.join(lines)
+
+
+_assembler = PromptAssembler()
+
+
+def get_prompt_assembler() -> PromptAssembler:
+    return _assembler
@@ -0,0 +1,424 @@
+"""
+Response Extraction
+===================
+Pulls the few fields a tool needs out of a JSON response while it streams in:
+- Extraction expressions are a JSONPath subset ($.order.status, items[0].sku,
+  items[*].name, $['odd key']), compiled once per tool
+- An incremental parser tokenizes each chunk as it arrives; only values at a
+  requested path are built, everything else is skipped without allocating
+- Reading stops at a byte cap, or as soon as every requested field is found
+- Non-JSON bodies fall back to the first few hundred characters of text
+"""
+
+import codecs
+import json
+import re
+from functools import lru_cache
+from typing import Any, AsyncIterable, Dict, List, Optional, Tuple, Union
+
+# Matches any array index
+WILDCARD = '*'
+
+Segment = Union[str, int]
+Path = Tuple[Segment, ...]
+
+# One path step: .key, ['key'], ["key"], [0], [*] or .*
+_STEP = re.compile(
+    r'''\.(?P<dot>[A-Za-z_$][\w$-]*|\*)'''
+    r'''|\[\s*(?:'(?P<single>(?:[^'\\]|\\.)*)'|"(?P<double>(?:[^"\\]|\\.)*)"|(?P<index>-?\d+)|(?P<star>\*))\s*\]'''
+)
+
+# One JSON token, with any leading whitespace
+_TOKEN = re.compile(
+    r'''[ \t\r\n]*(?:'''
+    r'''(?P<str>"[^"\\]*(?:\\.[^"\\]*)*")'''
+    r'''|(?P<num>-?(?:0|[1-9][0-9]*)(?:\.[0-9]+)?(?:[eE][+-]?[0-9]+)?)'''
+    r'''|(?P<lit>true|false|null)'''
+    r'''|(?P<punct>[{}\[\]:,])'''
+    r''')'''
+)
+_WHITESPACE = re.compile(r'[ \t\r\n]*')
+_NUMBER_TAIL = re.compile(r'[0-9.eE+-]*')
+# Inside a skipped value: everything up to the next bracket outside a string
+_SKIP = re.compile(r'[^"{}\[\]]*(?:"[^"\\]*(?:\\.[^"\\]*)*"[^"{}\[\]]*)*')
+_LITERALS = {'true': True, 'false': False, 'null': None}
+
+# How much of a non-JSON body is handed back
+TEXT_PREVIEW_CHARS = 200
+
+
+class InvalidExpression(ValueError):
+    """Raised when an extraction expression can't be compiled."""
+
+
+class JsonStreamError(ValueError):
+    """Raised when a streamed body isn't JSON."""
+
+
+def _parse_path(expression: str) -> Path:
+    text = expression.strip()
+    if text.startswith('$'):
+        text = text[1:]
+    if text and text[0] not in '.[':
+        text = '.' + text
+    if not text:
+        raise InvalidExpression(f"{expression!r} selects the whole response")
+
+    segments: List[Segment] = []
+    position = 0
+    while position < len(text):
+        match = _STEP.match(text, position)
+        if match is None:
+            raise InvalidExpression(f"can't parse {expression!r} at {text[position:]!r}")
+        if match.group('dot') is not None:
+            step = match.group('dot')
+            segments.append(WILDCARD if step == '*' else step)
+        elif match.group('index') is not None:
+            index = int(match.group('index'))
+            if index < 0:
+                raise InvalidExpression(f"negative index in {expression!r} can't be streamed")
+            segments.append(index)
+        elif match.group('star') is not None:
+            segments.append(WILDCARD)
+        else:
+            quoted = match.group('single') if match.group('single') is not None else match.group('double')
+            segments.append(re.sub(r'\\(.)', r'\1', quoted))
+        position = match.end()
+    return tuple(segments)
+
+
+def _split(source: str) -> List[str]:
+    # Commas separate expressions unless they sit inside brackets
+    parts, depth, current = [], 0, []
+    for char in source:
+        if char == '[':
+            depth += 1
+        elif char == ']':
+            depth -= 1
+        if char in ',\n' and depth == 0:
+            parts.append(''.join(current))
+            current = []
+        else:
+            current.append(char)
+    parts.append(''.join(current))
+    return [part.strip() for part in parts if part.strip()]
+
+
+def _segment_matches(segment: Segment, key: Segment) -> bool:
+    if segment == WILDCARD:
+        return True
+    return segment == key and type(segment) is type(key)
+
+
+def _select(value: Any, segments: Path) -> List[Any]:
+    """Evaluate a path against an already-built value (nested targets)."""
+    if not segments:
+        return [value]
+    head, rest = segments[0], segments[1:]
+    if head == WILDCARD:
+        children = value.values() if isinstance(value, dict) else value if isinstance(value, list) else []
+        return [found for child in children for found in _select(child, rest)]
+    if isinstance(head, int):
+        if isinstance(value, list) and head < len(value):
+            return _select(value[head], rest)
+        return []
+    if isinstance(value, dict) and head in value:
+        return _select(value[head], rest)
+    return []
+
+
+class CompiledExtraction:
+    """
+    A set of paths to pull from a response.
+
+    Expressions with a wildcard can match many values and are reported as
+    lists; the rest are reported as a single value.
+    """
+
+    __slots__ = ('source', 'expressions', 'paths', 'multi', 'complete_early')
+
+    def __init__(self, source: str) -> None:
+        expressions = _split(source)
+        if not expressions:
+            raise InvalidExpression("empty extraction expression")
+
+        self.source = source
+        self.expressions: Tuple[str, ...] = tuple(expressions)
+        self.paths: Tuple[Path, ...] = tuple(_parse_path(expression) for expression in expressions)
+        self.multi: Tuple[bool, ...] = tuple(WILDCARD in path for path in self.paths)
+        # Without wildcards each path matches at most once, so reading can
+        # stop as soon as all of them have been seen
+        self.complete_early = not any(self.multi)
+
+    def matching(self, path: Path) -> List[int]:
+        return [
+            index for index, target in enumerate(self.paths)
+            if len(target) == len(path) and all(map(_segment_matches, target, path))
+        ]
+
+    def is_live(self, path: Path) -> bool:
+        """Whether some target lies below this path."""
+        depth = len(path)
+        return any(
+            len(target) > depth and all(map(_segment_matches, target[:depth], path))
+            for target in self.paths
+        )
+
+    def extractor(self) -> 'StreamingExtractor':
+        return StreamingExtractor(self)
+
+
+@lru_cache(maxsize=1024)
+def compile_extraction(source: str) -> CompiledExtraction:
+    """Compile an extraction expression once; raises InvalidExpression."""
+    return CompiledExtraction(source)
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# INCREMENTAL PARSER
+# ═══════════════════════════════════════════════════════════════════════════════
+
+class _Frame:
+    """An object or array on the path to a requested field."""
+
+    __slots__ = ('is_object', 'key', 'expect_key')
+
+    def __init__(self, is_object: bool) -> None:
+        self.is_object = is_object
+        self.key: Segment = 0
+        self.expect_key = is_object
+
+
+def _decode_string(token: str) -> str:
+    return token[1:-1] if '\\' not in token else json.loads(token)
+
+
+def _scalar(kind: str, token: str) -> Any:
+    if kind == 'str':
+        return _decode_string(token)
+    if kind == 'lit':
+        return _LITERALS[token]
+    return json.loads(token)
+
+
+class StreamingExtractor:
+    """
+    Feeds response chunks through a tokenizer and keeps only requested values.
+
+    The decoded text buffer only holds an unfinished token between chunks, so
+    memory stays flat whatever the size of the skipped parts of the body.
+    """
+
+    def __init__(self, extraction: CompiledExtraction) -> None:
+        self.extraction = extraction
+        self.values: List[List[Any]] = [[] for _ in extraction.paths]
+        self.finished = False
+        self.bytes_read = 0
+        self.head = ''
+
+        self._decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+        self._buffer = ''
+        self._stack: List[_Frame] = []
+        self._skip_depth = 0
+        self._capture: Optional[List[list]] = None  # [container, pending key, expect key]
+        self._capture_targets: List[Tuple[int, Path]] = []
+
+    @property
+    def satisfied(self) -> bool:
+        """Whether reading further can't change the result."""
+        return self.finished or (self.extraction.complete_early and all(self.values))
+
+    def feed(self, chunk: bytes, final: bool = False) -> None:
+        self.bytes_read += len(chunk)
+        text = self._decoder.decode(chunk, final)
+        if len(self.head) < TEXT_PREVIEW_CHARS:
+            self.head += text[:TEXT_PREVIEW_CHARS - len(self.head)]
+        self._buffer += text
+        self._consume(final)
+
+    def close(self) -> None:
+        self.feed(b'', final=True)
+
+    def _consume(self, final: bool) -> None:
+        buffer = self._buffer
+        size = len(buffer)
+        position = 0
+        match_token = _TOKEN.match
+
+        while position < size and not self.finished:
+            if self._skip_depth:
+                # Skipped values are scanned bracket to bracket, not token by token
+                position = _SKIP.match(buffer, position).end()
+                if position == size or buffer[position] == '"':
+                    break  # an unfinished string; wait for more data
+                position += 1
+                self._token('punct', buffer[position - 1])
+                continue
+
+            match = match_token(buffer, position)
+            if match is None:
+                if _WHITESPACE.match(buffer, position).end() == size:
+                    position = size
+                    break
+                if final or self._impossible(buffer, position):
+                    raise JsonStreamError(f"unexpected data at {buffer[position:position + 20]!r}")
+                break  # an unfinished string or literal; wait for more data
+            kind = match.lastgroup
+            if kind == 'num' and not final and _NUMBER_TAIL.match(buffer, match.end()).end() == size:
+                break  # the number may continue in the next chunk
+            position = match.end()
+            self._token(kind, match.group(kind))
+
+        self._buffer = buffer[position:]
+
+    @staticmethod
+    def _impossible(buffer: str, position: int) -> bool:
+        # Anything that can't start a token is a syntax error right away
+        rest = buffer[_WHITESPACE.match(buffer, position).end():]
+        if not rest or rest[0] == '"' or rest[0] == '-':
+            return False
+        return not any(literal.startswith(rest[:len(literal)]) for literal in _LITERALS)
+
+    def _path(self) -> Path:
+        return tuple(frame.key for frame in self._stack)
+
+    def _token(self, kind: str, token: str) -> None:
+        if self._skip_depth:
+            if token in ('{', '['):
+                self._skip_depth += 1
+            elif token in ('}', ']'):
+                self._skip_depth -= 1
+                if not self._skip_depth:
+                    self._value_done()
+            return
+
+        if self._capture is not None:
+            self._capture_token(kind, token)
+            return
+
+        frame = self._stack[-1] if self._stack else None
+        if token == ',':
+            if frame is None:
+                raise JsonStreamError("unexpected ','")
+            if frame.is_object:
+                frame.expect_key = True
+            else:
+                frame.key += 1
+            return
+        if token == ':':
+            return
+        if token in ('}', ']'):
+            if frame is None:
+                raise JsonStreamError(f"unexpected {token!r}")
+            self._stack.pop()
+            self._value_done()
+            return
+
+        if frame is not None and frame.expect_key:
+            if kind != 'str':
+                raise JsonStreamError(f"expected an object key, got {token!r}")
+            frame.key = _decode_string(token)
+            frame.expect_key = False
+            return
+
+        # A value starts at the current path
+        path = self._path()
+        targets = self.extraction.matching(path)
+        nested = [
+            (index, target[len(path):]) for index, target in enumerate(self.extraction.paths)
+            if len(target) > len(path) and all(map(_segment_matches, target[:len(path)], path))
+        ] if targets else []
+
+        if token in ('{', '['):
+            if targets:
+                self._capture_targets = [(index, ()) for index in targets] + nested
+                self._capture = [[{} if token == '{' else [], None, token == '{']]
+            elif self.extraction.is_live(path):
+                self._stack.append(_Frame(token == '{'))
+            else:
+                self._skip_depth = 1
+            return
+
+        if targets:
+            value = _scalar(kind, token)
+            for index in targets:
+                self.values[index].append(value)
+        self._value_done()
+
+    def _capture_token(self, kind: str, token: str) -> None:
+        stack = self._capture
+        top = stack[-1]
+        if token == ',':
+            top[2] = isinstance(top[0], dict)
+            return
+        if token == ':':
+            return
+        if token in ('{', '['):
+            stack.append([{} if token == '{' else [], None, token == '{'])
+            return
+        if token in ('}', ']'):
+            stack.pop()
+            if stack:
+                self._capture_add(stack[-1], top[0])
+                return
+            self._capture = None
+            for index, rest in self._capture_targets:
+                self.values[index].extend(_select(top[0], rest))
+            self._value_done()
+            return
+        if top[2]:
+            top[1] = _decode_string(token)
+            top[2] = False
+            return
+        self._capture_add(top, _scalar(kind, token))
+
+    @staticmethod
+    def _capture_add(entry: list, value: Any) -> None:
+        container = entry[0]
+        if isinstance(container, dict):
+            container[entry[1]] = value
+        else:
+            container.append(value)
+
+    def _value_done(self) -> None:
+        if not self._stack:
+            self.finished = True
+
+    def results(self) -> Dict[str, Any]:
+        """Requested fields that were found, keyed by expression."""
+        found = {}
+        for expression, multi, values in zip(self.extraction.expressions, self.extraction.multi, self.values):
+            if values:
+                found[expression] = values if multi else values[0]
+        return found
+
+
+async def extract(chunks: AsyncIterable[bytes], extractor: StreamingExtractor, max_bytes: int) -> bool:
+    """
+    Stream chunks into an extractor, reading at most `max_bytes`.
+
+    Returns whether the body was cut off at the cap before the requested
+    fields were complete. Raises JsonStreamError when the body isn't JSON.
+    """
+    async for chunk in chunks:
+        remaining = max_bytes - extractor.bytes_read
+        if len(chunk) >= remaining:
+            extractor.feed(chunk[:remaining])
+            return not extractor.satisfied
+        extractor.feed(chunk)
+        if extractor.satisfied:
+            return False
+    extractor.close()
+    return False
+
+
+def format_results(found: Dict[str, Any], max_chars: int = 1000) -> str:
+    """Compact text for the LLM: a bare value for one field, JSON otherwise."""
+    if len(found) == 1:
+        value = next(iter(found.values()))
+        text = value if isinstance(value, str) else json.dumps(value, ensure_ascii=False, separators=(',', ':'))
+    else:
+        text = json.dumps(found, ensure_ascii=False, separators=(',', ':'))
+    if len(text) > max_chars:
+        text = text[:max_chars] + '…'
+    return text
@@ -0,0 +1,231 @@
+"""
+SMS Dispatcher
+==============
+Non-blocking SMS sending through Twilio's REST API:
+- Async transport over the shared connection pool (no blocking SDK call
+  on the event loop)
+- Per-sender rate limiting (Twilio long codes send ~1 message/second),
+  shared by the job processes on a host through SMS_RATE_DIR
+- Identical messages to the same number are deduplicated within a window
+- Send latency is recorded for metrics
+"""
+
+import asyncio
+import fcntl
+import hashlib
+import logging
+import os
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Deque, Dict, Optional, Tuple
+
+import httpx
+
+import http_pool
+
+logger = logging.getLogger("ploink-voice-agent.sms")
+
+SENT = 'sent'
+DUPLICATE = 'duplicate'
+FAILED = 'failed'
+
+
+@dataclass
+class SmsResult:
+    status: str
+    sid: Optional[str] = None
+    error: Optional[str] = None
+    latency: float = 0.0
+
+
+DEFAULT_RATE_DIR = '.cache/sms-rate'
+
+
+class SenderRateLimiter:
+    """
+    Token bucket per sending number.
+
+    The bucket is kept as the time it is next empty, and each send reserves
+    its slot before waiting for it. With a directory that time is a file per
+    sender, updated under an flock, so every job process sending from the
+    number shares one limit; without one the limit is per process.
+    """
+
+    def __init__(self, rate: float, burst: int = 1, directory: Optional[str] = None) -> None:
+        self.rate = rate
+        self.burst = burst
+        self.directory = directory
+        self._due: Dict[str, float] = {}
+
+    async def acquire(self, sender: str) -> None:
+        if self.directory:
+            delay = await asyncio.to_thread(self._reserve_shared, sender)
+        else:
+            delay, self._due[sender] = self._schedule(self._due.get(sender, 0.0), time.time())
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def _schedule(self, due: float, now: float) -> Tuple[float, float]:
+        """Seconds until this send may go, and the bucket's new due time."""
+        due = max(due, now)
+        send_at = max(now, due - (self.burst - 1) / self.rate)
+        return send_at - now, due + 1.0 / self.rate
+
+    def _reserve_shared(self, sender: str) -> float:
+        path = os.path.join(self.directory, hashlib.sha1(sender.encode()).hexdigest()[:16])
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(path, 'a+') as f:
+                fcntl.flock(f, fcntl.LOCK_EX)
+                f.seek(0)
+                try:
+                    due = float(f.read() or 0.0)
+                except ValueError:
+                    due = 0.0
+                delay, due = self._schedule(due, time.time())
+                f.seek(0)
+                f.truncate()
+                f.write(repr(due))
+                f.flush()
+            return delay
+        except OSError as e:
+            logger.warning(f"Failed to update shared SMS rate for {sender}: {e}")
+            delay, self._due[sender] = self._schedule(self._due.get(sender, 0.0), time.time())
+            return delay
+
+
+class SmsDispatcher:
+    """Sends SMS without blocking the event loop."""
+
+    def __init__(
+        self,
+        account_sid: str,
+        auth_token: str,
+        api_base: str = 'https://api.twilio.com',
+        rate_per_sender: float = 1.0,
+        dedupe_window: float = 120.0,
+        timeout: float = 10.0,
+        rate_dir: Optional[str] = None,
+    ) -> None:
+        self.account_sid = account_sid
+        self.auth_token = auth_token
+        self.api_base = api_base.rstrip('/')
+        self.dedupe_window = dedupe_window
+        self.timeout = timeout
+        self._limiter = SenderRateLimiter(rate_per_sender, directory=rate_dir)
+
+        # (from, to, body) -> (sent_at, result); in-flight sends are shared
+        self._recent: Dict[Tuple[str, str, str], Tuple[float, SmsResult]] = {}
+        self._inflight: Dict[Tuple[str, str, str], asyncio.Future] = {}
+
+        self.sent = 0
+        self.failed = 0
+        self.duplicates = 0
+        self._latencies: Deque[float] = deque(maxlen=1000)
+
+    async def send(self, from_number: str, to_number: str, body: str) -> SmsResult:
+        key = (from_number, to_number, body)
+        self._expire_recent()
+
+        recent = self._recent.get(key)
+        if recent is not None:
+            self.duplicates += 1
+            return SmsResult(status=DUPLICATE, sid=recent[1].sid)
+
+        pending = self._inflight.get(key)
+        if pending is not None:
+            self.duplicates += 1
+            result = await asyncio.shield(pending)
+            return SmsResult(status=DUPLICATE, sid=result.sid, error=result.error)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            result = await self._send(from_number, to_number, body)
+            future.set_result(result)
+        except BaseException as e:
+            future.set_exception(e)
+            future.exception()
+            raise
+        finally:
+            del self._inflight[key]
+
+        if result.status == SENT:
+            self._recent[key] = (time.monotonic(), result)
+        return result
+
+    async def _send(self, from_number: str, to_number: str, body: str) -> SmsResult:
+        await self._limiter.acquire(from_number)
+
+        started = time.perf_counter()
+        try:
+            response = await http_pool.request(
+                'POST',
+                f"{self.api_base}/2010-04-01/Accounts/{self.account_sid}/Messages.json",
+                auth=(self.account_sid, self.auth_token),
+                data={'From': from_number, 'To': to_number, 'Body': body},
+                timeout=self.timeout,
+            )
+        except httpx.HTTPError as e:
+            self.failed += 1
+            return SmsResult(status=FAILED, error=str(e), latency=time.perf_counter() - started)
+
+        latency = time.perf_counter() - started
+        self._latencies.append(latency)
+
+        if response.status_code >= 400:
+            self.failed += 1
+            try:
+                error = response.json().get('message')
+            except ValueError:
+                error = None
+            logger.warning(f"Twilio rejected SMS to {to_number}: HTTP {response.status_code} {error}")
+            return SmsResult(status=FAILED, error=error or f"HTTP {response.status_code}", latency=latency)
+
+        try:
+            sid = response.json().get('sid')
+        except (ValueError, AttributeError):
+            # Twilio accepted it; only the receipt is unreadable
+            sid = None
+            logger.warning(f"Unreadable Twilio response for SMS to {to_number}: {response.text[:200]}")
+        self.sent += 1
+        return SmsResult(status=SENT, sid=sid, latency=latency)
+
+    def _expire_recent(self) -> None:
+        cutoff = time.monotonic() - self.dedupe_window
+        for key in [key for key, (sent_at, _) in self._recent.items() if sent_at < cutoff]:
+            del self._recent[key]
+
+    def metrics(self) -> Dict[str, float]:
+        latencies = sorted(self._latencies)
+        return {
+            'sent': self.sent,
+            'failed': self.failed,
+            'duplicates': self.duplicates,
+            'in_flight': len(self._inflight),
+            'latency_p50': latencies[len(latencies) // 2] if latencies else None,
+            'latency_p95': latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] if latencies else None,
+        }
+
+
+_dispatcher: Optional[SmsDispatcher] = None
+
+
+def get_sms_dispatcher() -> Optional[SmsDispatcher]:
+    """Process-wide dispatcher, or None when Twilio isn't configured."""
+    global _dispatcher
+    if _dispatcher is None:
+        twilio_sid = os.getenv("TWILIO_ACCOUNT_SID")
+        twilio_token = os.getenv("TWILIO_AUTH_TOKEN")
+        if not twilio_sid or not twilio_token:
+            return None
+        _dispatcher = SmsDispatcher(
+            twilio_sid,
+            twilio_token,
+            api_base=os.getenv('TWILIO_API_BASE', 'https://api.twilio.com'),
+            rate_per_sender=float(os.getenv('SMS_RATE_PER_SENDER', '1')),
+            dedupe_window=float(os.getenv('SMS_DEDUPE_WINDOW', '120')),
+            rate_dir=os.getenv('SMS_RATE_DIR', DEFAULT_RATE_DIR) or None,
+        )
+    return _dispatcher
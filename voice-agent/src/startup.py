@@ -0,0 +1,91 @@
+"""
+Startup Timeline
+================
+Per-call time-to-first-greeting breakdown for the entrypoint:
+- Each startup stage is timed relative to the start of the job
+- Stages may overlap (they run concurrently); the report keeps start/end
+- Reports go to the log and, optionally, to a JSONL file for regression tracking
+- Stage durations also feed the process-wide span histograms
+"""
+
+import json
+import logging
+import os
+import time
+from contextlib import contextmanager
+from typing import Any, Awaitable, Dict, Iterator, Optional, TypeVar
+
+from tracing import get_tracer
+
+logger = logging.getLogger("ploink-voice-agent.startup")
+
+T = TypeVar('T')
+
+
+class StartupTimeline:
+    """Records when each startup stage began and ended for one call."""
+
+    def __init__(self, room: Optional[str] = None) -> None:
+        self.room = room
+        self.agent_id: Optional[str] = None
+        self._origin = time.perf_counter()
+        self._stages: Dict[str, Dict[str, float]] = {}
+        self._marks: Dict[str, float] = {}
+
+    def _now(self) -> float:
+        return time.perf_counter() - self._origin
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Time a synchronous block."""
+        start = self._now()
+        try:
+            yield
+        finally:
+            self._finish(name, start)
+
+    async def run(self, name: str, awaitable: Awaitable[T]) -> T:
+        """Await a coroutine and record it as a stage."""
+        start = self._now()
+        try:
+            return await awaitable
+        finally:
+            self._finish(name, start)
+
+    def _finish(self, name: str, start: float) -> None:
+        end = self._now()
+        self._stages[name] = {'start': start, 'end': end}
+        get_tracer().record(name, 'entrypoint', end - start)
+
+    def mark(self, name: str) -> None:
+        """Record a point in time (e.g. first greeting audio), once."""
+        self._marks.setdefault(name, self._now())
+
+    def report(self) -> Dict[str, Any]:
+        return {
+            'room': self.room,
+            'agent_id': self.agent_id,
+            'stages_ms': {
+                name: {
+                    'start': round(span['start'] * 1000, 1),
+                    'duration': round((span['end'] - span['start']) * 1000, 1),
+                }
+                for name, span in self._stages.items()
+            },
+            'marks_ms': {name: round(at * 1000, 1) for name, at in self._marks.items()},
+        }
+
+    def emit(self) -> Dict[str, Any]:
+        """Log the report and append it to STARTUP_TIMELINE_LOG if configured."""
+        report = self.report()
+        first_greeting = report['marks_ms'].get('first_greeting_audio')
+        logger.info(f"Time to first greeting: {first_greeting} ms {json.dumps(report['stages_ms'])}")
+
+        log_path = os.getenv('STARTUP_TIMELINE_LOG')
+        if log_path:
+            try:
+                with open(log_path, 'a') as f:
+                    f.write(json.dumps(report) + '\n')
+            except OSError as e:
+                logger.warning(f"Failed to write startup timeline: {e}")
+        return report
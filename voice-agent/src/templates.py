@@ -0,0 +1,113 @@
+"""
+Template Engine
+===============
+Compiled {{variable}} templates for prompts, greetings and HTTP body templates:
+- Each template is compiled once into literal/variable segments (cached)
+- Rendering is a single pass over the segments
+- Values are escaped for their context: plain text, JSON string or URL
+"""
+
+import json
+import re
+from functools import lru_cache
+from typing import Any, FrozenSet, Mapping, Tuple
+from urllib.parse import quote
+
+# Dashboard variable keys are free-form apart from whitespace
+PLACEHOLDER = re.compile(r'\{\{\s*([^{}\s]+)\s*\}\}')
+
+# Variables whose value changes from one call to the next; in this order
+# when listed for a call
+PER_CALL_VARIABLES = (
+    'current_date',
+    'current_time',
+    'caller_name',
+    'caller_phone',
+    'caller_email',
+)
+
+ESCAPE_TEXT = 'text'
+ESCAPE_JSON = 'json'
+ESCAPE_URL = 'url'
+
+
+def _escape_text(value: Any) -> str:
+    return str(value)
+
+
+def _escape_json(value: Any) -> str:
+    # Placeholders sit inside JSON string literals ("{{name}}"), so strings are
+    # escaped without their surrounding quotes; numbers, booleans and null are
+    # emitted as JSON literals so unquoted placeholders stay valid too.
+    if isinstance(value, str):
+        return json.dumps(value, ensure_ascii=False)[1:-1]
+    return json.dumps(value, ensure_ascii=False)
+
+
+def _escape_url(value: Any) -> str:
+    return quote(str(value), safe='')
+
+
+_ESCAPERS = {
+    ESCAPE_TEXT: _escape_text,
+    ESCAPE_JSON: _escape_json,
+    ESCAPE_URL: _escape_url,
+}
+
+
+class CompiledTemplate:
+    """
+    A template split into alternating literal and variable segments.
+
+    `literals` always has one more item than `names`:
+    literals[0] + value(names[0]) + literals[1] + ... + literals[-1]
+    Unknown variables render as their original placeholder text.
+    """
+
+    __slots__ = ('source', 'literals', 'names', 'placeholders', 'variables')
+
+    def __init__(self, source: str) -> None:
+        literals = []
+        names = []
+        placeholders = []
+        position = 0
+        for match in PLACEHOLDER.finditer(source):
+            literals.append(source[position:match.start()])
+            names.append(match.group(1))
+            placeholders.append(match.group(0))
+            position = match.end()
+        literals.append(source[position:])
+
+        self.source = source
+        self.literals: Tuple[str, ...] = tuple(literals)
+        self.names: Tuple[str, ...] = tuple(names)
+        self.placeholders: Tuple[str, ...] = tuple(placeholders)
+        self.variables: FrozenSet[str] = frozenset(names)
+
+    def render(self, variables: Mapping[str, Any], escape: str = ESCAPE_TEXT) -> str:
+        if not self.names:
+            return self.source
+
+        escaper = _ESCAPERS[escape]
+        literals = self.literals
+        parts = [literals[0]]
+        for index, name in enumerate(self.names):
+            if name in variables:
+                parts.append(escaper(variables[name]))
+            else:
+                parts.append(self.placeholders[index])
+            parts.append(literals[index + 1])
+        return ''.join(parts)
+
+
+@lru_cache(maxsize=1024)
+def compile_template(source: str) -> CompiledTemplate:
+    """Compile a template once; repeated calls return the cached instance."""
+    return CompiledTemplate(source)
+
+
+def render(source: str, variables: Mapping[str, Any], escape: str = ESCAPE_TEXT) -> str:
+    """Compile (cached) and render a template in one call."""
+    if not source:
+        return source
+    return compile_template(source).render(variables, escape)
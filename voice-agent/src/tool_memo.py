@@ -0,0 +1,212 @@
+"""
+Tool Call Memoization
+=====================
+Session-scoped memo for tool calls, so an LLM repeating itself doesn't
+repeat the work:
+- Calls are keyed on the tool name and arguments; argument order doesn't
+  matter, and whitespace (and, if the policy says so, case) doesn't matter
+  in the free-text arguments the policy names
+- Each tool has a policy: cacheable for the whole session, idempotent within
+  a time window, or never cached
+- Concurrent identical calls share one in-flight execution
+- Failed calls (see mark_failed) are never reused, so a retry really retries
+- A tool that changes what another one reads drops that tool's results
+  (see invalidate), e.g. a booking clears cached availability
+- Hits are counted per tool and recorded to the tracer
+"""
+
+import asyncio
+import functools
+import inspect
+import json
+import logging
+import os
+import time
+from collections import OrderedDict
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, FrozenSet, Iterable, Mapping, Optional, Tuple
+
+from tracing import get_tracer
+
+logger = logging.getLogger("ploink-voice-agent.memo")
+
+CACHEABLE = 'cacheable'
+IDEMPOTENT = 'idempotent'
+NEVER = 'never'
+
+POLICY_MODES = (CACHEABLE, IDEMPOTENT, NEVER)
+
+# Set for the duration of a memoized call; tools flag failures through it
+_outcome: ContextVar[Optional[Dict[str, bool]]] = ContextVar('tool_memo_outcome', default=None)
+
+
+# Resolves an in-flight call whose caller was cancelled; a waiter re-runs it
+_ABANDONED = object()
+
+
+def default_window() -> float:
+    return float(os.getenv('TOOL_MEMO_WINDOW', '60'))
+
+
+@dataclass(frozen=True)
+class MemoPolicy:
+    mode: str = IDEMPOTENT
+    window: Optional[float] = None  # seconds, for IDEMPOTENT; None = TOOL_MEMO_WINDOW
+    text: FrozenSet[str] = frozenset()  # free-text arguments; whitespace is collapsed
+    fold_case: bool = False             # ... and case ignored
+
+    def reusable(self, age: float) -> bool:
+        if self.mode == CACHEABLE:
+            return True
+        window = default_window() if self.window is None else self.window
+        return self.mode == IDEMPOTENT and age <= window
+
+
+def mark_failed() -> None:
+    """Keep the current tool result out of the memo (e.g. an error message)."""
+    outcome = _outcome.get()
+    if outcome is not None:
+        outcome['failed'] = True
+
+
+def _normalize_text(value: str, fold_case: bool) -> str:
+    value = ' '.join(value.split())
+    return value.casefold() if fold_case else value
+
+
+def call_key(tool: str, arguments: Mapping[str, Any], policy: Optional[MemoPolicy] = None) -> Tuple[str, str]:
+    policy = policy or MemoPolicy()
+    normalized = {
+        key: _normalize_text(value, policy.fold_case) if key in policy.text and isinstance(value, str) else value
+        for key, value in arguments.items()
+        if value is not None
+    }
+    return tool, json.dumps(normalized, sort_keys=True, separators=(',', ':'), default=str)
+
+
+@dataclass
+class _Result:
+    value: Any
+    at: float
+
+
+class ToolMemo:
+    """Memoized tool results and in-flight calls for one session."""
+
+    def __init__(self, max_entries: int = 256) -> None:
+        self.max_entries = max_entries
+        self._results: "OrderedDict[Tuple[str, str], _Result]" = OrderedDict()
+        self._inflight: Dict[Tuple[str, str], asyncio.Future] = {}
+        self._stats: Dict[str, Dict[str, int]] = {}
+
+    def _count(self, tool: str, field: str) -> None:
+        counts = self._stats.setdefault(tool, {'calls': 0, 'executed': 0, 'hits': 0, 'shared': 0})
+        counts[field] += 1
+
+    async def call(
+        self,
+        tool: str,
+        arguments: Mapping[str, Any],
+        run: Callable[[], Awaitable[Any]],
+        policy: MemoPolicy,
+    ) -> Any:
+        """Run a tool call through the memo according to its policy."""
+        self._count(tool, 'calls')
+        if policy.mode == NEVER:
+            self._count(tool, 'executed')
+            return await run()
+
+        key = call_key(tool, arguments, policy)
+        while True:
+            cached = self._results.get(key)
+            if cached is not None and policy.reusable(time.monotonic() - cached.at):
+                self._results.move_to_end(key)
+                self._hit(tool, 'hits')
+                return cached.value
+
+            pending = self._inflight.get(key)
+            if pending is None:
+                break
+            value = await asyncio.shield(pending)
+            if value is not _ABANDONED:
+                self._hit(tool, 'shared')
+                return value
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        outcome = {'failed': False}
+        token = _outcome.set(outcome)
+        self._count(tool, 'executed')
+        try:
+            value = await run()
+            future.set_result(value)
+        except asyncio.CancelledError:
+            # Only this caller is cancelled: the first waiter to wake runs the
+            # tool itself and the others share its call
+            future.set_result(_ABANDONED)
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            # Mark retrieved so a failure nobody else awaited doesn't log noise
+            future.exception()
+            raise
+        finally:
+            _outcome.reset(token)
+            del self._inflight[key]
+
+        if outcome['failed']:
+            self._results.pop(key, None)
+        else:
+            self._results[key] = _Result(value, time.monotonic())
+            self._results.move_to_end(key)
+            if len(self._results) > self.max_entries:
+                self._results.popitem(last=False)
+        return value
+
+    def invalidate(self, tool: str) -> int:
+        """Drop a tool's memoized results (its data changed); returns how many."""
+        stale = [key for key in self._results if key[0] == tool]
+        for key in stale:
+            del self._results[key]
+        return len(stale)
+
+    def _hit(self, tool: str, field: str) -> None:
+        self._count(tool, field)
+        get_tracer().record(tool, 'tool_memo_hit', 0.0)
+        logger.debug(f"Reused {tool} result ({field})")
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """calls / executed / hits / shared per tool."""
+        return {tool: dict(counts) for tool, counts in self._stats.items()}
+
+
+def memoized(
+    mode: str = IDEMPOTENT,
+    window: Optional[float] = None,
+    text: Iterable[str] = (),
+    fold_case: bool = False,
+):
+    """
+    Memoize an agent tool method (under @function_tool) in self.tool_memo.
+
+    Arguments are bound to the signature first, so positional, keyword and
+    defaulted arguments produce the same key. `text` names the free-text
+    arguments whose whitespace (and with fold_case, case) is ignored.
+    """
+    def decorator(fn):
+        signature = inspect.signature(fn)
+        policy = MemoPolicy(mode, window, frozenset(text), fold_case)
+
+        @functools.wraps(fn)
+        async def wrapper(self, *args, **kwargs):
+            memo: Optional[ToolMemo] = getattr(self, 'tool_memo', None)
+            if memo is None:
+                return await fn(self, *args, **kwargs)
+
+            bound = signature.bind(self, *args, **kwargs)
+            bound.apply_defaults()
+            arguments = {name: value for name, value in bound.arguments.items() if name != 'self'}
+            return await memo.call(fn.__name__, arguments, lambda: fn(self, *args, **kwargs), policy)
+        return wrapper
+    return decorator
@@ -0,0 +1,450 @@
+"""
+Dynamic HTTP Tool Registry
+==========================
+Compiles dashboard-configured HTTP tools into ready-to-register LLM tools:
+- Config is validated once (name, URL, method, body template)
+- JSON schema for the LLM is precomputed from the tool parameters
+- Headers are normalized once
+- Compiled tools are cached process-wide by a content hash of their config
+- Each call runs within the tool's latency budget, behind a per-endpoint
+  circuit breaker; idempotent GETs can be hedged with a second request
+- Responses are streamed up to a byte cap and only the fields named by the
+  tool's extraction expression are parsed out for the LLM
+- Repeated calls with the same request are memoized per session according
+  to the tool's cache policy
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import re
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Mapping, NamedTuple, Optional, Tuple
+
+import httpx
+from livekit.agents import RunContext, function_tool
+
+import http_pool
+from circuit_breaker import CLOSED, HALF_OPEN, CircuitBreaker, get_breaker_registry
+from loop_watchdog import watch_tool
+from response_extract import (
+    CompiledExtraction,
+    InvalidExpression,
+    JsonStreamError,
+    compile_extraction,
+    extract,
+    format_results,
+)
+from templates import ESCAPE_JSON, CompiledTemplate, compile_template
+from tool_memo import IDEMPOTENT, POLICY_MODES, MemoPolicy, ToolMemo, mark_failed
+from tracing import get_tracer
+
+logger = logging.getLogger("ploink-voice-agent.tools")
+
+ALLOWED_METHODS = {'GET', 'POST', 'PUT', 'PATCH', 'DELETE'}
+
+# Dashboard parameter types -> JSON schema types
+PARAMETER_TYPES = {
+    'string': 'string',
+    'number': 'number',
+    'boolean': 'boolean',
+}
+
+# Sample values for bare (unquoted) body placeholders, by parameter type
+_SAMPLE_LITERALS = {
+    'number': '0',
+    'boolean': 'false',
+}
+
+# LLM providers accept tool names matching this pattern
+_TOOL_NAME = re.compile(r'^[a-zA-Z0-9_-]{1,64}$')
+
+# Latency budget bounds (ms); tools without timeoutMs get TOOL_LATENCY_BUDGET_MS
+MIN_BUDGET_MS = 250
+MAX_BUDGET_MS = 30000
+
+# Response byte cap bounds; tools without maxResponseBytes get TOOL_MAX_RESPONSE_BYTES
+MIN_RESPONSE_BYTES = 1024
+MAX_RESPONSE_BYTES = 4 * 1024 * 1024
+
+# Without an extraction expression, a top-level message or status is reported
+DEFAULT_EXTRACTION = compile_extraction('message, status')
+
+
+class InvalidToolConfig(ValueError):
+    """Raised when a dashboard HTTP tool config can't be compiled."""
+
+
+class ToolResponse(NamedTuple):
+    """Status code and LLM-ready summary of one HTTP tool call."""
+
+    status_code: int
+    text: str
+
+
+def config_hash(tool_config: Mapping[str, Any]) -> str:
+    """Stable content hash of a tool config."""
+    canonical = json.dumps(tool_config, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+def normalize_tool_name(name: str) -> str:
+    return re.sub(r'[^a-z0-9_-]', '', (name or 'custom_tool').strip().lower().replace(' ', '_'))[:64]
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# COMPILED TOOL
+# ═══════════════════════════════════════════════════════════════════════════════
+
+class CompiledHttpTool:
+    """A validated HTTP tool config with everything precomputed for a call."""
+
+    def __init__(self, tool_config: Mapping[str, Any], digest: str) -> None:
+        self.config_hash = digest
+        self.name = normalize_tool_name(tool_config.get('name', 'custom_tool'))
+        self.description = tool_config.get('description') or 'A custom HTTP tool'
+        self.url = (tool_config.get('url') or '').strip()
+        self.method = (tool_config.get('method') or 'POST').upper()
+        self.headers = self._normalize_headers(tool_config.get('headers') or {})
+        self.parameters = list(tool_config.get('parameters') or [])
+        self.budget = self._budget(tool_config.get('timeoutMs'))
+        # A second request is only safe when repeating it has no side effects
+        self.hedge = bool(tool_config.get('hedgeGets')) and self.method == 'GET'
+        self.max_response_bytes = self._max_response_bytes(tool_config.get('maxResponseBytes'))
+        self.memo_policy = MemoPolicy(tool_config.get('cachePolicy') or IDEMPOTENT)
+
+        url = httpx.URL(self.url) if self.url else None
+        self.endpoint = f"{self.method} {url.copy_with(query=None, fragment=None)}" if url else ''
+
+        body_template = tool_config.get('bodyTemplate') or ''
+        self.body: Optional[CompiledTemplate] = compile_template(body_template) if body_template.strip() else None
+
+        response_path = (tool_config.get('responsePath') or '').strip()
+        try:
+            self.extraction: CompiledExtraction = (
+                compile_extraction(response_path) if response_path else DEFAULT_EXTRACTION
+            )
+        except InvalidExpression as e:
+            raise InvalidToolConfig(f"tool {self.name!r} has an invalid response path: {e}")
+
+        self._validate()
+        self.request_variables = tuple(sorted(self.body.variables)) if self.body else ()
+        self.schema = self._build_schema()
+        self.tool = self._build_tool()
+
+    @staticmethod
+    def _budget(timeout_ms: Any) -> float:
+        """Seconds a call may take, from the tool's timeoutMs."""
+        default = float(os.getenv('TOOL_LATENCY_BUDGET_MS', '8000'))
+        try:
+            budget_ms = float(timeout_ms) if timeout_ms not in (None, '') else default
+        except (TypeError, ValueError):
+            budget_ms = default
+        return min(MAX_BUDGET_MS, max(MIN_BUDGET_MS, budget_ms)) / 1000
+
+    @staticmethod
+    def _max_response_bytes(max_bytes: Any) -> int:
+        """How much of a response body is read, from the tool's maxResponseBytes."""
+        default = int(os.getenv('TOOL_MAX_RESPONSE_BYTES', '262144'))
+        try:
+            limit = int(max_bytes) if max_bytes not in (None, '') else default
+        except (TypeError, ValueError):
+            limit = default
+        return min(MAX_RESPONSE_BYTES, max(MIN_RESPONSE_BYTES, limit))
+
+    @staticmethod
+    def _normalize_headers(headers: Mapping[str, Any]) -> Tuple[Tuple[str, str], ...]:
+        normalized = {}
+        for key, value in headers.items():
+            key = str(key).strip()
+            if key:
+                normalized[key] = str(value).strip()
+        return tuple(normalized.items())
+
+    def _validate(self) -> None:
+        if not _TOOL_NAME.match(self.name):
+            raise InvalidToolConfig(f"invalid tool name {self.name!r}")
+
+        url = httpx.URL(self.url) if self.url else None
+        if url is None or url.scheme not in ('http', 'https') or not url.host:
+            raise InvalidToolConfig(f"tool {self.name!r} needs an absolute http(s) URL")
+
+        if self.method not in ALLOWED_METHODS:
+            raise InvalidToolConfig(f"tool {self.name!r} has unsupported method {self.method}")
+
+        if self.memo_policy.mode not in POLICY_MODES:
+            raise InvalidToolConfig(f"tool {self.name!r} has unknown cache policy {self.memo_policy.mode!r}")
+
+        for param in self.parameters:
+            if not isinstance(param, dict) or not param.get('name'):
+                raise InvalidToolConfig(f"tool {self.name!r} has a parameter without a name")
+
+        if self.body is not None:
+            try:
+                json.loads(self._sample_body())
+            except json.JSONDecodeError as e:
+                raise InvalidToolConfig(f"tool {self.name!r} body template is not valid JSON: {e}")
+
+    def _sample_body(self) -> str:
+        """
+        The body template with a sample value per placeholder.
+
+        Placeholders inside a JSON string get an empty string; bare ones get
+        a literal of the parameter's type, as _escape_json renders numbers
+        and booleans unquoted ({"count": {{count}}}).
+        """
+        types = {param['name']: param.get('type', 'string') for param in self.parameters}
+        parts = []
+        in_string = False
+        for index, literal in enumerate(self.body.literals):
+            parts.append(literal)
+            escaped = False
+            for char in literal:
+                if escaped:
+                    escaped = False
+                elif char == '\\':
+                    escaped = in_string
+                elif char == '"':
+                    in_string = not in_string
+            if index < len(self.body.names):
+                if in_string:
+                    continue
+                # A bare string would render unquoted, so it stays invalid
+                parts.append(_SAMPLE_LITERALS.get(types.get(self.body.names[index]), ''))
+        return ''.join(parts)
+
+    def _build_schema(self) -> Dict[str, Any]:
+        properties = {}
+        required = []
+        for param in self.parameters:
+            properties[param['name']] = {
+                'type': PARAMETER_TYPES.get(param.get('type', 'string'), 'string'),
+                'description': param.get('description', ''),
+            }
+            if param.get('required', True):
+                required.append(param['name'])
+
+        return {
+            'name': self.name,
+            'description': self.description,
+            'parameters': {
+                'type': 'object',
+                'properties': properties,
+                'required': required,
+            },
+        }
+
+    def _build_tool(self):
+        compiled = self
+
+        async def http_tool(raw_arguments: Dict[str, object], context: RunContext) -> str:
+            # Session variables (caller_name, company_name, ...) are available to
+            # the body template; arguments from the LLM take precedence.
+            agent = context.session.current_agent
+            variables = dict(getattr(agent, 'variables', None) or {})
+            variables.update(raw_arguments)
+
+            memo: Optional[ToolMemo] = getattr(agent, 'tool_memo', None)
+            if memo is None:
+                return await compiled.invoke(variables)
+            # Keyed on everything that goes into the request, not just the arguments
+            request_variables = {name: variables.get(name) for name in compiled.request_variables}
+            return await memo.call(
+                compiled.name,
+                {**request_variables, **raw_arguments},
+                lambda: compiled.invoke(variables),
+                compiled.memo_policy,
+            )
+
+        http_tool.__name__ = self.name
+        return function_tool(http_tool, raw_schema=self.schema)
+
+    # ═══════════════════════════════════════════════════════════════════════
+    # INVOCATION
+    # ═══════════════════════════════════════════════════════════════════════
+
+    async def invoke(self, variables: Mapping[str, Any]) -> str:
+        """Call the endpoint and summarize the response for the LLM."""
+        with get_tracer().span(self.name, 'http_tool'), watch_tool(self.name):
+            return await self._invoke(variables)
+
+    async def _invoke(self, variables: Mapping[str, Any]) -> str:
+        breaker = get_breaker_registry().get(self.endpoint)
+        if not breaker.allow():
+            # Fail fast: the endpoint just failed for this or another session
+            mark_failed()
+            return "That service isn't responding right now. Let me take a note and we'll follow up."
+
+        # A True from allow() in half-open state makes this call the probe
+        probe = breaker.state == HALF_OPEN
+        outcome: Optional[bool] = None
+        started = time.monotonic()
+        try:
+            body = self.body.render(variables, ESCAPE_JSON) if self.body else ''
+            payload = json.loads(body) if body else None
+
+            if self.hedge and breaker.state == CLOSED:
+                response = await self._hedged_request(payload, breaker)
+            else:
+                response = await asyncio.wait_for(self._request(payload), self.budget)
+
+            outcome = response.status_code < 500 and response.status_code != 429
+            breaker.record(outcome, time.monotonic() - started)
+            if response.status_code >= 400:
+                mark_failed()
+                return f"The request failed with status {response.status_code}"
+            return response.text
+
+        except (asyncio.TimeoutError, httpx.TimeoutException):
+            outcome = False
+            breaker.record(False, time.monotonic() - started)
+            mark_failed()
+            return "The request timed out. Please try again."
+        except httpx.HTTPError as e:
+            outcome = False
+            breaker.record(False)
+            mark_failed()
+            return f"There was an error: {str(e)}"
+        except Exception as e:
+            mark_failed()
+            return f"There was an error: {str(e)}"
+        finally:
+            if probe and outcome is None:
+                # Cancelled (barge-in) or failed before reaching the endpoint:
+                # no verdict, so let the next call probe instead
+                breaker.release_probe()
+
+    async def _request(self, payload: Any) -> ToolResponse:
+        # Make the HTTP request over the shared keep-alive pool; the body is
+        # streamed and closed as soon as the requested fields are in
+        async with http_pool.stream(
+            self.method,
+            self.url,
+            headers=dict(self.headers),
+            json=payload,
+            timeout=self.budget,
+        ) as response:
+            if response.status_code >= 400:
+                return ToolResponse(response.status_code, '')
+
+            extractor = self.extraction.extractor()
+            try:
+                truncated = await extract(response.aiter_bytes(), extractor, self.max_response_bytes)
+            except JsonStreamError:
+                return ToolResponse(response.status_code, f"Request completed: {extractor.head}")
+            return ToolResponse(response.status_code, self._summarize(extractor.results(), truncated))
+
+    def _summarize(self, found: Dict[str, Any], truncated: bool) -> str:
+        if self.extraction is DEFAULT_EXTRACTION:
+            if 'message' in found:
+                return str(found['message'])
+            if 'status' in found:
+                return f"Success: {found['status']}"
+            return "Request completed successfully"
+
+        if truncated:
+            logger.info(f"HTTP tool {self.name} response cut off at {self.max_response_bytes} bytes")
+        if found:
+            return format_results(found)
+        fields = ', '.join(self.extraction.expressions)
+        if truncated:
+            return f"Request completed, but {fields} wasn't in the part of the response that was read"
+        return f"Request completed, but the response had no {fields}"
+
+    async def _hedged_request(self, payload: Any, breaker: CircuitBreaker) -> ToolResponse:
+        """
+        Send the GET, and a second copy if the first is slower than usual.
+
+        The hedge fires at the endpoint's observed p90 (a quarter of the
+        budget until there's history); the first good response wins.
+        """
+        delay = breaker.latency_quantile(0.9) or self.budget / 4
+        delay = min(max(delay, 0.05), self.budget / 2)
+        deadline = time.monotonic() + self.budget
+
+        pending = {asyncio.ensure_future(self._request(payload))}
+        try:
+            done, _ = await asyncio.wait(pending, timeout=delay)
+            if not done:
+                pending.add(asyncio.ensure_future(self._request(payload)))
+
+            last_error: Optional[BaseException] = None
+            while pending:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                done, pending = await asyncio.wait(pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is not None:
+                        last_error = task.exception()
+                        continue
+                    response = task.result()
+                    if response.status_code < 500 or not pending:
+                        return response
+            if last_error is not None and not pending:
+                raise last_error
+            raise asyncio.TimeoutError()
+        finally:
+            for task in pending:
+                task.cancel()
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# REGISTRY
+# ═══════════════════════════════════════════════════════════════════════════════
+
+class ToolRegistry:
+    """Process-wide LRU of compiled tools keyed by config hash."""
+
+    def __init__(self, max_size: int = 512) -> None:
+        self.max_size = max_size
+        self._tools: "OrderedDict[str, CompiledHttpTool]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def compile(self, tool_config: Mapping[str, Any]) -> CompiledHttpTool:
+        """Return the compiled tool for a config; raises InvalidToolConfig."""
+        digest = config_hash(tool_config)
+        compiled = self._tools.get(digest)
+        if compiled is not None:
+            self._tools.move_to_end(digest)
+            self.hits += 1
+            return compiled
+
+        self.misses += 1
+        compiled = CompiledHttpTool(tool_config, digest)
+        self._tools[digest] = compiled
+        if len(self._tools) > self.max_size:
+            self._tools.popitem(last=False)
+        return compiled
+
+    def compile_all(self, tool_configs: List[Mapping[str, Any]], reserved: Optional[set] = None) -> List[CompiledHttpTool]:
+        """
+        Compile an agent's tools, skipping invalid configs and name clashes.
+
+        `reserved` holds names that must not be shadowed (the built-in tools).
+        """
+        taken = set(reserved or ())
+        compiled_tools = []
+        for tool_config in tool_configs:
+            try:
+                compiled = self.compile(tool_config)
+            except InvalidToolConfig as e:
+                logger.warning(f"Skipping HTTP tool '{tool_config.get('name', 'unknown')}': {e}")
+                continue
+            if compiled.name in taken:
+                logger.warning(f"Skipping HTTP tool '{compiled.name}': name already in use")
+                continue
+            taken.add(compiled.name)
+            compiled_tools.append(compiled)
+        return compiled_tools
+
+
+_registry = ToolRegistry()
+
+
+def get_tool_registry() -> ToolRegistry:
+    return _registry
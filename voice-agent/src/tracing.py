@@ -0,0 +1,526 @@
+"""
+Latency Tracing
+===============
+Lightweight spans for where time goes in a call, with no external collector:
+- Spans around entrypoint stages, config loads, built-in and dynamic tools,
+  plus STT/LLM/TTS/end-of-turn timings reported by the AgentSession
+- Every span is tagged with the agent id and room of the call it ran in
+- Durations are aggregated into per-span histograms (p50/p95/p99)
+- Each job process writes its histograms to TRACE_METRICS_DIR; the worker
+  merges them into Prometheus text on TRACE_METRICS_PORT (/metrics)
+- Individual spans can also be appended to a JSONL file (TRACE_SPANS_LOG)
+- Event-loop lag and blocking calls (src/loop_watchdog.py) land in the same
+  histograms under kind "loop"
+
+Histograms are bucketed, so snapshots from many processes add up exactly.
+Snapshots are named by pid and process start, so a reused pid never
+overwrites an earlier process's counts. When metrics are merged, snapshots
+of processes that have exited are folded into a cumulative rollup file and
+removed, so counters only go up and the directory doesn't grow per job.
+Room names stay out of the Prometheus labels (one series per call would
+explode cardinality); they are kept on the span records instead.
+
+Usage:
+    python src/tracing.py [metrics_dir]    # print merged percentiles
+"""
+
+import bisect
+import contextvars
+import fcntl
+import functools
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger("ploink-voice-agent.tracing")
+
+# Upper bounds in seconds, roughly x1.5-2.5 apart from 1ms to 60s
+BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.15, 0.25, 0.35, 0.5, 0.75,
+    1.0, 1.5, 2.5, 3.5, 5.0, 7.5, 10.0, 15.0, 30.0, 60.0,
+)
+
+QUANTILES = (0.5, 0.95, 0.99)
+
+# (span name, kind, agent id)
+SeriesKey = Tuple[str, str, str]
+
+# Snapshots of exited processes, merged (see fold_exited)
+ROLLUP_FILE = 'rollup.json'
+
+# Tags for the call the current task belongs to; a mutable dict so tags set
+# after tasks were spawned (agent id arrives with the room metadata) still apply
+_call_tags: contextvars.ContextVar[Optional[Dict[str, str]]] = contextvars.ContextVar('call_tags', default=None)
+
+
+class Histogram:
+    """Cumulative-bucket latency histogram, mergeable across processes."""
+
+    __slots__ = ('counts', 'count', 'sum')
+
+    def __init__(self) -> None:
+        self.counts = [0] * (len(BUCKETS) + 1)  # last slot is +Inf
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, seconds: float) -> None:
+        self.counts[bisect.bisect_left(BUCKETS, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+
+    def merge(self, other: 'Histogram') -> None:
+        for i, n in enumerate(other.counts):
+            self.counts[i] += n
+        self.count += other.count
+        self.sum += other.sum
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Estimate a quantile by interpolating inside its bucket."""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            if seen + n >= rank and n:
+                lower = BUCKETS[i - 1] if i > 0 else 0.0
+                upper = BUCKETS[i] if i < len(BUCKETS) else BUCKETS[-1]
+                return lower + (upper - lower) * (rank - seen) / n
+            seen += n
+        return BUCKETS[-1]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {'counts': self.counts, 'count': self.count, 'sum': self.sum}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'Histogram':
+        histogram = cls()
+        if len(data.get('counts', [])) == len(histogram.counts):
+            histogram.counts = list(data['counts'])
+            histogram.count = data['count']
+            histogram.sum = data['sum']
+        return histogram
+
+
+class Tracer:
+    """Per-process span recorder and histogram store."""
+
+    def __init__(
+        self,
+        metrics_dir: Optional[str] = None,
+        spans_log: Optional[str] = None,
+        flush_interval: float = 10.0,
+    ) -> None:
+        self.metrics_dir = metrics_dir
+        self.spans_log = spans_log
+        self.flush_interval = flush_interval
+        self.histograms: Dict[SeriesKey, Histogram] = {}
+        self.errors: Dict[SeriesKey, int] = {}
+        self._pending_spans: List[str] = []
+        self._last_flush = time.monotonic()
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+        self._started = time.time()
+
+    # ═══════════════════════════════════════════════════════════════════════
+    # RECORDING
+    # ═══════════════════════════════════════════════════════════════════════
+
+    def start_call(self, **tags: Optional[str]) -> None:
+        """Start a fresh set of call tags for the current task and its children."""
+        _call_tags.set({})
+        self.bind(**tags)
+
+    def bind(self, **tags: Optional[str]) -> None:
+        """Tag spans from the current call (and tasks it spawns) with e.g. agent_id/room."""
+        current = _call_tags.get()
+        if current is None:
+            current = {}
+            _call_tags.set(current)
+        current.update({key: str(value) for key, value in tags.items() if value is not None})
+
+    @contextmanager
+    def span(self, name: str, kind: str = 'internal', **attrs: Any) -> Iterator[Dict[str, Any]]:
+        """Time a block; the yielded dict can take extra attributes."""
+        started = time.perf_counter()
+        error = False
+        try:
+            yield attrs
+        except BaseException:
+            error = True
+            raise
+        finally:
+            self.record(name, kind, time.perf_counter() - started, error=error, **attrs)
+
+    def record(
+        self,
+        name: str,
+        kind: str,
+        seconds: float,
+        error: bool = False,
+        tags: Optional[Dict[str, str]] = None,
+        **attrs: Any,
+    ) -> None:
+        """Record a duration measured elsewhere (e.g. pipeline metrics).
+
+        tags defaults to the current call's; pass them when recording on
+        behalf of another task (e.g. from the loop watchdog).
+        """
+        if tags is None:
+            tags = _call_tags.get() or {}
+        key = (name, kind, tags.get('agent_id', ''))
+        with self._lock:
+            self._observe(key, seconds)
+            if error:
+                self.errors[key] = self.errors.get(key, 0) + 1
+            if self.spans_log:
+                self._pending_spans.append(json.dumps({
+                    'ts': time.time(),
+                    'name': name,
+                    'kind': kind,
+                    'duration_ms': round(seconds * 1000, 2),
+                    'error': error,
+                    **tags,
+                    **attrs,
+                }, default=str))
+
+        if time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def observe(self, name: str, kind: str, seconds: float) -> None:
+        """Add a process-wide sample to a histogram, without a span record.
+
+        For high-rate samples such as event-loop lag, which would flood
+        TRACE_SPANS_LOG and don't belong to any one call.
+        """
+        with self._lock:
+            self._observe((name, kind, ''), seconds)
+
+        if time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def _observe(self, key: SeriesKey, seconds: float) -> None:
+        histogram = self.histograms.get(key)
+        if histogram is None:
+            histogram = self.histograms[key] = Histogram()
+        histogram.observe(seconds)
+
+    # ═══════════════════════════════════════════════════════════════════════
+    # EXPORT
+    # ═══════════════════════════════════════════════════════════════════════
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {'pid': os.getpid(), 'series': _series(self.histograms, self.errors)}
+
+    def snapshot_path(self) -> str:
+        if self._pid != os.getpid():
+            # A forked copy is a different process
+            self._pid, self._started = os.getpid(), time.time()
+        return os.path.join(self.metrics_dir, f"spans-{self._pid}-{int(self._started * 1000)}.json")
+
+    def flush(self) -> None:
+        """Write pending span records and this process's histogram snapshot."""
+        self._last_flush = time.monotonic()
+        with self._lock:
+            spans, self._pending_spans = self._pending_spans, []
+
+        if spans and self.spans_log:
+            try:
+                with open(self.spans_log, 'a') as f:
+                    f.write('\n'.join(spans) + '\n')
+            except OSError as e:
+                logger.warning(f"Failed to write spans: {e}")
+
+        if self.metrics_dir:
+            path = self.snapshot_path()
+            try:
+                os.makedirs(self.metrics_dir, exist_ok=True)
+                tmp_path = f"{path}.tmp"
+                with open(tmp_path, 'w') as f:
+                    json.dump(self.snapshot(), f)
+                os.replace(tmp_path, path)
+            except OSError as e:
+                logger.warning(f"Failed to write span metrics: {e}")
+
+    async def shutdown(self) -> None:
+        """Job shutdown callback: write everything recorded so far."""
+        self.flush()
+
+    def summary(self) -> Dict[str, Dict[str, Any]]:
+        """p50/p95/p99 (ms) and counts per span, for logs."""
+        with self._lock:
+            return _summarize(self.histograms, self.errors)
+
+
+def _summarize(histograms: Dict[SeriesKey, Histogram], errors: Dict[SeriesKey, int]) -> Dict[str, Dict[str, Any]]:
+    merged: Dict[Tuple[str, str], Histogram] = {}
+    merged_errors: Dict[Tuple[str, str], int] = {}
+    for (name, kind, _), histogram in histograms.items():
+        merged.setdefault((name, kind), Histogram()).merge(histogram)
+    for (name, kind, _), count in errors.items():
+        merged_errors[(name, kind)] = merged_errors.get((name, kind), 0) + count
+
+    return {
+        f"{kind}:{name}": {
+            'count': histogram.count,
+            'errors': merged_errors.get((name, kind), 0),
+            **{f"p{int(q * 100)}_ms": round(histogram.quantile(q) * 1000, 1) for q in QUANTILES},
+        }
+        for (name, kind), histogram in sorted(merged.items())
+    }
+
+
+def current_tags() -> Dict[str, str]:
+    """Tags (agent_id, room) of the call the current task belongs to."""
+    return _call_tags.get() or {}
+
+
+def traced(name: Optional[str] = None, kind: str = 'tool'):
+    """Wrap an async function (e.g. under @function_tool) in a span.
+
+    Tool spans are also watched for event-loop blocking (see loop_watchdog).
+    """
+    # Imported here: loop_watchdog records through this module
+    from loop_watchdog import watch_tool
+
+    def decorator(fn):
+        span_name = name or fn.__name__
+
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            with get_tracer().span(span_name, kind), watch_tool(span_name):
+                return await fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def record_pipeline_metrics(metrics: Any) -> None:
+    """Record STT/LLM/TTS/end-of-turn timings from a metrics_collected event."""
+    tracer = get_tracer()
+    kind = getattr(metrics, 'type', '')
+    if kind == 'stt_metrics':
+        tracer.record('stt', 'pipeline', metrics.duration)
+    elif kind == 'llm_metrics' and not metrics.cancelled:
+        tracer.record('llm_ttft', 'pipeline', metrics.ttft)
+        tracer.record('llm', 'pipeline', metrics.duration)
+    elif kind == 'tts_metrics' and not metrics.cancelled:
+        tracer.record('tts_ttfb', 'pipeline', metrics.ttfb)
+        tracer.record('tts', 'pipeline', metrics.duration)
+    elif kind == 'eou_metrics':
+        tracer.record('end_of_utterance', 'pipeline', metrics.end_of_utterance_delay)
+        tracer.record('transcription', 'pipeline', metrics.transcription_delay)
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# MERGED EXPORT (worker process / CLI)
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def _series(histograms: Dict[SeriesKey, Histogram], errors: Dict[SeriesKey, int]) -> List[Dict[str, Any]]:
+    return [
+        {'name': name, 'kind': kind, 'agent_id': agent_id,
+         'errors': errors.get((name, kind, agent_id), 0), **histogram.to_dict()}
+        for (name, kind, agent_id), histogram in histograms.items()
+    ]
+
+
+def _merge(snapshot: Dict[str, Any], histograms: Dict[SeriesKey, Histogram], errors: Dict[SeriesKey, int]) -> None:
+    for series in snapshot.get('series', []):
+        key = (series['name'], series['kind'], series.get('agent_id', ''))
+        histograms.setdefault(key, Histogram()).merge(Histogram.from_dict(series))
+        errors[key] = errors.get(key, 0) + series.get('errors', 0)
+
+
+def _read_snapshot(path: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(path) as f:
+            snapshot = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return snapshot if isinstance(snapshot, dict) else None
+
+
+def _snapshot_names(metrics_dir: str) -> List[str]:
+    try:
+        return [n for n in os.listdir(metrics_dir) if n.startswith('spans-') and n.endswith('.json')]
+    except FileNotFoundError:
+        return []
+
+
+def _process_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _exited(names: List[str]) -> List[str]:
+    """Snapshots whose process is gone: dead pid, or a later process with the same pid."""
+    parsed = []
+    for name in names:
+        # spans-<pid>-<start ms>.json (spans-<pid>.json before start was recorded)
+        parts = name[len('spans-'):-len('.json')].split('-')
+        try:
+            parsed.append((int(parts[0]), int(parts[1]) if len(parts) > 1 else 0, name))
+        except ValueError:
+            continue
+    latest: Dict[int, int] = {}
+    for pid, started, _ in parsed:
+        latest[pid] = max(latest.get(pid, started), started)
+    return [name for pid, started, name in parsed if started < latest[pid] or not _process_alive(pid)]
+
+
+def fold_exited(metrics_dir: str) -> int:
+    """Merge snapshots of exited processes into the rollup and remove them."""
+    exited = _exited(_snapshot_names(metrics_dir))
+    if not exited:
+        return 0
+
+    rollup_path = os.path.join(metrics_dir, ROLLUP_FILE)
+    with open(os.path.join(metrics_dir, 'rollup.lock'), 'a') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        rollup = _read_snapshot(rollup_path) or {}
+        # Folded by a run that didn't get to remove them; already counted
+        already = set(rollup.get('folded', []))
+        histograms: Dict[SeriesKey, Histogram] = {}
+        errors: Dict[SeriesKey, int] = {}
+        _merge(rollup, histograms, errors)
+
+        folded = []
+        for name in exited:
+            if name not in already:
+                snapshot = _read_snapshot(os.path.join(metrics_dir, name))
+                if snapshot is None:
+                    continue
+                _merge(snapshot, histograms, errors)
+            folded.append(name)
+
+        tmp_path = f"{rollup_path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({'series': _series(histograms, errors), 'folded': folded}, f)
+        os.replace(tmp_path, rollup_path)
+        for name in folded:
+            try:
+                os.remove(os.path.join(metrics_dir, name))
+            except FileNotFoundError:
+                pass
+    return len(folded)
+
+
+def load_snapshots(metrics_dir: str) -> Tuple[Dict[SeriesKey, Histogram], Dict[SeriesKey, int]]:
+    """Merge the rollup and every live process snapshot in metrics_dir."""
+    histograms: Dict[SeriesKey, Histogram] = {}
+    errors: Dict[SeriesKey, int] = {}
+    if not os.path.isdir(metrics_dir):
+        return histograms, errors
+    try:
+        fold_exited(metrics_dir)
+    except OSError as e:
+        logger.warning(f"Failed to fold span metrics: {e}")
+
+    rollup = _read_snapshot(os.path.join(metrics_dir, ROLLUP_FILE)) or {}
+    _merge(rollup, histograms, errors)
+    # Already in the rollup but not removed yet
+    folded = set(rollup.get('folded', []))
+    for file_name in _snapshot_names(metrics_dir):
+        if file_name in folded:
+            continue
+        snapshot = _read_snapshot(os.path.join(metrics_dir, file_name))
+        if snapshot is not None:
+            _merge(snapshot, histograms, errors)
+    return histograms, errors
+
+
+def _escape_label(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def render_prometheus(histograms: Dict[SeriesKey, Histogram], errors: Dict[SeriesKey, int]) -> str:
+    lines = [
+        '# HELP ploink_span_duration_seconds Duration of traced spans.',
+        '# TYPE ploink_span_duration_seconds histogram',
+    ]
+    for (name, kind, agent_id), histogram in sorted(histograms.items()):
+        labels = f'span="{_escape_label(name)}",kind="{kind}",agent_id="{_escape_label(agent_id)}"'
+        cumulative = 0
+        for bound, n in zip(BUCKETS + (None,), histogram.counts):
+            cumulative += n
+            le = '+Inf' if bound is None else repr(bound)
+            lines.append(f'ploink_span_duration_seconds_bucket{{{labels},le="{le}"}} {cumulative}')
+        lines.append(f'ploink_span_duration_seconds_sum{{{labels}}} {histogram.sum:.6f}')
+        lines.append(f'ploink_span_duration_seconds_count{{{labels}}} {histogram.count}')
+
+    lines += [
+        '# HELP ploink_span_errors_total Spans that ended with an exception.',
+        '# TYPE ploink_span_errors_total counter',
+    ]
+    for (name, kind, agent_id), count in sorted(errors.items()):
+        labels = f'span="{_escape_label(name)}",kind="{kind}",agent_id="{_escape_label(agent_id)}"'
+        lines.append(f'ploink_span_errors_total{{{labels}}} {count}')
+    return '\n'.join(lines) + '\n'
+
+
+def start_metrics_server(port: int, metrics_dir: str, host: str = '127.0.0.1') -> ThreadingHTTPServer:
+    """Serve merged Prometheus text on /metrics from a daemon thread."""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split('?')[0] != '/metrics':
+                self.send_error(404)
+                return
+            body = render_prometheus(*load_snapshots(metrics_dir)).encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; version=0.0.4')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, name='trace-metrics', daemon=True).start()
+    logger.info(f"Serving span metrics on http://{host}:{port}/metrics")
+    return server
+
+
+_tracer: Optional[Tracer] = None
+
+
+def get_tracer() -> Tracer:
+    """Process-wide tracer configured from the environment."""
+    global _tracer
+    if _tracer is None:
+        _tracer = Tracer(
+            metrics_dir=os.getenv('TRACE_METRICS_DIR', '.cache/trace-metrics'),
+            spans_log=os.getenv('TRACE_SPANS_LOG') or None,
+            flush_interval=float(os.getenv('TRACE_FLUSH_INTERVAL', '10')),
+        )
+    return _tracer
+
+
+def start_exporter() -> Optional[ThreadingHTTPServer]:
+    """Start the /metrics endpoint if TRACE_METRICS_PORT is set."""
+    port = os.getenv('TRACE_METRICS_PORT')
+    if not port:
+        return None
+    return start_metrics_server(
+        int(port),
+        get_tracer().metrics_dir,
+        host=os.getenv('TRACE_METRICS_HOST', '127.0.0.1'),
+    )
+
+
+if __name__ == '__main__':
+    directory = sys.argv[1] if len(sys.argv) > 1 else get_tracer().metrics_dir
+    for series, stats in _summarize(*load_snapshots(directory)).items():
+        print(f"{series:<40} n={stats['count']:<6} err={stats['errors']:<4} "
+              f"p50={stats['p50_ms']}ms p95={stats['p95_ms']}ms p99={stats['p99_ms']}ms")
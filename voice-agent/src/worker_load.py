@@ -0,0 +1,327 @@
+"""
+Worker Load Reporting
+=====================
+Load score for LiveKit job admission (WorkerOptions.load_fnc), built from
+what actually saturates a voice worker rather than CPU alone:
+- Live AgentSessions, against WORKER_MAX_SESSIONS
+- Silero VAD inference time, as a share of the machine's CPUs
+- Sustained event-loop lag (see loop_watchdog), against WORKER_LAG_LIMIT_MS
+- Open CRM writes and SMS sends, against WORKER_MAX_BACKLOG
+- CPU, as LiveKit's default load function measures it
+
+Each signal is scaled to 0..1 and the worker's load is the highest of them:
+a worker is as full as its most saturated resource. A signal at its limit
+puts the worker at the threshold; loop lag and backlog only count past half
+their limit, so healthy workers are ranked by CPU and share calls evenly. Jobs run in separate
+processes, so each job process writes its signals to the worker's
+directory under WORKER_LOAD_DIR once a second and the worker process
+combines the fresh reports. The directory is keyed by WORKER_LOAD_ID (the
+worker's pid unless set), which job processes inherit from the worker, so
+workers sharing a host don't count each other's calls.
+
+At WORKER_LOAD_THRESHOLD the worker reports itself full, so LiveKit sends
+new calls to other workers; admit() (request_fnc) also turns away requests
+that arrive before the next status update.
+"""
+
+import asyncio
+import contextvars
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+from collections import deque
+from dataclasses import asdict, dataclass
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+from crm_queue import get_crm_queue
+from loop_watchdog import get_loop_watchdog
+from sms import get_sms_dispatcher
+
+logger = logging.getLogger("ploink-voice-agent.load")
+
+DEFAULT_LOAD_DIR = '.cache/worker-load'
+
+# Reports older than this many intervals are from busy or dead job processes
+STALE_INTERVALS = 3
+# Report files untouched for this long are removed by the worker
+REMOVE_AFTER = 300.0
+# Loop lag and backlog don't rank a worker until they pass this share of their
+# limit, so healthy workers are ranked by CPU like LiveKit's default
+PRESSURE_KNEE = 0.5
+
+
+@dataclass
+class LoadReport:
+    """Load signals of one job process."""
+
+    sessions: int = 0
+    vad: float = 0.0      # VAD inference seconds per second
+    lag: float = 0.0      # sustained event-loop lag (s)
+    backlog: int = 0      # queued CRM writes + in-flight SMS
+    at: float = 0.0       # wall-clock time of the report
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# JOB PROCESS SIDE
+# ═══════════════════════════════════════════════════════════════════════════════
+
+class LoadReporter:
+    """Collects this process's load signals and publishes them for the worker."""
+
+    def __init__(
+        self,
+        load_dir: str,
+        interval: float = 1.0,
+        key: Optional[str] = None,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.load_dir = load_dir
+        self.interval = interval
+        self.path = os.path.join(load_dir, f"load-{key or os.getpid()}.json")
+        self.clock = clock
+        self.sessions = 0
+        self._vad_seconds = 0.0
+        self._sampled_at = clock()
+        self._task: Optional[asyncio.Task] = None
+
+    def track(self, session: Any) -> None:
+        """Count an AgentSession as live until it emits "close"."""
+        self.sessions += 1
+
+        def _on_close(_event: Any) -> None:
+            self.sessions = max(0, self.sessions - 1)
+            # Don't keep the worker looking full until the next report
+            self.publish()
+
+        session.once("close", _on_close)
+
+    def record_metrics(self, metrics: Any) -> None:
+        """Take VAD inference time from a metrics_collected event."""
+        if getattr(metrics, 'type', '') == 'vad_metrics':
+            self._vad_seconds += metrics.inference_duration_total
+
+    def sample(self) -> LoadReport:
+        now = self.clock()
+        elapsed = max(now - self._sampled_at, 1e-3)
+        vad, self._vad_seconds, self._sampled_at = self._vad_seconds / elapsed, 0.0, now
+
+        watchdog = get_loop_watchdog()
+        backlog = 0
+        crm = get_crm_queue()
+        if crm is not None:
+            backlog += crm.metrics()['depth']
+        sms = get_sms_dispatcher()
+        if sms is not None:
+            backlog += sms.metrics()['in_flight']
+
+        return LoadReport(
+            sessions=self.sessions,
+            vad=vad,
+            lag=watchdog.recent_lag() if watchdog is not None else 0.0,
+            backlog=backlog,
+            at=now,
+        )
+
+    def write(self, report: LoadReport) -> None:
+        try:
+            os.makedirs(self.load_dir, exist_ok=True)
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump(asdict(report), f)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.warning(f"Failed to write load report: {e}")
+
+    def publish(self) -> None:
+        self.write(self.sample())
+
+    def start(self) -> None:
+        """Publish every interval from the running loop; a no-op if already running."""
+        if self._task is not None and not self._task.done():
+            return
+        # Outside any call's context: the reporter outlives the call that started it
+        self._task = contextvars.Context().run(asyncio.get_running_loop().create_task, self._run())
+
+    async def _run(self) -> None:
+        while True:
+            self.publish()
+            await asyncio.sleep(self.interval)
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# WORKER PROCESS SIDE
+# ═══════════════════════════════════════════════════════════════════════════════
+
+class _CpuSampler:
+    """CPU load averaged over ~2.5s, sampled like LiveKit's default load function."""
+
+    def __init__(self) -> None:
+        from livekit.agents.utils.hw import get_cpu_monitor
+
+        self._monitor = get_cpu_monitor()
+        self.cpu_count = self._monitor.cpu_count()
+        self._samples: Deque[float] = deque(maxlen=5)
+        threading.Thread(target=self._run, name='worker-cpu-load', daemon=True).start()
+
+    def _run(self) -> None:
+        while True:
+            self._samples.append(self._monitor.cpu_percent(interval=0.5))
+
+    def __call__(self) -> float:
+        samples = list(self._samples)
+        return sum(samples) / len(samples) if samples else 0.0
+
+
+class WorkerLoad:
+    """Combines job process reports into the worker's load score."""
+
+    def __init__(
+        self,
+        load_dir: str,
+        threshold: float = 0.7,
+        max_sessions: int = 40,
+        lag_limit: float = 0.1,
+        max_backlog: int = 200,
+        cpu_count: Optional[float] = None,
+        interval: float = 1.0,
+        cpu: Optional[Callable[[], float]] = None,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.load_dir = load_dir
+        self.threshold = threshold
+        self.max_sessions = max_sessions
+        self.lag_limit = lag_limit
+        self.max_backlog = max_backlog
+        self.cpu_count = cpu_count or float(os.cpu_count() or 1)
+        self.stale_after = interval * STALE_INTERVALS
+        self.cpu = cpu
+        self.clock = clock
+        self.rejected = 0
+        self._active_jobs: Callable[[], int] = lambda: 0
+
+    def reports(self) -> List[LoadReport]:
+        """Fresh reports from job processes; long-dead ones are removed."""
+        now = self.clock()
+        reports = []
+        try:
+            names = [n for n in os.listdir(self.load_dir) if n.startswith('load-') and n.endswith('.json')]
+        except FileNotFoundError:
+            return reports
+
+        for name in names:
+            path = os.path.join(self.load_dir, name)
+            try:
+                with open(path) as f:
+                    report = LoadReport(**json.load(f))
+            except (OSError, ValueError, TypeError):
+                continue
+            age = now - report.at
+            if age <= self.stale_after:
+                reports.append(report)
+            elif age > REMOVE_AFTER:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+        return reports
+
+    def signals(self) -> Dict[str, float]:
+        """Each load signal scaled to 0..1; a signal at its limit is at the threshold."""
+        reports = self.reports()
+        # Jobs just assigned count before their process has reported
+        sessions = max(sum(r.sessions for r in reports), self._active_jobs())
+        signals = {
+            'sessions': self.threshold * sessions / self.max_sessions,
+            'vad': sum(r.vad for r in reports) / self.cpu_count,
+            'lag': self._pressure(max((r.lag for r in reports), default=0.0) / self.lag_limit),
+            'backlog': self._pressure(sum(r.backlog for r in reports) / self.max_backlog),
+        }
+        if self.cpu is not None:
+            signals['cpu'] = self.cpu()
+        return {name: min(1.0, value) for name, value in signals.items()}
+
+    def _pressure(self, share: float) -> float:
+        """Zero up to the knee, then rising to the threshold at the limit."""
+        return self.threshold * max(0.0, share - PRESSURE_KNEE) / (1.0 - PRESSURE_KNEE)
+
+    def load(self) -> float:
+        return max(self.signals().values())
+
+    def __call__(self, server: Any = None) -> float:
+        """WorkerOptions.load_fnc; runs in a thread of the worker process."""
+        if server is not None:
+            self._active_jobs = lambda: len(server.active_jobs)
+        return self.load()
+
+    async def admit(self, request: Any) -> None:
+        """WorkerOptions.request_fnc: accept unless the worker is already full."""
+        signals = await asyncio.to_thread(self.signals)
+        load = max(signals.values())
+        if load >= self.threshold:
+            self.rejected += 1
+            busiest = max(signals, key=signals.get)
+            logger.info(f"Turning away job {request.id}: load {load:.2f} ({busiest}) >= {self.threshold}")
+            # Not terminal: LiveKit offers the job to another worker
+            await request.reject(terminate=False)
+            return
+        await request.accept()
+
+
+_reporter: Optional[LoadReporter] = None
+_worker_load: Optional[WorkerLoad] = None
+
+
+def load_dir() -> str:
+    """This worker's report directory: WORKER_LOAD_DIR/<WORKER_LOAD_ID>."""
+    base = os.getenv('WORKER_LOAD_DIR', DEFAULT_LOAD_DIR)
+    worker_id = os.getenv('WORKER_LOAD_ID')
+    return os.path.join(base, worker_id) if worker_id else base
+
+
+def _remove_abandoned(base: str, keep: str) -> None:
+    """Remove other workers' directories that haven't been written in a while."""
+    try:
+        entries = list(os.scandir(base))
+    except OSError:
+        return
+    cutoff = time.time() - REMOVE_AFTER
+    for entry in entries:
+        if not entry.is_dir() or os.path.abspath(entry.path) == os.path.abspath(keep):
+            continue
+        try:
+            newest = max([entry.stat().st_mtime] + [f.stat().st_mtime for f in os.scandir(entry.path)])
+        except OSError:
+            continue
+        if newest < cutoff:
+            shutil.rmtree(entry.path, ignore_errors=True)
+
+
+def get_load_reporter() -> LoadReporter:
+    """Process-wide reporter for job processes."""
+    global _reporter
+    if _reporter is None:
+        _reporter = LoadReporter(load_dir())
+    return _reporter
+
+
+def get_worker_load() -> WorkerLoad:
+    """Process-wide load calculator for the worker, configured from the environment."""
+    global _worker_load
+    if _worker_load is None:
+        # Job processes are started from this one and inherit the id
+        os.environ.setdefault('WORKER_LOAD_ID', str(os.getpid()))
+        _remove_abandoned(os.getenv('WORKER_LOAD_DIR', DEFAULT_LOAD_DIR), load_dir())
+        cpu = _CpuSampler()
+        _worker_load = WorkerLoad(
+            load_dir(),
+            threshold=float(os.getenv('WORKER_LOAD_THRESHOLD', '0.7')),
+            max_sessions=int(os.getenv('WORKER_MAX_SESSIONS', '40')),
+            lag_limit=float(os.getenv('WORKER_LAG_LIMIT_MS', '100')) / 1000,
+            max_backlog=int(os.getenv('WORKER_MAX_BACKLOG', '200')),
+            cpu_count=cpu.cpu_count,
+            cpu=cpu,
+        )
+    return _worker_load
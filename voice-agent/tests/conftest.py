@@ -0,0 +1,8 @@
+import os
+import sys
+
+# The agent's modules import each other by name, as when run from src/;
+# benchmarks/ holds corpora the tests share with the benchmarks
+HERE = os.path.dirname(__file__)
+sys.path.insert(0, os.path.join(HERE, '..', 'src'))
+sys.path.insert(0, os.path.join(HERE, '..', 'benchmarks'))
@@ -0,0 +1,22 @@
+"""Fast-path date parsing agrees with dateparser (corpus in benchmarks/bench_dates.py)."""
+
+import pytest
+
+import date_parsing
+from bench_dates import BASE, CORPUS, DIVERGENT, SETTINGS
+
+dateparser = pytest.importorskip('dateparser')
+
+
+@pytest.mark.parametrize('phrase', CORPUS)
+def test_agrees_with_dateparser(phrase):
+    expected = dateparser.parse(phrase, settings=SETTINGS)
+    if expected is None:
+        pytest.skip(f"dateparser doesn't understand {phrase!r}")
+    assert date_parsing.parse_datetime(phrase, base=BASE) == expected
+
+
+@pytest.mark.parametrize('phrase', DIVERGENT)
+def test_parses_where_dateparser_is_wrong(phrase):
+    # dateparser gives None or a wrong date here; the fast path must answer
+    assert date_parsing.parse_datetime(phrase, base=BASE) is not None
@@ -0,0 +1,40 @@
+"""Cold-start import budget of the worker (see src/import_profile.py)."""
+
+import os
+
+import pytest
+
+from import_profile import DEFAULT_BUDGET_MS, parse_importtime, profile_imports
+
+BUDGET_MS = float(os.getenv('STARTUP_IMPORT_BUDGET_MS', DEFAULT_BUDGET_MS))
+
+SAMPLE = """\
+import time: self [us] | cumulative | imported package
+import time:       120 |        120 |   _io
+import time:       900 |       1400 |     httpx
+import time:       500 |       2020 |   agent
+"""
+
+
+def test_parse_importtime():
+    profile = parse_importtime(SAMPLE, 'agent')
+    assert [r.name for r in profile.records] == ['_io', 'httpx', 'agent']
+    assert [r.depth for r in profile.records] == [1, 2, 1]
+    assert profile.total_ms == pytest.approx(2.02)
+    assert profile.by_package()['httpx'] == pytest.approx(0.9)
+
+
+@pytest.fixture(scope='module')
+def agent_profile():
+    # Best of three, so a cold disk cache doesn't fail the budget
+    return min((profile_imports('agent') for _ in range(3)), key=lambda p: p.total_ms)
+
+
+def test_cold_start_within_budget(agent_profile):
+    assert agent_profile.total_ms <= BUDGET_MS, (
+        f"importing agent took {agent_profile.total_ms:.0f} ms (budget {BUDGET_MS:.0f} ms)"
+    )
+
+
+def test_lazy_integrations_stay_off_the_import_path(agent_profile):
+    assert agent_profile.eager_lazy_modules() == []
@@ -0,0 +1,42 @@
+"""The combined load score spreads calls across workers (benchmarks/sim_worker_admission.py)."""
+
+import asyncio
+from argparse import Namespace
+
+import pytest
+
+from sim_worker_admission import LAG_SLO, simulate
+
+ARGS = Namespace(duration=600.0, rate=0.7, call_length=120.0, seed=7)
+MAX_SPREAD = 1.35
+
+
+def spread(pool):
+    assigned = [worker.assigned for worker in pool]
+    return max(assigned) / min(assigned)
+
+
+@pytest.fixture(scope='module')
+def runs():
+    return {policy: asyncio.run(simulate(policy, ARGS)) for policy in ('cpu', 'combined')}
+
+
+def test_every_call_is_placed(runs):
+    pool, dropped = runs['combined']
+    assert dropped == 0
+    assert sum(worker.assigned for worker in pool) > 0
+
+
+def test_calls_spread_evenly(runs):
+    pool, _ = runs['combined']
+    assert spread(pool) <= MAX_SPREAD
+    assert spread(pool) <= spread(runs['cpu'][0])
+
+
+def test_saturated_workers_are_spared(runs):
+    by_name = {worker.name: worker for worker in runs['combined'][0]}
+    cpu_only = {worker.name: worker for worker in runs['cpu'][0]}
+    # c's loop lag and d's CRM backlog are invisible to CPU alone
+    assert by_name['c'].over_slo < cpu_only['c'].over_slo
+    assert by_name['c'].peak_lag < LAG_SLO * 1.1
+    assert by_name['d'].peak_backlog <= by_name['d'].load.max_backlog